@@ -0,0 +1,319 @@
+import argparse
+import builtins
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+# Benchmarks run headlessly: figures render on Agg and plt.show() is a no-op
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import numpy as np
+import pandas as pd
+
+import dataset_generator
+from college_dashboard import CollegeDashboard
+
+# Students per batch in the default fixtures
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# A case counts as a regression when its median time grows by more than this fraction...
+DEFAULT_THRESHOLD = 0.10
+# ...and by more than this many seconds, so timer noise on tiny cases is ignored
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def build_fixture(directory, students, batches, seed=42):
+    """Generate a fixture of `batches` batches with `students` each, unless it already exists"""
+    if os.path.exists(os.path.join(directory, 'fixture.json')):
+        return directory
+    
+    os.makedirs(directory, exist_ok=True)
+    subjects_df = dataset_generator.build_subjects()
+    subjects_df.to_csv(os.path.join(directory, 'subjects_semester.csv'), index=False)
+    for batch in dataset_generator.plan_batches(batches, students):
+        dataset_generator.write_batch(batch, subjects_df, directory, seed=seed)
+    
+    # Written last, so an interrupted build is regenerated next time
+    with open(os.path.join(directory, 'fixture.json'), 'w') as f:
+        json.dump({'students': students, 'batches': batches, 'seed': seed}, f)
+    return directory
+
+
+def open_dashboard(fixture, load_batches=True, **options):
+    """Open a dashboard on a fixture quietly, optionally loading every batch"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        dashboard = CollegeDashboard(fixture, **options)
+    if load_batches:
+        for batch in dashboard.get_available_batches():
+            dashboard.get_batch_store(batch)
+    return dashboard
+
+
+@contextlib.contextmanager
+def stub_input(answers):
+    """Answer input() prompts from a list instead of stdin"""
+    answers = iter(answers)
+    original = builtins.input
+    builtins.input = lambda prompt='': next(answers)
+    try:
+        yield
+    finally:
+        builtins.input = original
+
+
+# Each case is a context manager that does its (untimed) setup and yields
+# the call to time. Setup runs again for every repeat, so every timed call
+# starts from a fresh dashboard with cold caches.
+
+@contextlib.contextmanager
+def case_load_data(fixture):
+    dashboard = open_dashboard(fixture, load_batches=False, load=False, use_cache=False)
+    yield dashboard.load_data
+
+
+@contextlib.contextmanager
+def case_load_batches(fixture):
+    # Full CSV parse of every batch (load_data itself only probes the files)
+    dashboard = open_dashboard(fixture, load_batches=False, use_cache=False)
+    yield lambda: [dashboard.get_batch_store(batch) for batch in dashboard.get_available_batches()]
+
+
+@contextlib.contextmanager
+def case_available_semesters(fixture):
+    dashboard = open_dashboard(fixture)
+    yield lambda: [dashboard.get_available_semesters_for_batch(batch)
+                   for batch in dashboard.get_available_batches()]
+
+
+@contextlib.contextmanager
+def case_view_batch_students(fixture):
+    dashboard = open_dashboard(fixture)
+    yield lambda: dashboard.view_batch_students(dashboard.get_available_batches()[0])
+
+
+@contextlib.contextmanager
+def case_calculate_statistics(fixture):
+    dashboard = open_dashboard(fixture)
+    yield lambda: dashboard.calculate_statistics(dashboard.get_available_batches()[0])
+
+
+@contextlib.contextmanager
+def case_search_student(fixture):
+    dashboard = open_dashboard(fixture)
+    # A name from the middle of the oldest batch; the first search also builds the index
+    store = dashboard.get_batch_store(dashboard.get_available_batches()[0])
+    with stub_input([store.names[len(store) // 2]]):
+        yield dashboard.search_student
+
+
+@contextlib.contextmanager
+def case_semester_wise_comparison(fixture):
+    import matplotlib.pyplot as plt
+    dashboard = open_dashboard(fixture)
+    yield lambda: dashboard.semester_wise_comparison(dashboard.get_available_batches()[0])
+    plt.close('all')
+
+
+@contextlib.contextmanager
+def case_add_student_to_batch(fixture):
+    # Adding appends to the batch file, so work on a copy of the fixture
+    with tempfile.TemporaryDirectory() as copy:
+        for name in os.listdir(fixture):
+            if name.endswith('.csv'):
+                shutil.copy(os.path.join(fixture, name), copy)
+        dashboard = open_dashboard(copy, use_cache=False)
+        store = dashboard.get_batch_store(dashboard.get_available_batches()[0])
+        answers = ['1', 'Benchmark Student', 'BENCH0001'] + ['75'] * len(store.subjects)
+        with stub_input(answers):
+            yield dashboard.add_student_to_batch
+
+
+@contextlib.contextmanager
+def case_cold_start(fixture):
+    # A new interpreter up to the menu and out again; the untimed first run writes the startup snapshot
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'college_dashboard.py')
+    run = lambda: subprocess.run([sys.executable, script, '--data-dir', fixture, 'menu'],
+                                 input='11\n', capture_output=True, text=True, check=True)
+    run()
+    yield run
+
+
+CASES = {
+    'cold_start': case_cold_start,
+    'load_data': case_load_data,
+    'load_batches': case_load_batches,
+    'get_available_semesters_for_batch': case_available_semesters,
+    'view_batch_students': case_view_batch_students,
+    'calculate_statistics': case_calculate_statistics,
+    'search_student': case_search_student,
+    'semester_wise_comparison': case_semester_wise_comparison,
+    'add_student_to_batch': case_add_student_to_batch,
+}
+
+
+def run_case(name, fixture, repeat):
+    """Time one case `repeat` times, then trace its allocations once (in a fresh process)"""
+    case = CASES[name]
+    times = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            with case(fixture) as call:
+                start = time.perf_counter()
+                call()
+                times.append(time.perf_counter() - start)
+        
+        # Tracing slows the call down, so it gets a run of its own
+        with case(fixture) as call:
+            tracemalloc.start()
+            call()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    
+    return {
+        'case': name,
+        'wall_s': {
+            'min': min(times),
+            'median': statistics.median(times),
+            'max': max(times),
+        },
+        'repeat': repeat,
+        # Whole process, fixture loading included (ru_maxrss is in KiB on Linux)
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'alloc_peak_mb': peak / 2**20,
+        'alloc_retained_mb': current / 2**20,
+    }
+
+
+def run_benchmarks(sizes, batches, repeat, cases, fixtures_dir, seed=42, log=sys.stderr):
+    """Run every case against fixtures of each size, each case in its own process"""
+    results = []
+    spawn = multiprocessing.get_context('spawn')
+    for students in sizes:
+        fixture = os.path.join(fixtures_dir, f"students_{students}_batches_{batches}_seed_{seed}")
+        print(f"Fixture: {batches} batches x {students} students", file=log)
+        build_fixture(fixture, students, batches, seed)
+        
+        for name in cases:
+            # A new process per case, so peak RSS and warm caches don't carry over
+            with ProcessPoolExecutor(1, mp_context=spawn) as executor:
+                result = executor.submit(run_case, name, fixture, repeat).result()
+            result.update({'students': students, 'batches': batches})
+            results.append(result)
+            print(f"  {name:<34} {result['wall_s']['median'] * 1000:>10.2f} ms  "
+                  f"{result['peak_rss_mb']:>8.1f} MB RSS  {result['alloc_peak_mb']:>8.1f} MB allocated",
+                  file=log)
+    return results
+
+
+def get_environment():
+    """Describe the machine and library versions results were measured with"""
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Compare two results documents case by case
+    
+    Returns a DataFrame with the baseline and current median times, their
+    ratio and whether the case regressed.
+    """
+    def medians(document):
+        return {(result['case'], result['students'], result['batches']): result['wall_s']['median']
+                for result in document['results']}
+    
+    before, after = medians(baseline), medians(current)
+    rows = []
+    for key in sorted(before.keys() & after.keys(), key=lambda key: (key[1], key[2], key[0])):
+        ratio = after[key] / before[key] if before[key] else float('inf')
+        rows.append({
+            'Case': key[0],
+            'Students': key[1],
+            'Batches': key[2],
+            'Baseline ms': round(before[key] * 1000, 2),
+            'Current ms': round(after[key] * 1000, 2),
+            'Ratio': round(ratio, 3),
+            'Regression': ratio > 1 + threshold and after[key] - before[key] > MIN_REGRESSION_SECONDS,
+        })
+    return pd.DataFrame(rows, columns=['Case', 'Students', 'Batches', 'Baseline ms', 'Current ms',
+                                       'Ratio', 'Regression'])
+
+
+def build_parser():
+    """Build the command line parser"""
+    parser = argparse.ArgumentParser(
+        description='Benchmark the dashboard on generated fixtures and report JSON results.')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma-separated students per batch (default: %(default)s)')
+    parser.add_argument('--batches', type=int, default=4, help='batches per fixture (default: 4)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case (default: 3)')
+    parser.add_argument('--cases', default=','.join(CASES),
+                        help='comma-separated cases to run (default: all)')
+    parser.add_argument('--fixtures', help='directory to keep and reuse fixtures in (default: a temporary one)')
+    parser.add_argument('--seed', type=int, default=42, help='fixture random seed (default: 42)')
+    parser.add_argument('--output', help='write results JSON here instead of stdout')
+    parser.add_argument('--baseline', help='results JSON to compare against; exits 1 on a regression')
+    parser.add_argument('--results', help='compare this existing results JSON instead of running benchmarks')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed slowdown before a case is a regression (default: %(default)s)')
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    
+    if args.results:
+        if not args.baseline:
+            parser.error('--results needs --baseline')
+        with open(args.results) as f:
+            current = json.load(f)
+    else:
+        sizes = [int(size) for size in args.sizes.split(',') if size]
+        cases = [name for name in args.cases.split(',') if name]
+        unknown = [name for name in cases if name not in CASES]
+        if unknown:
+            parser.error(f"unknown cases: {', '.join(unknown)} (choose from {', '.join(CASES)})")
+        
+        with contextlib.ExitStack() as stack:
+            fixtures_dir = args.fixtures or stack.enter_context(tempfile.TemporaryDirectory())
+            results = run_benchmarks(sizes, args.batches, args.repeat, cases, fixtures_dir, args.seed)
+        current = {'environment': get_environment(), 'results': results}
+        
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(current, f, indent=2)
+        else:
+            json.dump(current, sys.stdout, indent=2)
+            print()
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        comparison = compare_results(baseline, current, args.threshold)
+        print(comparison.to_string(index=False), file=sys.stderr)
+        if comparison['Regression'].any():
+            print(f"\n{int(comparison['Regression'].sum())} cases regressed by more than "
+                  f"{args.threshold:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
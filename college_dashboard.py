@@ -1,67 +1,1916 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
+import argparse
+import bisect
+import contextlib
+import csv
+import functools
+import glob
+import hashlib
+import heapq
+import importlib.util
+import io
+import json
+import os
+import shlex
+import stat
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import warnings
+from collections import OrderedDict, deque
 
-class CollegeDashboard:
+
+def lazy_import(name):
+    """Import a module on first attribute access instead of now"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# numpy and pandas take longer to import than the menu takes to start from
+# the startup snapshot, so they are imported on first use. matplotlib is
+# imported only by the methods that draw.
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# float32 keeps marks in the 0-100 range accurate to about 1e-5
+MARK_DECIMALS = 4
+
+# Rows per block when statistics are computed over memory-mapped marks
+MEMMAP_CHUNK_ROWS = 65536
+
+# Rows per block when batch CSVs are streamed in
+INGEST_CHUNK_ROWS = 50000
+
+# Resolution of exported figures, normally and in fast mode
+EXPORT_DPI = 100
+EXPORT_FAST_DPI = 72
+
+# Functions listed per action in an instrumentation profile capture
+PROFILE_TOP_FUNCTIONS = 15
+
+# Default grade boundaries: (minimum percentage, grade), below the last one is 'F'
+GRADE_BOUNDARIES = [(90, 'A+'), (80, 'A'), (70, 'B+'), (60, 'B'), (50, 'C'), (40, 'D')]
+FAIL_GRADE = 'F'
+
+
+def widen_marks(marks):
+    """Convert float32 marks to float64, dropping float32 representation noise
+    
+    The result is column-major, so summing a column reads contiguous memory.
+    """
+    return np.round(np.asarray(marks).astype(np.float64, order='F'), MARK_DECIMALS)
+
+
+def row_totals(marks):
+    """Sum each student's marks (rows of marks, NaN skipped) column by column
+    
+    numpy picks its summation order from the array's layout (a single row
+    is summed pairwise), so the columns are added one at a time instead:
+    a student's total then comes out bit-for-bit the same however the rows
+    were chunked.
+    """
+    totals = np.zeros(len(marks))
+    for column in np.asarray(marks).T:
+        totals += np.nan_to_num(column)
+    return totals
+
+
+def to_jsonable(value):
+    """Convert report data (DataFrames, numpy values, NaN) into plain JSON values"""
+    if isinstance(value, pd.DataFrame):
+        return [to_jsonable(record) for record in value.to_dict(orient='records')]
+    if isinstance(value, (dict, pd.Series)):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+class GradeScale:
+    """Vectorized percentage -> letter grade lookup over a boundary table"""
+    
+    def __init__(self, boundaries=GRADE_BOUNDARIES, fail_grade=FAIL_GRADE):
+        boundaries = sorted(boundaries)
+        self.boundaries = [(minimum, grade) for minimum, grade in boundaries]
+        # Plain lists, so a dashboard can start without importing numpy
+        self.thresholds = [float(minimum) for minimum, _ in boundaries]
+        
+        # Grades from lowest to highest band; band i holds thresholds[i-1] <= p < thresholds[i]
+        self.band_grades = [fail_grade] + [grade for _, grade in boundaries]
+        
+        # Categories are sorted by label, matching the old value_counts().sort_index()
+        self.categories = sorted(set(self.band_grades))
+        self.band_codes = [self.categories.index(g) for g in self.band_grades]
+    
+    def grade(self, percentages):
+        """Grade an array of percentages, returning a Categorical"""
+        percentages = np.asarray(percentages, dtype=np.float64)
+        bands = np.searchsorted(self.thresholds, percentages, side='right')
+        # NaN sorts past every threshold; grade it as a fail like the old comparisons did
+        bands[np.isnan(percentages)] = 0
+        return pd.Categorical.from_codes(np.asarray(self.band_codes)[bands], categories=self.categories)
+    
+    def grade_one(self, percentage):
+        """Grade a single percentage"""
+        if percentage != percentage:  # NaN
+            return self.band_grades[0]
+        return self.band_grades[bisect.bisect_right(self.thresholds, percentage)]
+
+
+def compute_aggregates(store, semester=None, grade_scale=None, chunk_rows=None):
+    """Compute per-subject and per-student aggregates for a batch (or one semester of it)"""
+    grade_scale = grade_scale or GradeScale()
+    subjects = store.get_subjects(semester)
+    running = RunningAggregates(store, semester, grade_scale, chunk_rows=chunk_rows)
+    
+    # Per-student columns, filled one row chunk at a time
+    totals = np.zeros(len(store))
+    has_backlog = np.zeros(len(store), dtype=bool)
+    for start, marks in store.iter_row_chunks(semester, chunk_rows):
+        totals[start:start + len(marks)] = row_totals(marks)
+        has_backlog[start:start + len(marks)] = (marks < 40).any(axis=1)
+    
+    max_marks = len(subjects) * 100
+    percentages = totals / max_marks * 100 if subjects else np.full(len(store), np.nan)
+    
+    aggregates = {
+        'subjects': subjects,
+        'n_students': len(store),
+        'average': running.mean,
+        'highest': running.highest,
+        'lowest': running.lowest,
+        'std_dev': running.std_dev,
+        'pass_count': running.pass_count,
+        'fail_count': running.count - running.pass_count,
+        'totals': totals,
+        'percentages': percentages,
+        'grades': grade_scale.grade(percentages),
+        'has_backlog': has_backlog,
+    }
+    
+    # Cached results are shared between callers, so keep them read-only
+    for value in aggregates.values():
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+    return aggregates
+
+
+class Instrumentation:
+    """Opt-in timings for dashboard actions
+    
+    An action is one user-level operation (calculate_statistics, a CLI job,
+    ...). It records its wall time, the time spent in each phase inside it
+    (load, filter, aggregate, format, render, write; nested phases are
+    timed exclusively), and the rows and columns it processed. In capture
+    mode it also records allocations (tracemalloc) and a cProfile summary
+    of the outermost action. Finished actions are kept for slowest() and
+    appended to a JSON-lines metrics file.
+    
+    While disabled, action() and phase() return a shared no-op context, so
+    instrumented code pays one attribute check.
+    """
+    
+    NO_OP = contextlib.nullcontext()
+    
+    def __init__(self, enabled=False, metrics_file=None, profile=False, trace_memory=False, keep=1000):
+        self.enabled = enabled or bool(metrics_file) or profile or trace_memory
+        self.metrics_file = metrics_file
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.records = deque(maxlen=keep)
+        # Open actions and each one's open phases ([name, start]), innermost last
+        self.stack = []
+        self.phase_stacks = []
+    
+    def action(self, name, args=()):
+        """Context manager recording one action"""
+        if not self.enabled:
+            return self.NO_OP
+        return self.record_action(name, args)
+    
+    def phase(self, name):
+        """Context manager timing one phase of the current action"""
+        if not self.enabled or not self.stack:
+            return self.NO_OP
+        return self.record_phase(name)
+    
+    def count(self, rows=0, columns=0):
+        """Add rows (and the widest column count) processed to the current action"""
+        if self.enabled and self.stack:
+            record = self.stack[-1]
+            record['rows'] += int(rows)
+            record['columns'] = max(record['columns'], int(columns))
+    
+    @contextlib.contextmanager
+    def record_action(self, name, args):
+        outermost = not self.stack
+        record = {
+            'action': name,
+            'args': [arg for arg in args if isinstance(arg, (str, int, float, type(None)))],
+            'start': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'phases': {},
+            'rows': 0,
+            'columns': 0,
+        }
+        if not outermost:
+            record['parent'] = self.stack[-1]['action']
+        open_phases = []
+        
+        # Allocations and profiles are captured for the outermost action only
+        started_tracing = False
+        if self.trace_memory and outermost:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            memory_start = tracemalloc.get_traced_memory()[0]
+        profiler = None
+        if self.profile and outermost:
+            import cProfile
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is already active
+                profiler = None
+        
+        self.stack.append(record)
+        self.phase_stacks.append(open_phases)
+        started = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record['wall_ms'] = round((time.perf_counter() - started) * 1000, 3)
+            if profiler is not None:
+                profiler.disable()
+                record['profile'] = self.summarize_profile(profiler)
+            if self.trace_memory and outermost:
+                current, peak = tracemalloc.get_traced_memory()
+                record['alloc_peak_bytes'] = peak - memory_start
+                record['alloc_net_bytes'] = current - memory_start
+                if started_tracing:
+                    tracemalloc.stop()
+            self.stack.pop()
+            self.phase_stacks.pop()
+            record['phases'] = {phase: round(seconds * 1000, 3) for phase, seconds in record['phases'].items()}
+            self.finish(record)
+    
+    @contextlib.contextmanager
+    def record_phase(self, name):
+        phases = self.stack[-1]['phases']
+        open_phases = self.phase_stacks[-1]
+        now = time.perf_counter()
+        if open_phases:
+            # Pause the enclosing phase so time is only counted once
+            parent = open_phases[-1]
+            phases[parent[0]] = phases.get(parent[0], 0.0) + now - parent[1]
+        open_phases.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            _, start = open_phases.pop()
+            phases[name] = phases.get(name, 0.0) + now - start
+            if open_phases:
+                open_phases[-1][1] = now
+    
+    def summarize_profile(self, profiler):
+        """Get the functions with the most cumulative time from a profiler"""
+        import pstats
+        stats = pstats.Stats(profiler).stats
+        top = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP_FUNCTIONS]
+        return [{
+            'function': f"{os.path.basename(file)}:{line}({function})",
+            'calls': calls,
+            'own_ms': round(own_time * 1000, 3),
+            'cumulative_ms': round(cumulative_time * 1000, 3),
+        } for (file, line, function), (_, calls, own_time, cumulative_time, _) in top]
+    
+    def finish(self, record):
+        """Keep a finished action and append it to the metrics file"""
+        self.records.append(record)
+        if self.metrics_file:
+            with open(self.metrics_file, 'a') as f:
+                f.write(json.dumps(to_jsonable(record)) + '\n')
+    
+    @staticmethod
+    def read_metrics(path):
+        """Read the action records of a JSON-lines metrics file"""
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    
+    def slowest(self, top=10, records=None):
+        """Get the slowest actions as a DataFrame, one column per phase"""
+        records = sorted(self.records if records is None else records,
+                         key=lambda record: record['wall_ms'], reverse=True)[:top]
+        phases = []
+        for record in records:
+            phases += [phase for phase in record['phases'] if phase not in phases]
+        
+        rows = []
+        for record in records:
+            row = {
+                'Action': record['action'],
+                'Args': ' '.join(str(arg) for arg in record['args'] if arg is not None),
+                'Wall ms': record['wall_ms'],
+            }
+            row.update({phase: record['phases'].get(phase, 0.0) for phase in phases})
+            row.update({'Rows': record['rows'], 'Cols': record['columns']})
+            if 'alloc_peak_bytes' in record:
+                row['Alloc MB'] = round(record['alloc_peak_bytes'] / 2**20, 2)
+            rows.append(row)
+        return pd.DataFrame(rows)
+    
+    def action_summary(self, records=None):
+        """Get count, mean, 95th percentile and max wall time per action"""
+        records = list(self.records if records is None else records)
+        if not records:
+            return pd.DataFrame(columns=['Action', 'Count', 'Mean ms', 'P95 ms', 'Max ms'])
+        frame = pd.DataFrame({'Action': [record['action'] for record in records],
+                              'wall_ms': [record['wall_ms'] for record in records]})
+        summary = frame.groupby('Action')['wall_ms'].agg(
+            Count='count', Mean='mean', P95=lambda values: values.quantile(0.95), Max='max')
+        summary = summary.rename(columns={'Mean': 'Mean ms', 'P95': 'P95 ms', 'Max': 'Max ms'})
+        return summary.sort_values('Max ms', ascending=False).round(3).reset_index()
+
+
+def instrumented(action):
+    """Record each call of a CollegeDashboard method as an instrumentation action"""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not self.instrumentation.enabled:
+                return method(self, *args, **kwargs)
+            with self.instrumentation.action(action, args + tuple(kwargs.values())):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class AggregateCache:
+    """LRU cache of computed aggregates keyed by (batch, semester, version)
+    
+    Safe to share between threads that read reports concurrently; a value
+    two threads miss at once is simply computed twice.
+    """
+    
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+    
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss"""
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+        
+        value = compute()
+        with self.lock:
+            self.entries[key] = value
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return value
+    
+    def clear(self):
+        """Drop every cached entry"""
+        with self.lock:
+            self.entries.clear()
+    
+    def discard_batch(self, batch):
+        """Drop every cached entry for one batch"""
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == batch]:
+                del self.entries[key]
+    
+    def info(self):
+        """Get hit/miss counters and current size"""
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self.entries), 'maxsize': self.maxsize}
+
+
+class RunningAggregates:
+    """Incrementally maintained statistics for a batch (or one semester of it)
+    
+    Means are exact sums over count: marks are summed as integers in units
+    of 10**-MARK_DECIMALS, so they don't depend on how rows were chunked or
+    added. A mean ending in a half unit (67.145) is the nearest float to
+    that value, so its rounded display can differ from a float column sum,
+    whose rounding error decided which way it went. Variances are merged block by block with Chan's parallel update
+    (a Welford step for a single student). Alongside are min/max, pass
+    counts, a grade histogram, a top-K heap and the rows with backlogs.
+    Building reads the marks in row chunks, and adding a student is
+    O(subjects).
+    """
+    
+    def __init__(self, store, semester=None, grade_scale=None, top_k=10, chunk_rows=None):
+        self.semester = semester
+        self.grade_scale = grade_scale or GradeScale()
+        self.top_k = top_k
+        self.subjects = store.get_subjects(semester)
+        self.max_marks = len(self.subjects) * 100
+        self.n_students = 0
+        
+        n_subjects = len(self.subjects)
+        self.count = np.zeros(n_subjects, dtype=np.int64)
+        self.total_units = np.zeros(n_subjects, dtype=np.int64)
+        self.mean = np.full(n_subjects, np.nan)
+        self.m2 = np.zeros(n_subjects)
+        self.highest = np.full(n_subjects, np.nan)
+        self.lowest = np.full(n_subjects, np.nan)
+        self.pass_count = np.zeros(n_subjects, dtype=np.int64)
+        
+        self.pct_count = 0
+        self.pct_total_units = 0
+        self.pct_mean = 0.0
+        self.pct_m2 = 0.0
+        self.pct_highest = -np.inf
+        self.pct_lowest = np.inf
+        
+        self.grade_counts = np.zeros(len(self.grade_scale.categories), dtype=np.int64)
+        # Min-heap of (percentage, -row): ties keep the earlier student, like nlargest
+        self.top_heap = []
+        self.backlog_rows = []
+        
+        for start, marks in store.iter_row_chunks(semester, chunk_rows):
+            self.add_chunk(start, marks)
+    
+    def add(self, row, marks_row):
+        """Fold one newly appended student (row index and marks slice) into the aggregates"""
+        self.add_chunk(row, widen_marks(np.asarray(marks_row).reshape(1, -1)))
+    
+    def add_chunk(self, start, marks):
+        """Merge a block of students (rows start.., widened marks) into the aggregates"""
+        n_rows = len(marks)
+        units = np.nan_to_num(np.rint(marks * 10 ** MARK_DECIMALS)).astype(np.int64)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            chunk_count = (~np.isnan(marks)).sum(axis=0)
+            chunk_mean = np.nanmean(marks, axis=0)
+            chunk_m2 = np.nansum((marks - chunk_mean) ** 2, axis=0)
+        
+        # Chan et al. merge of M2 per subject, skipping subjects with no marks
+        count = self.count + chunk_count
+        both = (self.count > 0) & (chunk_count > 0)
+        delta = np.where(both, chunk_mean - self.mean, 0.0)
+        scale = chunk_count / np.maximum(count, 1)
+        self.m2 = self.m2 + np.where(chunk_count > 0, chunk_m2, 0.0) + delta ** 2 * self.count * scale
+        self.count = count
+        
+        # Means come from the exact integer sums, so chunking can't change them
+        self.total_units = self.total_units + units.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.mean = np.where(count > 0, self.total_units / (count * 10.0 ** MARK_DECIMALS), np.nan)
+        
+        # fmax/fmin skip NaN, so subjects without any marks stay NaN
+        self.highest = np.fmax(self.highest, np.fmax.reduce(marks, axis=0))
+        self.lowest = np.fmin(self.lowest, np.fmin.reduce(marks, axis=0))
+        self.pass_count = self.pass_count + (marks >= 40).sum(axis=0)
+        
+        if self.max_marks:
+            percentages = row_totals(marks) / self.max_marks * 100
+        else:
+            percentages = np.full(n_rows, np.nan)
+        pct_count = self.pct_count + n_rows
+        pct_mean = percentages.mean()
+        pct_delta = pct_mean - self.pct_mean if self.pct_count else 0.0
+        self.pct_m2 += ((percentages - pct_mean) ** 2).sum() + pct_delta ** 2 * self.pct_count * n_rows / pct_count
+        self.pct_count = pct_count
+        self.pct_total_units += int(units.sum())
+        if self.max_marks:
+            self.pct_mean = self.pct_total_units * 100 / (pct_count * self.max_marks * 10.0 ** MARK_DECIMALS)
+        else:
+            self.pct_mean = np.nan
+        self.pct_highest = max(self.pct_highest, percentages.max())
+        self.pct_lowest = min(self.pct_lowest, percentages.min())
+        
+        grades = self.grade_scale.grade(percentages)
+        self.grade_counts += np.bincount(grades.codes, minlength=len(self.grade_counts))
+        
+        rows = range(-start, -(start + n_rows), -1)
+        for entry in heapq.nlargest(self.top_k, zip(percentages.tolist(), rows)):
+            if len(self.top_heap) < self.top_k:
+                heapq.heappush(self.top_heap, entry)
+            elif entry > self.top_heap[0]:
+                heapq.heapreplace(self.top_heap, entry)
+            else:
+                break
+        
+        self.backlog_rows.extend((np.flatnonzero((marks < 40).any(axis=1)) + start).tolist())
+        self.n_students += n_rows
+    
+    @property
+    def std_dev(self):
+        """Sample standard deviation per subject"""
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.where(self.count > 1, np.sqrt(self.m2 / np.maximum(self.count - 1, 1)), np.nan)
+    
+    @property
+    def pct_std_dev(self):
+        """Sample standard deviation of student percentages"""
+        return np.sqrt(self.pct_m2 / (self.pct_count - 1)) if self.pct_count > 1 else np.nan
+    
+    def top_students(self):
+        """Get [(row, percentage)] for the top-K students, best first"""
+        return [(-neg_row, percentage) for percentage, neg_row in sorted(self.top_heap, reverse=True)]
+    
+    def grade_distribution(self):
+        """Count students per grade, skipping grades nobody received"""
+        counts = pd.Series(self.grade_counts, index=self.grade_scale.categories)
+        return counts[counts > 0]
+
+
+class SemesterRollups:
+    """Materialized per-semester rollups for one batch
+    
+    Holds every student's total and backlog count per semester, plus each
+    subject's mark sum and count, built in one pass over the store's
+    semester column blocks. Adding a student appends one row, so semester
+    lookups never rescan the batch.
+    """
+    
+    def __init__(self, store, chunk_rows=None):
+        self.semesters = sorted(store.semester_offsets)
+        self.column = {sem: k for k, sem in enumerate(self.semesters)}
+        self.offsets = [store.semester_offsets[sem] for sem in self.semesters]
+        self.n_columns = len(store.subjects)
+        # reduceat boundaries; a trailing block of unmapped subjects is reduced and dropped
+        self.boundaries = [start for start, _ in self.offsets]
+        if self.offsets and self.offsets[-1][1] < self.n_columns:
+            self.boundaries.append(self.offsets[-1][1])
+        self.max_marks = np.array([(stop - start) * 100 for start, stop in self.offsets], dtype=np.float64)
+        
+        self.n_students = 0
+        self.totals = np.zeros((16, len(self.semesters)))
+        self.backlogs = np.zeros((16, len(self.semesters)), dtype=np.int32)
+        self.subject_sums = np.zeros(self.n_columns)
+        self.subject_counts = np.zeros(self.n_columns, dtype=np.int64)
+        self.summaries = {}
+        
+        for start, marks in store.iter_row_chunks(chunk_rows=chunk_rows, stored=True):
+            self.add_chunk(marks)
+    
+    def add(self, marks_row):
+        """Fold one newly appended student (full marks row) into the rollups"""
+        self.add_chunk(widen_marks(np.asarray(marks_row).reshape(1, -1)))
+    
+    def add_chunk(self, marks):
+        """Append a block of students (widened marks over all subjects)"""
+        n_rows = len(marks)
+        if self.n_students + n_rows > len(self.totals):
+            capacity = max(2 * len(self.totals), self.n_students + n_rows)
+            self.totals = np.resize(self.totals, (capacity, len(self.semesters)))
+            self.backlogs = np.resize(self.backlogs, (capacity, len(self.semesters)))
+        
+        rows = slice(self.n_students, self.n_students + n_rows)
+        if self.semesters and n_rows:
+            n_semesters = len(self.semesters)
+            self.backlogs[rows] = np.add.reduceat(marks < 40, self.boundaries, axis=1)[:, :n_semesters]
+            # Totals are summed block by block instead: reduceat adds floats in a
+            # different order, and totals must match the aggregates bit for bit
+            for k, (start, stop) in enumerate(self.offsets):
+                self.totals[rows, k] = row_totals(marks[:, start:stop])
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            self.subject_sums += np.nansum(marks, axis=0)
+        self.subject_counts += (~np.isnan(marks)).sum(axis=0)
+        self.n_students += n_rows
+        self.summaries = {}
+    
+    def get_totals(self, semester):
+        """Get every student's total marks for a semester"""
+        return self.totals[:self.n_students, self.column[semester]]
+    
+    def get_percentages(self, semester):
+        """Get every student's percentage for a semester"""
+        return self.get_totals(semester) / self.max_marks[self.column[semester]] * 100
+    
+    def get_backlog_counts(self, semester):
+        """Get every student's number of subjects below 40 in a semester"""
+        return self.backlogs[:self.n_students, self.column[semester]]
+    
+    def get_summary(self, semester):
+        """Get the summary row for a semester (computed once per change)"""
+        if semester not in self.summaries:
+            start, stop = self.offsets[self.column[semester]]
+            percentages = self.get_percentages(semester)
+            backlogs = self.get_backlog_counts(semester)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                subject_means = self.subject_sums[start:stop] / self.subject_counts[start:stop]
+                self.summaries[semester] = {
+                    'subjects': stop - start,
+                    'average': float(np.nanmean(subject_means)),
+                    'class_average': float(percentages.mean()) if self.n_students else np.nan,
+                    'highest': float(percentages.max()) if self.n_students else np.nan,
+                    'lowest': float(percentages.min()) if self.n_students else np.nan,
+                    'students_with_backlogs': int((backlogs > 0).sum()),
+                    'backlogs': int(backlogs.sum()),
+                }
+        return self.summaries[semester]
+
+
+class BacklogTable:
+    """Every mark below 40 in a batch, as (row, column, mark) triples
+    
+    The fail mask is computed once per block of rows and its triples pulled
+    out with np.nonzero, in row order. Queries filter the triples by
+    semester, subject or per-student backlog count without touching the
+    marks again.
+    """
+    
+    def __init__(self, store, chunk_rows=None):
+        self.store = store
+        self.chunks = []
+        for start, marks in store.iter_row_chunks(chunk_rows=chunk_rows, stored=True):
+            self.add_chunk(start, marks)
+    
+    def add(self, row, marks_row):
+        """Add the backlogs of one newly appended student (full marks row)"""
+        self.add_chunk(row, widen_marks(np.asarray(marks_row).reshape(1, -1)))
+    
+    def add_chunk(self, start, marks):
+        """Add the backlogs of a block of students (rows start.., widened marks)"""
+        rows, columns = np.nonzero(marks < 40)
+        self.chunks.append((rows + start, columns, marks[rows, columns]))
+    
+    def get_triples(self):
+        """Get the (rows, columns, marks) arrays of every backlog"""
+        if len(self.chunks) != 1:
+            empty = (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros(0))
+            self.chunks = [tuple(np.concatenate(parts) for parts in zip(empty, *self.chunks))]
+        return self.chunks[0]
+    
+    def query(self, semester=None, subject=None, min_count=1):
+        """Get (rows, columns, marks) of the backlogs in a semester and/or subject,
+        keeping only students with at least min_count of them"""
+        rows, columns, marks = self.get_triples()
+        keep = np.ones(len(rows), dtype=bool)
+        if semester is not None:
+            start, stop = self.store.get_column_range(semester)
+            keep &= (columns >= start) & (columns < stop)
+        if subject is not None:
+            keep &= columns == self.store.subject_index.get(subject, -1)
+        rows, columns, marks = rows[keep], columns[keep], marks[keep]
+        
+        if min_count > 1:
+            counts = np.bincount(rows, minlength=len(self.store))
+            keep = counts[rows] >= min_count
+            rows, columns, marks = rows[keep], columns[keep], marks[keep]
+        
+        # Across semesters, list each student's subjects in file column order
+        if semester is None and self.store.display_columns is not None:
+            positions = np.argsort(self.store.display_columns)
+            order = np.lexsort((positions[columns], rows))
+            rows, columns, marks = rows[order], columns[order], marks[order]
+        return rows, columns, marks
+    
+    def by_student(self, semester=None, subject=None, min_count=1):
+        """Get [(row, [(subject, mark), ...])] for every student with matching backlogs"""
+        rows, columns, marks = self.query(semester, subject, min_count)
+        students, starts = np.unique(rows, return_index=True)
+        subjects = np.array(self.store.subjects, dtype=object)
+        pairs = list(zip(subjects[columns].tolist(), marks.tolist()))
+        bounds = starts.tolist() + [len(pairs)]
+        return [(row, pairs[bounds[i]:bounds[i + 1]]) for i, row in enumerate(students.tolist())]
+    
+    def to_frame(self, semester=None, subject=None, min_count=1):
+        """Get the matching backlogs as a Name/Roll_No/Subject/Sem/Mark table"""
+        rows, columns, marks = self.query(semester, subject, min_count)
+        subjects = np.array(self.store.subjects, dtype=object)
+        semesters = np.zeros(len(subjects), dtype=np.int64)
+        for sem, (start, stop) in self.store.semester_offsets.items():
+            semesters[start:stop] = sem
+        return pd.DataFrame({
+            'Name': self.store.names[rows],
+            'Roll_No': self.store.roll_nos[rows],
+            'Subject': subjects[columns],
+            'Sem': semesters[columns],
+            'Mark': marks,
+        })
+
+
+class RankIndex:
+    """Students of a batch (or one semester of it) ranked by percentage, best first
+    
+    Keeps the negated percentages sorted ascending alongside their rows, with
+    ties in row order like nlargest(keep='first'). Rank, percentile, top/
+    bottom-K and range queries are binary searches plus a K-element slice,
+    and adding a student is a single bisect insertion. Students without a
+    percentage (NaN) sort after everyone: they rank last, have no
+    percentile and are left out of top, bottom and range queries.
+    """
+    
+    def __init__(self, percentages):
+        percentages = np.asarray(percentages, dtype=np.float64)
+        order = np.lexsort((np.arange(len(percentages)), -percentages))
+        self.keys = -percentages[order]
+        self.rows = order.astype(np.intp)
+        self.percentages = percentages.copy()
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    def add(self, row, percentage):
+        """Insert a newly appended student (rows must be added in order)"""
+        self.add_many([row], [percentage])
+    
+    def add_many(self, rows, percentages):
+        """Insert a block of newly appended students (consecutive rows, in order)"""
+        rows = np.asarray(rows, dtype=np.intp)
+        percentages = np.asarray(percentages, dtype=np.float64)
+        order = np.lexsort((rows, -percentages))
+        # side='right' puts new, higher rows after any tied students already indexed
+        positions = np.searchsorted(self.keys, -percentages[order], side='right')
+        self.keys = np.insert(self.keys, positions, -percentages[order])
+        self.rows = np.insert(self.rows, positions, rows[order])
+        self.percentages = np.append(self.percentages, percentages)
+    
+    def ranked(self):
+        """Get how many students have a percentage (NaN keys sort last)"""
+        return int(np.searchsorted(self.keys, np.nan, side='left'))
+    
+    def top(self, k):
+        """Get [(row, percentage)] for the k best students, best first"""
+        stop = min(k, self.ranked())
+        return list(zip(self.rows[:stop].tolist(), (-self.keys[:stop]).tolist()))
+    
+    def bottom(self, k):
+        """Get [(row, percentage)] for the k weakest students, weakest first (the top in reverse)"""
+        stop = self.ranked()
+        start = max(stop - k, 0)
+        return list(zip(self.rows[start:stop][::-1].tolist(), (-self.keys[start:stop][::-1]).tolist()))
+    
+    def between(self, low, high):
+        """Get [(row, percentage)] for students scoring low..high percent (inclusive), best first"""
+        start = np.searchsorted(self.keys, -high, side='left')
+        stop = np.searchsorted(self.keys, -low, side='right')
+        return list(zip(self.rows[start:stop].tolist(), (-self.keys[start:stop]).tolist()))
+    
+    def rank(self, rows):
+        """Get the rank of students (1 = best; tied students share a rank)"""
+        return np.searchsorted(self.keys, -self.percentages[rows], side='left') + 1
+    
+    def percentile(self, rows):
+        """Get the share of the ranked students scoring at or below each student's percentage"""
+        ranked = self.ranked()
+        if not ranked:
+            return np.full(np.shape(rows), np.nan)
+        percentiles = (ranked - self.rank(rows) + 1) / ranked * 100
+        return np.where(np.isnan(self.percentages[rows]), np.nan, percentiles)
+
+
+class BatchStore:
+    """Columnar marks storage for a single batch
+    
+    Marks live in one column-major float32 matrix (students x subjects, NaN
+    for missing marks) with subjects ordered by semester, so each semester
+    is a contiguous block of columns. Names and roll numbers are kept
+    separately.
+    
+    The storage order is internal: unfiltered subjects and marks come back
+    in the batch file's column order, and one semester's in mapping order.
+    """
+    
+    def __init__(self, names, roll_nos, subjects, marks, subject_to_semester=None, file_subjects=None):
+        self.n_students = len(names)
+        self._names = np.array(names, dtype=object)
+        self._roll_nos = np.array(roll_nos, dtype=object)
+        # asanyarray keeps a memory-mapped matrix mapped; appends copy it into RAM
+        marks = np.asanyarray(marks, dtype=np.float32).reshape(self.n_students, len(subjects))
+        self._marks = marks if marks.flags.f_contiguous else np.asfortranarray(marks)
+        
+        # Column order of the batch CSV (used when writing back)
+        self.file_subjects = list(file_subjects if file_subjects is not None else subjects)
+        # When set, a grown marks buffer is a memory-mapped temporary file in this directory
+        self.spill_dir = None
+        self.subjects = list(subjects)
+        self.roll_index = {roll_no: i for i, roll_no in enumerate(self._roll_nos)}
+        self.set_semester_layout(subject_to_semester or {})
+    
+    @classmethod
+    def from_frame(cls, df, subject_to_semester=None):
+        """Build a store from a batch DataFrame"""
+        subjects = [col for col in df.columns if col not in ['Name', 'Roll_No']]
+        marks = df[subjects].to_numpy(dtype=np.float32, na_value=np.nan)
+        return cls(df['Name'].to_numpy(dtype=object), df['Roll_No'].to_numpy(dtype=object),
+                   subjects, marks, subject_to_semester)
+    
+    def __len__(self):
+        return self.n_students
+    
+    @property
+    def names(self):
+        return self._names[:self.n_students]
+    
+    @property
+    def roll_nos(self):
+        return self._roll_nos[:self.n_students]
+    
+    def set_semester_layout(self, subject_to_semester):
+        """Order subject columns by semester and record each semester's column slice"""
+        positions = {subject: i for i, subject in enumerate(subject_to_semester)}
+        unmapped = (float('inf'), len(positions))
+        order = sorted(range(len(self.subjects)), key=lambda i: (
+            (subject_to_semester[self.subjects[i]], positions[self.subjects[i]])
+            if self.subjects[i] in subject_to_semester else unmapped, i))
+        
+        if order != list(range(len(self.subjects))):
+            self._marks = np.asfortranarray(self._marks[:, order])
+            self.subjects = [self.subjects[i] for i in order]
+        
+        self.subject_index = {subject: i for i, subject in enumerate(self.subjects)}
+        # Storage columns in file order, or None when the file is already in semester order
+        file_columns = [self.subject_index[subject] for subject in self.file_subjects]
+        if file_columns == list(range(len(self.subjects))):
+            self.display_columns = None
+        else:
+            self.display_columns = np.array(file_columns, dtype=np.intp)
+        self.semester_offsets = {}
+        for i, subject in enumerate(self.subjects):
+            sem = subject_to_semester.get(subject)
+            if sem is not None:
+                start = self.semester_offsets.get(sem, (i, i))[0]
+                self.semester_offsets[sem] = (start, i + 1)
+    
+    def get_column_range(self, semester=None):
+        """Get the (start, stop) storage column slice for a semester (all subjects if None)"""
+        if semester is None:
+            return 0, len(self.subjects)
+        return self.semester_offsets.get(semester, (0, 0))
+    
+    def get_subjects(self, semester=None):
+        """Get subject columns, optionally only those of one semester"""
+        if semester is None:
+            return list(self.file_subjects)
+        start, stop = self.get_column_range(semester)
+        return self.subjects[start:stop]
+    
+    def iter_row_chunks(self, semester=None, chunk_rows=None, stored=False):
+        """Yield (start row, widened float64 marks) for consecutive blocks of rows
+        
+        stored yields every column in storage order (matching self.subjects).
+        """
+        chunk_rows = chunk_rows or max(self.n_students, 1)
+        for start in range(0, self.n_students, chunk_rows):
+            rows = slice(start, start + chunk_rows)
+            marks = self.get_stored_marks()[rows] if stored else self.get_marks(semester, rows)
+            yield start, widen_marks(marks)
+    
+    def get_marks(self, semester=None, rows=None):
+        """Get a read-only view of the marks matrix (of some rows only, if given)
+        
+        Columns match get_subjects(semester). Unfiltered marks of a file not
+        in semester order are a reordered copy; otherwise this is zero-copy.
+        """
+        start, stop = self.get_column_range(semester)
+        view = self._marks[:self.n_students, start:stop]
+        if rows is not None:
+            view = view[rows]
+        if semester is None and self.display_columns is not None:
+            view = view[:, self.display_columns]
+        view.flags.writeable = False
+        return view
+    
+    def get_stored_marks(self):
+        """Get a read-only zero-copy view of every column in storage order (matching self.subjects)"""
+        view = self._marks[:self.n_students]
+        view.flags.writeable = False
+        return view
+    
+    def to_frame(self, semester=None, rows=None):
+        """Build a display DataFrame with Name, Roll_No and subject columns"""
+        marks = self.get_marks(semester, rows)
+        names, roll_nos = self.names, self.roll_nos
+        if rows is not None:
+            names, roll_nos = names[rows], roll_nos[rows]
+        
+        df = pd.DataFrame(widen_marks(marks), columns=self.get_subjects(semester))
+        df.insert(0, 'Roll_No', roll_nos)
+        df.insert(0, 'Name', names)
+        return df
+    
+    def get_file_columns(self):
+        """Get the CSV header for this batch"""
+        return ['Name', 'Roll_No'] + self.file_subjects
+    
+    def iter_file_rows(self, rows=None, chunk_size=4096):
+        """Yield CSV rows (Name, Roll_No, marks in file column order)"""
+        rows = np.arange(self.n_students) if rows is None else np.asarray(rows)
+        
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            marks = self.get_file_marks(chunk).tolist()
+            for row, row_marks in zip(chunk, marks):
+                yield ([self._names[row] if isinstance(self._names[row], str) else '',
+                        self._roll_nos[row] if isinstance(self._roll_nos[row], str) else ''] +
+                       ['' if mark != mark else mark for mark in row_marks])
+    
+    def get_file_marks(self, rows):
+        """Get widened marks of some rows in file (CSV) column order"""
+        columns = [self.subject_index[subject] for subject in self.file_subjects]
+        return widen_marks(self._marks[np.asarray(rows)][:, columns])
+    
+    @property
+    def nbytes(self):
+        """Approximate memory held by the store, including name/roll strings"""
+        string_bytes = sum(len(value) + 49 for value in self.names if isinstance(value, str))
+        string_bytes += sum(len(value) + 49 for value in self.roll_nos if isinstance(value, str))
+        # Memory-mapped marks are paged in and out by the OS, so they don't count
+        marks_bytes = 0 if isinstance(self._marks, np.memmap) else self._marks.nbytes
+        return marks_bytes + self._names.nbytes + self._roll_nos.nbytes + string_bytes
+    
+    def append(self, name, roll_no, marks):
+        """Append one student; marks maps subject -> mark"""
+        self.reserve(self.n_students + 1, grow=True)
+        
+        row = self.n_students
+        self._names[row] = name
+        self._roll_nos[row] = roll_no
+        self._marks[row] = np.nan
+        for subject, mark in marks.items():
+            self._marks[row, self.subject_index[subject]] = mark
+        
+        self.roll_index[roll_no] = row
+        self.n_students += 1
+        return row
+    
+    def extend(self, names, roll_nos, marks):
+        """Append a block of students; marks columns are in file (CSV) column order"""
+        n_rows = len(names)
+        self.reserve(self.n_students + n_rows, grow=True)
+        
+        file_positions = {subject: i for i, subject in enumerate(self.file_subjects)}
+        columns = [file_positions[subject] for subject in self.subjects]
+        rows = slice(self.n_students, self.n_students + n_rows)
+        self._names[rows] = names
+        self._roll_nos[rows] = roll_nos
+        self._marks[rows] = np.asarray(marks, dtype=np.float32)[:, columns]
+        
+        self.roll_index.update(zip(self._roll_nos[rows], range(rows.start, rows.stop)))
+        self.n_students += n_rows
+        return rows
+    
+    def reserve(self, capacity, grow=False):
+        """Make room for capacity students (doubling the buffers if grow is set)"""
+        if capacity <= len(self._marks):
+            return
+        if grow:
+            capacity = max(capacity, 16, 2 * len(self._marks))
+        self._names = self._grow(self._names, capacity)
+        self._roll_nos = self._grow(self._roll_nos, capacity)
+        self._marks = self._grow(self._marks, capacity)
+    
+    def _grow(self, array, capacity):
+        """Copy an array into a larger buffer (amortized O(1) appends)"""
+        shape = (capacity,) + array.shape[1:]
+        if self.spill_dir and array is self._marks:
+            # Keep the marks of memory-mapped batches on disk as they grow
+            backing = tempfile.TemporaryFile(dir=self.spill_dir)
+            grown = np.memmap(backing, dtype=array.dtype, mode='w+', shape=shape, order='F')
+        else:
+            grown = np.empty(shape, dtype=array.dtype, order='F')
+        grown[:self.n_students] = array[:self.n_students]
+        return grown
+
+
+class StudentIndex:
+    """Search index over the names and roll numbers of every batch
+    
+    Students are identified by (batch, row). Lookups never scan the batch
+    data: exact roll numbers use a hash map, roll number prefixes a sorted
+    array, and substrings of names or roll numbers a trigram inverted index.
+    Matching is case-insensitive.
+    """
+    
+    NGRAM = 3
+    
     def __init__(self):
-        self.subjects_semester_file = 'subjects_semester.csv'
-        self.batch_files = {}
-        self.subjects_semester = pd.DataFrame()
-        self.load_data()
+        self.keys = []        # id -> (batch, row)
+        self.names = []       # id -> lowercased name
+        self.roll_nos = []    # id -> lowercased roll number
+        self.batch_ids = {}   # batch -> ids of its rows, in row order
+        self.roll_map = {}    # lowercased roll number -> ids
+        self.sorted_rolls = []  # sorted (lowercased roll number, id)
+        self.postings = {}    # trigram -> ids of names/roll numbers containing it
+    
+    def __contains__(self, batch):
+        return batch in self.batch_ids
+    
+    def indexed_rows(self, batch):
+        """Get how many rows of a batch are indexed"""
+        return len(self.batch_ids.get(batch, ()))
+    
+    def index_batch(self, batch, store):
+        """Index the rows of a batch store that are not indexed yet"""
+        names, roll_nos = store.names, store.roll_nos
+        start = self.indexed_rows(batch)
+        for row in range(start, len(store)):
+            self.add(batch, row, names[row], roll_nos[row], keep_sorted=False)
+        if len(store) > start:
+            self.sorted_rolls.sort()
+    
+    def add(self, batch, row, name, roll_no, keep_sorted=True):
+        """Index one student"""
+        name = name.lower() if isinstance(name, str) else ''
+        roll_no = roll_no.lower() if isinstance(roll_no, str) else ''
+        
+        key = len(self.keys)
+        self.keys.append((batch, row))
+        self.names.append(name)
+        self.roll_nos.append(roll_no)
+        self.batch_ids.setdefault(batch, []).append(key)
+        self.roll_map.setdefault(roll_no, []).append(key)
+        if keep_sorted:
+            bisect.insort(self.sorted_rolls, (roll_no, key))
+        else:
+            self.sorted_rolls.append((roll_no, key))
+        for gram in self.ngrams(name) | self.ngrams(roll_no):
+            self.postings.setdefault(gram, []).append(key)
+        return key
+    
+    def discard_batch(self, batch):
+        """Remove every row of a batch from the index"""
+        ids = set(self.batch_ids.pop(batch, ()))
+        if not ids:
+            return
+        for key in ids:
+            self.keys[key] = None
+            self.roll_map[self.roll_nos[key]].remove(key)
+            if not self.roll_map[self.roll_nos[key]]:
+                del self.roll_map[self.roll_nos[key]]
+            self.names[key] = self.roll_nos[key] = ''
+        self.sorted_rolls = [entry for entry in self.sorted_rolls if entry[1] not in ids]
+        for gram in list(self.postings):
+            kept = [key for key in self.postings[gram] if key not in ids]
+            if kept:
+                self.postings[gram] = kept
+            else:
+                del self.postings[gram]
+    
+    def ngrams(self, text):
+        """Get the set of trigrams of a string"""
+        return {text[i:i + self.NGRAM] for i in range(len(text) - self.NGRAM + 1)}
+    
+    def find_roll(self, roll_no):
+        """Get the (batch, row) hits for an exact roll number"""
+        return self.hits(self.roll_map.get(roll_no.lower(), ()))
+    
+    def find_roll_prefix(self, prefix):
+        """Get the (batch, row) hits whose roll number starts with prefix"""
+        prefix = prefix.lower()
+        ids = []
+        for roll_no, key in self.sorted_rolls[bisect.bisect_left(self.sorted_rolls, (prefix,)):]:
+            if not roll_no.startswith(prefix):
+                break
+            ids.append(key)
+        return self.hits(ids)
+    
+    def search(self, term):
+        """Get the (batch, row) hits whose name or roll number contains term"""
+        term = term.lower()
+        if len(term) < self.NGRAM:
+            # Too short for the trigram index; check the indexed strings directly
+            candidates = range(len(self.keys))
+        else:
+            postings = sorted((self.postings.get(gram, []) for gram in self.ngrams(term)), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
         
+        return self.hits(key for key in candidates
+                         if self.keys[key] is not None
+                         and (term in self.names[key] or term in self.roll_nos[key]))
+    
+    def hits(self, ids):
+        """Turn index ids into (batch, row) pairs sorted by batch, then row"""
+        return sorted(self.keys[key] for key in ids if self.keys[key] is not None)
+
+
+class CollegeDashboard:
+    def __init__(self, data_dir='.', memory_budget=None, use_cache=True, cache_dir=None,
+                 storage_mode='memory', chunk_rows=None, load=True, backend=None, instrumentation=None):
+        self.data_dir = data_dir
+        # Per-action timings, off unless an enabled Instrumentation is passed in
+        self.instrumentation = instrumentation or Instrumentation()
+        self.subjects_semester_file = os.path.join(data_dir, 'subjects_semester.csv')
+        # The mapping as a DataFrame, or (after a snapshot start) as the plain
+        # table it is built from on first use; see subjects_semester
+        self._subjects_semester = None
+        self.subject_table = None
+        
+        # Storage backend holding the batches instead of the batch CSVs (such as
+        # sqlite_backend.SQLiteBackend); None reads and writes batch_*.csv files
+        if backend is not None and storage_mode == 'memmap':
+            raise ValueError("memmap storage needs the batch CSVs' sidecar cache")
+        self.backend = backend
+        
+        # Binary sidecar cache (.npy marks + JSON index) next to the batch CSVs
+        self.use_cache = use_cache and backend is None
+        self.cache_dir = cache_dir or os.path.join(data_dir, '.dashboard_cache')
+        
+        # storage_mode='memmap' keeps every batch's marks in its memory-mapped
+        # sidecar (only names and roll numbers in RAM) and computes statistics
+        # in chunks of chunk_rows students
+        if storage_mode not in ('memory', 'memmap'):
+            raise ValueError(f"Unknown storage mode: {storage_mode}")
+        self.storage_mode = storage_mode
+        self.chunk_rows = chunk_rows or (MEMMAP_CHUNK_ROWS if storage_mode == 'memmap' else None)
+        
+        # Discovered batches (file, subjects, student count) and the loaded
+        # stores, least recently used first. Stores load on first use and
+        # cold ones are evicted once memory_budget (bytes) is exceeded.
+        self.batch_meta = {}
+        self.batch_files = OrderedDict()
+        self.memory_budget = memory_budget
+        
+        # Subject/semester lookup index (built from subjects_semester)
+        self.subject_to_semester = {}
+        self.semester_to_subjects = {}
+        self.available_semesters_cache = {}
+        
+        self.grade_scale = GradeScale()
+        
+        # Aggregates are cached per (batch, semester, version); adding a
+        # student bumps the batch version so stale entries are never hit
+        self.batch_versions = {}
+        self.aggregate_cache = AggregateCache()
+        
+        # Each batch's source signature (file mtime and size, or the backend's
+        # own) as last read, so changes made by other processes are noticed
+        self.batch_signatures = {}
+        
+        # Running statistics per (batch, semester) and per-semester rollups per
+        # batch, both updated in place on add
+        self.running_aggregates = {}
+        self.semester_rollups = {}
+        self.backlog_tables = {}
+        self.rank_indexes = {}
+        
+        # Rows added in memory but not yet written, per batch
+        self.pending_students = {}
+        
+        # Name/roll number search index, filled per batch on the first search
+        # and kept current as students are added
+        self.student_index = StudentIndex()
+        
+        # Headless figure export (see set_export_options); one reusable figure per kind
+        self.export_options = {'directory': 'figures', 'format': 'png', 'fast': False}
+        self.export_figures = {}
+        
+        # load=False starts empty; batches are then added with set_batch_data
+        if load:
+            self.load_data()
+        
+    @property
+    def subjects_semester(self):
+        """The subject-semester mapping as a DataFrame"""
+        if self._subjects_semester is None:
+            table = self.subject_table or {}
+            self._subjects_semester = pd.DataFrame(table.get('data'), columns=table.get('columns'))
+        return self._subjects_semester
+    
+    @instrumented('load_data')
     def load_data(self):
-        """Load subject-semester mapping and all batch files"""
-        # Load subject-semester mapping
-        self.subjects_semester = pd.read_csv(self.subjects_semester_file)
+        """Load subject-semester mapping and discover batch files"""
+        if self.backend is not None:
+            with self.instrumentation.phase('load'):
+                self.set_subject_mapping(self.backend.get_subject_mapping())
+                for batch_name, meta in self.backend.list_batches().items():
+                    self.batch_meta[batch_name] = dict(meta, file=None)
+                    self.instrumentation.count(meta['students'], len(meta['subjects']))
+                self.batch_signatures.update(self.backend.get_batch_signatures())
+            if not self.batch_meta:
+                print("No batches found!")
+            return
+        
+        # Discover batch CSV files; each is only probed here and fully loaded on first use
+        batch_files_list = sorted(glob.glob(os.path.join(self.data_dir, 'batch_*.csv')))
+        
+        # While no file has changed, the startup snapshot already holds the
+        # mapping and every probe result, and no data file is opened
+        with self.instrumentation.phase('load'):
+            if self.use_cache and batch_files_list and self.load_startup_snapshot(batch_files_list):
+                print()
+                return
         
-        # Load all batch CSV files
-        batch_files_list = ['batch_2021_25.csv', 'batch_2022_26.csv', 'batch_2023_27.csv', 'batch_2024_28.csv']
+        # Load subject-semester mapping
+        with self.instrumentation.phase('load'):
+            self.set_subject_mapping(pd.read_csv(self.subjects_semester_file))
         
         if not batch_files_list:
             print("No batch files found!")
             return
         
-        for file in batch_files_list:
-            # Extract batch name from filename (e.g., batch_2021_25.csv -> 2021-25)
-            batch_name = file.replace('batch_', '').replace('.csv', '').replace('_', '-')
-            self.batch_files[batch_name] = pd.read_csv(file)
+        with self.instrumentation.phase('load'):
+            for file in batch_files_list:
+                # Extract batch name from filename (e.g., batch_2021_25.csv -> 2021-25)
+                batch_name = os.path.basename(file).replace('batch_', '').replace('.csv', '').replace('_', '-')
+                self.batch_signatures[batch_name] = self.get_file_signature(file)
+                self.batch_meta[batch_name] = self.probe_batch_file(file)
+                self.instrumentation.count(self.batch_meta[batch_name]['students'],
+                                           len(self.batch_meta[batch_name]['subjects']))
         
+        self.save_startup_snapshot()
         print()
     
+    def probe_batch_file(self, file):
+        """Read a batch file's header and count its rows without parsing them"""
+        columns = self.read_csv_header(file)
+        
+        newlines = 0
+        last_byte = b'\n'
+        with open(file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                newlines += block.count(b'\n')
+                last_byte = block[-1:]
+        rows = newlines + (last_byte != b'\n')
+        
+        return {
+            'file': file,
+            'subjects': [col for col in columns if col not in ['Name', 'Roll_No']],
+            'students': max(rows - 1, 0),
+        }
+    
+    def get_snapshot_path(self):
+        """Get the path of the startup snapshot (subject mapping and batch file probes)"""
+        return os.path.join(self.cache_dir, 'startup.json')
+    
+    def load_startup_snapshot(self, batch_files):
+        """Fill the subject mapping and batch metadata from the startup snapshot
+        
+        Returns False, changing nothing, if there is no snapshot or a batch
+        file has been added or removed, or the mapping or any batch file has
+        a different size or mtime than when the snapshot was written.
+        """
+        try:
+            with open(self.get_snapshot_path()) as f:
+                snapshot = json.load(f)
+            mapping, batches = snapshot['subjects_semester'], snapshot['batches']
+            if sorted(meta['file'] for meta in batches.values()) != sorted(map(os.path.basename, batch_files)):
+                return False
+            if mapping['source'] != self.get_file_signature(self.subjects_semester_file):
+                return False
+            for meta in batches.values():
+                if meta['source'] != self.get_file_signature(os.path.join(self.data_dir, meta['file'])):
+                    return False
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        
+        self.set_subject_table(mapping['columns'], mapping['data'])
+        for batch_name, meta in batches.items():
+            self.batch_meta[batch_name] = {
+                'file': os.path.join(self.data_dir, meta['file']),
+                'subjects': meta['subjects'],
+                'students': meta['students'],
+            }
+            self.batch_signatures[batch_name] = meta['source']
+            self.instrumentation.count(meta['students'], len(meta['subjects']))
+        return True
+    
+    def save_startup_snapshot(self):
+        """Write the subject mapping and batch metadata for load_startup_snapshot"""
+        if not self.use_cache:
+            return
+        
+        table = self.subject_table
+        if table is None:
+            table = {'columns': [str(column) for column in self.subjects_semester.columns],
+                     'data': to_jsonable(self.subjects_semester.to_numpy().tolist())}
+        
+        # The snapshot is only an optimization, so failing to write it is not an error
+        try:
+            snapshot = {
+                'subjects_semester': dict(table, source=self.get_file_signature(self.subjects_semester_file)),
+                'batches': {batch: {
+                    'file': os.path.basename(meta['file']),
+                    'source': self.get_file_signature(meta['file']),
+                    'subjects': list(meta['subjects']),
+                    'students': meta['students'],
+                } for batch, meta in self.batch_meta.items()},
+            }
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.write_json_atomic(self.get_snapshot_path(), snapshot)
+        except OSError:
+            pass
+    
+    def load_batch(self, batch):
+        """Load a batch into a BatchStore, from the binary cache when it is fresh"""
+        if self.backend is not None:
+            return self.backend.load_batch(batch, self.subject_to_semester)
+        
+        memmap = self.storage_mode == 'memmap'
+        store = None
+        if self.use_cache or memmap:
+            store = self.load_batch_cache(batch)
+        
+        if store is None and memmap:
+            # Stream the CSV straight into the sidecar, then page the marks from disk
+            store = self.ingest_batch_to_cache(batch)
+        if store is None:
+            store = self.ingest_batch(batch)
+            if self.use_cache or memmap:
+                self.save_batch_cache(batch, store)
+        
+        if memmap and isinstance(store.get_stored_marks(), np.memmap):
+            store.spill_dir = self.cache_dir
+        return store
+    
+    def read_batch_chunks(self, file, chunk_rows=INGEST_CHUNK_ROWS):
+        """Yield (names, roll numbers, float32 marks in file column order) for blocks of rows
+        
+        Marks are parsed straight to float32 and names as a categorical, so
+        repeated names share one string. Marks outside 0-100 are reported and
+        treated as missing.
+        """
+        subjects = [col for col in self.read_csv_header(file) if col not in ['Name', 'Roll_No']]
+        dtypes = {subject: np.float32 for subject in subjects}
+        dtypes.update({'Name': 'category', 'Roll_No': str})
+        
+        first_row = 1
+        for chunk in pd.read_csv(file, dtype=dtypes, chunksize=chunk_rows):
+            marks = chunk[subjects].to_numpy(dtype=np.float32, na_value=np.nan)
+            invalid = (marks < 0) | (marks > 100)
+            if invalid.any():
+                bad_rows = (np.flatnonzero(invalid.any(axis=1)) + first_row).tolist()
+                shown = ', '.join(map(str, bad_rows[:5])) + (', ...' if len(bad_rows) > 5 else '')
+                warnings.warn(f"{file}: {int(invalid.sum())} marks outside 0-100 treated as missing "
+                              f"(data rows {shown})")
+                marks[invalid] = np.nan
+            
+            yield (np.asarray(chunk['Name'], dtype=object), chunk['Roll_No'].to_numpy(dtype=object), marks)
+            first_row += len(chunk)
+    
+    def ingest_batch(self, batch, chunk_rows=INGEST_CHUNK_ROWS):
+        """Stream a batch CSV into a new BatchStore, one block of rows at a time"""
+        file = self.batch_meta[batch]['file']
+        subjects = [col for col in self.read_csv_header(file) if col not in ['Name', 'Roll_No']]
+        store = BatchStore([], [], subjects, np.zeros((0, len(subjects)), dtype=np.float32),
+                           self.subject_to_semester)
+        # The probed row count sizes the buffers up front, so they are not regrown per chunk
+        store.reserve(self.batch_meta[batch].get('students', 0))
+        
+        for names, roll_nos, marks in self.read_batch_chunks(file, chunk_rows):
+            store.extend(names, roll_nos, marks)
+        return store
+    
+    def ingest_batch_to_cache(self, batch, chunk_rows=INGEST_CHUNK_ROWS):
+        """Stream a batch CSV into its .npy sidecar without holding the marks in memory
+        
+        Returns the memory-mapped store, or None if the sidecar can't be written.
+        """
+        file = self.batch_meta[batch]['file']
+        file_subjects = [col for col in self.read_csv_header(file) if col not in ['Name', 'Roll_No']]
+        layout = BatchStore([], [], file_subjects, np.zeros((0, len(file_subjects))), self.subject_to_semester)
+        file_positions = {subject: i for i, subject in enumerate(file_subjects)}
+        columns = [file_positions[subject] for subject in layout.subjects]
+        marks_path, index_path = self.get_cache_paths(batch)
+        
+        # The probe counts newlines, an upper bound on the rows pandas will parse
+        capacity = self.batch_meta[batch].get('students', 0)
+        names, roll_nos = [], []
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', dir=self.cache_dir)
+            os.close(fd)
+            try:
+                marks = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32,
+                                                  shape=(capacity, len(file_subjects)), fortran_order=True)
+                row = 0
+                for chunk_names, chunk_roll_nos, chunk_marks in self.read_batch_chunks(file, chunk_rows):
+                    marks[row:row + len(chunk_names)] = chunk_marks[:, columns]
+                    names.extend(chunk_names.tolist())
+                    roll_nos.extend(chunk_roll_nos.tolist())
+                    row += len(chunk_names)
+                
+                if row < capacity:
+                    # Blank or multi-line rows: copy into an exactly sized file one column at a time
+                    fd, trimmed_path = tempfile.mkstemp(prefix='.tmp_', dir=self.cache_dir)
+                    os.close(fd)
+                    trimmed = np.lib.format.open_memmap(trimmed_path, mode='w+', dtype=np.float32,
+                                                        shape=(row, len(file_subjects)), fortran_order=True)
+                    for j in range(len(file_subjects)):
+                        trimmed[:, j] = marks[:row, j]
+                    del marks
+                    os.replace(trimmed_path, tmp_path)
+                    marks = trimmed
+                
+                marks.flush()
+                del marks
+                with open(tmp_path, 'rb+') as f:
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, marks_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            
+            self.write_cache_index(batch, layout.subjects, file_subjects, names, roll_nos)
+        except OSError:
+            return None
+        return self.load_batch_cache(batch)
+    
+    def get_cache_paths(self, batch):
+        """Get the (marks .npy, index .json) sidecar paths for a batch"""
+        stem = os.path.splitext(os.path.basename(self.get_batch_filename(batch)))[0]
+        return (os.path.join(self.cache_dir, f"{stem}.marks.npy"),
+                os.path.join(self.cache_dir, f"{stem}.index.json"))
+    
+    def get_file_signature(self, file, with_hash=False):
+        """Get the mtime/size (and optionally content hash) used to validate cache entries"""
+        stat = os.stat(file)
+        signature = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        if with_hash:
+            digest = hashlib.sha1()
+            with open(file, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+            signature['sha1'] = digest.hexdigest()
+        return signature
+    
+    def load_batch_cache(self, batch):
+        """Load a batch from its sidecar cache, or return None if missing or stale"""
+        marks_path, index_path = self.get_cache_paths(batch)
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+            
+            source = self.batch_meta[batch]['file']
+            signature = self.get_file_signature(source)
+            cached = index['source']
+            if (cached['mtime_ns'], cached['size']) != (signature['mtime_ns'], signature['size']):
+                # Touched but possibly unchanged: fall back to comparing content hashes
+                if cached['size'] != signature['size'] or \
+                        cached['sha1'] != self.get_file_signature(source, with_hash=True)['sha1']:
+                    return None
+                index['source'] = dict(cached, mtime_ns=signature['mtime_ns'])
+                self.write_json_atomic(index_path, index)
+            
+            # Only memmap mode pages marks from disk; in memory mode they count
+            # against the memory budget like a parsed batch's
+            marks = np.load(marks_path, mmap_mode='r' if self.storage_mode == 'memmap' else None)
+        except (OSError, ValueError, KeyError):
+            return None
+        
+        # JSON null marks a missing name/roll number (NaN when read from CSV)
+        names = [np.nan if name is None else name for name in index['names']]
+        roll_nos = [np.nan if roll_no is None else roll_no for roll_no in index['roll_nos']]
+        return BatchStore(names, roll_nos, index['subjects'], marks,
+                          self.subject_to_semester, file_subjects=index['file_subjects'])
+    
+    def save_batch_cache(self, batch, store):
+        """Write a batch's marks matrix and index to the sidecar cache"""
+        marks_path, index_path = self.get_cache_paths(batch)
+        
+        # The cache is only an optimization, so failing to write it is not an error
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.write_file_atomic(marks_path, 'wb',
+                                   lambda f: np.save(f, np.asfortranarray(store.get_stored_marks())))
+            self.write_cache_index(batch, store.subjects, store.file_subjects, store.names, store.roll_nos)
+        except OSError:
+            pass
+    
+    def write_cache_index(self, batch, subjects, file_subjects, names, roll_nos):
+        """Write the JSON index (source signature, columns, names) next to a sidecar"""
+        _, index_path = self.get_cache_paths(batch)
+        self.write_json_atomic(index_path, {
+            'source': self.get_file_signature(self.batch_meta[batch]['file'], with_hash=True),
+            'subjects': list(subjects),
+            'file_subjects': list(file_subjects),
+            'names': [name if isinstance(name, str) else None for name in names],
+            'roll_nos': [roll_no if isinstance(roll_no, str) else None for roll_no in roll_nos],
+        })
+    
+    def write_json_atomic(self, path, data):
+        """Write a JSON file via a temporary file and rename"""
+        self.write_file_atomic(path, 'w', lambda f: json.dump(data, f))
+    
+    def write_file_atomic(self, path, mode, write, newline=None):
+        """Call write(f) on a temporary file next to path, fsync it, then rename it into place
+        
+        The file keeps path's permissions (mkstemp creates it 0600), or gets
+        the ones open() would give a new file.
+        """
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, mode, newline=newline) as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                file_mode = stat.S_IMODE(os.stat(path).st_mode)
+            except FileNotFoundError:
+                umask = os.umask(0)
+                os.umask(umask)
+                file_mode = 0o666 & ~umask
+            os.chmod(tmp_path, file_mode)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def evict_batches(self, keep=None):
+        """Drop least recently used batches until loaded stores fit the memory budget"""
+        if self.memory_budget is None:
+            return
+        
+        total = sum(store.nbytes for store in self.batch_files.values())
+        for batch in list(self.batch_files):
+            if total <= self.memory_budget:
+                break
+            # Batches with unwritten students stay in memory
+            if batch == keep or self.pending_students.get(batch):
+                continue
+            total -= self.batch_files.pop(batch).nbytes
+            self.discard_batch_caches(batch)
+    
+    def discard_batch_caches(self, batch):
+        """Drop everything derived from a batch's store (aggregates, rollups, backlogs, ranks)
+        
+        Several of these hold a reference to the store, so a batch is only
+        freed once all of them are gone.
+        """
+        self.aggregate_cache.discard_batch(batch)
+        for key in [key for key in self.running_aggregates if key[0] == batch]:
+            del self.running_aggregates[key]
+        self.semester_rollups.pop(batch, None)
+        self.backlog_tables.pop(batch, None)
+        for key in [key for key in self.rank_indexes if key[0] == batch]:
+            del self.rank_indexes[key]
+    
+    def set_subject_mapping(self, subjects_semester):
+        """Replace the subject-semester mapping and rebuild the lookup index"""
+        self._subjects_semester = subjects_semester
+        self.subject_table = None
+        if subjects_semester.empty:
+            self.build_subject_index([])
+        else:
+            self.build_subject_index(zip(subjects_semester['Subject'], subjects_semester['Semester']))
+    
+    def set_subject_table(self, columns, data):
+        """Replace the mapping with table rows, building its DataFrame only on first use"""
+        self._subjects_semester = None
+        self.subject_table = {'columns': columns, 'data': data}
+        subject, semester = columns.index('Subject'), columns.index('Semester')
+        self.build_subject_index((row[subject], row[semester]) for row in data)
+    
+    def build_subject_index(self, pairs):
+        """Build subject -> semester and semester -> subjects lookups from (subject, semester) pairs"""
+        self.subject_to_semester = {}
+        self.semester_to_subjects = {}
+        
+        for subject, sem in pairs:
+            # First mapping row wins, as with the old .values[0] lookups
+            if subject in self.subject_to_semester:
+                continue
+            self.subject_to_semester[subject] = int(sem)
+            self.semester_to_subjects.setdefault(int(sem), []).append(subject)
+        
+        # Cached batch semesters, aggregates and column layouts depend on the mapping
+        self.available_semesters_cache = {}
+        self.aggregate_cache.clear()
+        self.running_aggregates = {}
+        self.semester_rollups = {}
+        self.backlog_tables = {}
+        self.rank_indexes = {}
+        for store in self.batch_files.values():
+            store.set_semester_layout(self.subject_to_semester)
+    
+    def set_batch_data(self, batch, store):
+        """Store a batch, invalidating its index entry if its columns changed"""
+        meta = self.batch_meta.setdefault(batch, {'file': self.get_batch_filename(batch)})
+        if meta.get('subjects') != store.file_subjects:
+            self.available_semesters_cache.pop(batch, None)
+        meta['subjects'] = list(store.file_subjects)
+        meta['students'] = len(store)
+        
+        self.batch_files[batch] = store
+        self.batch_files.move_to_end(batch)
+        # A batch's first load isn't a change; replacing a store (a reload after eviction may
+        # have picked up an edited file) is, so ETags and shared copies of it are renewed
+        if batch in self.batch_versions:
+            self.bump_batch_version(batch)
+        else:
+            self.batch_versions[batch] = 0
+        self.discard_batch_caches(batch)
+        self.evict_batches(keep=batch)
+    
+    def get_batch_store(self, batch):
+        """Get the columnar store for a batch, loading it on first use (None if unknown)"""
+        if batch in self.batch_files:
+            self.batch_files.move_to_end(batch)
+            return self.batch_files[batch]
+        if batch not in self.batch_meta:
+            return None
+        
+        signature = self.get_batch_signature(batch)
+        store = self.load_batch(batch)
+        self.batch_signatures[batch] = signature
+        if batch in self.student_index and self.student_index.indexed_rows(batch) != len(store):
+            # The file changed underneath us; index it again from scratch
+            self.student_index.discard_batch(batch)
+            self.student_index.index_batch(batch, store)
+        self.set_batch_data(batch, store)
+        return store
+    
+    def reload_batch(self, batch):
+        """Drop a batch's store, caches and search entries so its next use reads it again
+        
+        Loading it again bumps its version (see set_batch_data).
+        """
+        if batch in self.batch_files:
+            del self.batch_files[batch]
+            self.discard_batch_caches(batch)
+        self.student_index.discard_batch(batch)
+    
+    def get_batch_signature(self, batch):
+        """Get the signature of a batch's data at its source (None if it is gone)"""
+        if self.backend is not None:
+            return self.backend.get_batch_signatures(batch).get(batch)
+        try:
+            return self.get_file_signature(self.get_batch_filename(batch))
+        except OSError:
+            return None
+    
+    def batch_changed(self, batch):
+        """Whether another process changed a batch's file (or database rows) since it was read"""
+        return self.get_batch_signature(batch) != self.batch_signatures.get(batch)
+    
+    def refresh_batch(self, batch):
+        """Pick up another process's changes to a batch: probe it again and drop its store
+        
+        A loaded batch is loaded again right away, so its version settles
+        here; a batch whose source is gone is forgotten. Batches with
+        unwritten students are left alone.
+        """
+        if self.pending_students.get(batch):
+            return
+        signature = self.get_batch_signature(batch)
+        loaded = batch in self.batch_files
+        self.reload_batch(batch)
+        self.available_semesters_cache.pop(batch, None)
+        if signature is None:
+            self.batch_meta.pop(batch, None)
+            self.batch_signatures.pop(batch, None)
+            return
+        if self.backend is not None:
+            self.batch_meta[batch] = dict(self.backend.list_batches()[batch], file=None)
+        else:
+            self.batch_meta[batch] = self.probe_batch_file(self.get_batch_filename(batch))
+        self.batch_signatures[batch] = signature
+        if loaded:
+            self.get_batch_store(batch)
+    
+    def get_student_index(self):
+        """Get the student search index, indexing any batch not indexed yet"""
+        for batch in self.get_available_batches():
+            if batch not in self.student_index:
+                self.student_index.index_batch(batch, self.get_batch_store(batch))
+        return self.student_index
+    
+    def bump_batch_version(self, batch):
+        """Mark a batch's data as changed so cached aggregates are recomputed"""
+        self.batch_versions[batch] = self.batch_versions.get(batch, 0) + 1
+    
+    def get_aggregates(self, batch, semester=None):
+        """Get (cached) aggregates for a batch, optionally for one semester"""
+        store = self.get_batch_store(batch)
+        key = (batch, semester, self.batch_versions.get(batch, 0))
+        return self.aggregate_cache.get_or_compute(
+            key, lambda: compute_aggregates(store, semester, self.grade_scale, self.chunk_rows))
+    
+    def get_batch_filename(self, batch):
+        """Get the CSV file backing a batch"""
+        if batch in self.batch_meta:
+            return self.batch_meta[batch]['file']
+        return os.path.join(self.data_dir, f"batch_{batch.replace('-', '_')}.csv")
+    
+    def queue_student(self, batch, name, roll_no, marks):
+        """Add a student in memory; the row is written by commit_pending_students"""
+        store = self.get_batch_store(batch)
+        row = store.append(name, roll_no, marks)
+        self.batch_meta[batch]['students'] = len(store)
+        self.bump_batch_version(batch)
+        self.update_running_aggregates(batch, row)
+        if batch in self.student_index:
+            self.student_index.add(batch, row, name, roll_no)
+        self.pending_students.setdefault(batch, []).append(row)
+        return row
+    
+    def commit_pending_students(self, batch=None):
+        """Write queued students to their batch files (all batches if None)"""
+        written = 0
+        for pending_batch in ([batch] if batch else list(self.pending_students)):
+            # Rows stay queued (and their batch loaded) until they are written
+            rows = self.pending_students.get(pending_batch, [])
+            if rows and self.backend is not None:
+                store = self.get_batch_store(pending_batch)
+                try:
+                    stored = self.backend.insert_students(pending_batch, store.names[rows], store.roll_nos[rows],
+                                                          store.get_file_marks(rows))
+                except ValueError:
+                    # Another writer took a roll number first; these rows can never be
+                    # written, so drop them along with the rest of the stale store
+                    self.pending_students.pop(pending_batch)
+                    self.reload_batch(pending_batch)
+                    raise
+                if list(stored) != rows:
+                    # Other writers added students since the batch was loaded; load it
+                    # again so its rows match the database's (ours now follow theirs)
+                    self.reload_batch(pending_batch)
+                written += len(rows)
+            elif rows:
+                self.append_batch_rows(pending_batch, rows)
+                written += len(rows)
+            self.pending_students.pop(pending_batch, None)
+            if rows:
+                # Our own write isn't a change to pick up later
+                self.batch_signatures[pending_batch] = self.get_batch_signature(pending_batch)
+        # Keep the snapshot current, so the next start doesn't re-probe the changed files
+        if written and self.backend is None:
+            self.save_startup_snapshot()
+        return written
+    
+    def append_batch_rows(self, batch, rows):
+        """Append rows to a batch CSV, rewriting it only if its header no longer matches"""
+        store = self.get_batch_store(batch)
+        filename = self.get_batch_filename(batch)
+        
+        if not os.path.exists(filename) or self.read_csv_header(filename) != store.get_file_columns():
+            self.write_batch_file(batch)
+            return
+        
+        # Match the file's line endings and make sure new rows start on their own line
+        lineterminator = self.read_line_terminator(filename)
+        with open(filename, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+        
+        with open(filename, 'a', newline='') as f:
+            if needs_newline:
+                f.write(lineterminator)
+            csv.writer(f, lineterminator=lineterminator).writerows(store.iter_file_rows(rows))
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def write_batch_file(self, batch):
+        """Rewrite a whole batch CSV via a temporary file, so a crash never leaves it half-written"""
+        store = self.get_batch_store(batch)
+        filename = self.get_batch_filename(batch)
+        lineterminator = self.read_line_terminator(filename)
+        
+        def write(f):
+            writer = csv.writer(f, lineterminator=lineterminator)
+            writer.writerow(store.get_file_columns())
+            writer.writerows(store.iter_file_rows())
+        
+        self.write_file_atomic(filename, 'w', write, newline='')
+    
+    def read_csv_header(self, filename):
+        """Read just the header row of a CSV file"""
+        with open(filename, newline='') as f:
+            return next(csv.reader(f), [])
+    
+    def read_line_terminator(self, filename):
+        """Get the line terminator a CSV file's header ends with ('\\n' if missing or unknown)"""
+        try:
+            with open(filename, 'rb') as f:
+                return '\r\n' if f.readline().endswith(b'\r\n') else '\n'
+        except OSError:
+            return '\n'
+    
+    def get_running_aggregates(self, batch, semester=None):
+        """Get running statistics for a batch, building them on first use"""
+        key = (batch, semester)
+        if key not in self.running_aggregates:
+            self.running_aggregates[key] = RunningAggregates(
+                self.get_batch_store(batch), semester, self.grade_scale, chunk_rows=self.chunk_rows)
+        return self.running_aggregates[key]
+    
+    def update_running_aggregates(self, batch, start, stop=None):
+        """Fold newly appended students (rows start..stop) into the batch's running
+        statistics, rollups, backlog table and rank indexes in one update"""
+        store = self.get_batch_store(batch)
+        stop = start + 1 if stop is None else stop
+        rows = slice(start, stop)
+        for (agg_batch, semester), aggregates in self.running_aggregates.items():
+            if agg_batch == batch:
+                aggregates.add_chunk(start, widen_marks(store.get_marks(semester, rows)))
+        if batch in self.semester_rollups:
+            self.semester_rollups[batch].add_chunk(widen_marks(store.get_stored_marks()[rows]))
+        if batch in self.backlog_tables:
+            self.backlog_tables[batch].add_chunk(start, widen_marks(store.get_stored_marks()[rows]))
+        for (index_batch, semester), rank_index in self.rank_indexes.items():
+            if index_batch == batch:
+                marks = widen_marks(store.get_marks(semester, rows))
+                if marks.shape[1]:
+                    percentages = row_totals(marks) / (marks.shape[1] * 100) * 100
+                else:
+                    percentages = np.full(len(marks), np.nan)
+                rank_index.add_many(np.arange(start, stop), percentages)
+    
+    def get_backlog_table(self, batch):
+        """Get the backlog table for a batch, building it on first use"""
+        if batch not in self.backlog_tables:
+            self.backlog_tables[batch] = BacklogTable(self.get_batch_store(batch), self.chunk_rows)
+        return self.backlog_tables[batch]
+    
+    def get_backlogs(self, batch, semester=None, subject=None, min_count=1):
+        """Get a batch's backlogs, optionally for one semester or subject and only
+        for students with at least min_count of them (None if unavailable)"""
+        if not self.validate_semester_for_batch(batch, semester):
+            return None
+        store = self.get_batch_store(batch)
+        if store is None:
+            print(f"\nNo data found for batch {batch}!")
+            return None
+        if subject is not None and subject not in store.subject_index:
+            print(f"\nBatch {batch} has no subject {subject}!")
+            return None
+        return self.get_backlog_table(batch).to_frame(semester or None, subject, min_count)
+    
+    def get_rank_index(self, batch, semester=None):
+        """Get the percentage rank index for a batch (or one semester of it), building it on first use"""
+        key = (batch, semester)
+        if key not in self.rank_indexes:
+            if semester is None:
+                percentages = self.get_aggregates(batch)['percentages']
+            else:
+                percentages = self.get_semester_rollups(batch).get_percentages(semester)
+            self.rank_indexes[key] = RankIndex(percentages)
+        return self.rank_indexes[key]
+    
+    def get_semester_rollups(self, batch):
+        """Get the per-semester rollups for a batch, building them on first use"""
+        if batch not in self.semester_rollups:
+            self.semester_rollups[batch] = SemesterRollups(self.get_batch_store(batch), self.chunk_rows)
+        return self.semester_rollups[batch]
+    
+    def get_subject_semester(self, subject):
+        """Get the semester a subject belongs to (None if unmapped)"""
+        return self.subject_to_semester.get(subject)
+    
+    def get_max_semester_for_batch(self, batch):
+        """Get the highest semester a batch has completed"""
+        available_sems = self.get_available_semesters_for_batch(batch)
+        return max(available_sems) if available_sems else 0
+    
     def get_available_batches(self):
         """Get list of available batches"""
-        return sorted(self.batch_files.keys())
+        return sorted(self.batch_meta.keys())
     
     def get_subjects_for_semester(self, semester):
         """Get subjects for a specific semester"""
-        if self.subjects_semester.empty:
-            return []
-        return self.subjects_semester[
-            self.subjects_semester['Semester'] == semester
-        ]['Subject'].tolist()
+        return list(self.semester_to_subjects.get(semester, []))
     
+    @instrumented('get_batch_data')
     def get_batch_data(self, batch):
         """Get data for a specific batch"""
-        if batch in self.batch_files:
-            return self.batch_files[batch].copy()
+        if batch in self.batch_meta:
+            with self.instrumentation.phase('load'):
+                store = self.get_batch_store(batch)
+            self.instrumentation.count(len(store), len(store.subjects))
+            with self.instrumentation.phase('format'):
+                return store.to_frame()
         return pd.DataFrame()
     
     def get_available_semesters_for_batch(self, batch):
         """Get list of semesters that a batch has completed"""
-        if batch not in self.batch_files:
+        if batch not in self.batch_meta:
             return []
         
-        df = self.batch_files[batch]
-        subject_cols = [col for col in df.columns if col not in ['Name', 'Roll_No']]
-        
-        # Find which semesters these subjects belong to
-        available_semesters = set()
-        for subject in subject_cols:
-            sem_data = self.subjects_semester[self.subjects_semester['Subject'] == subject]
-            if not sem_data.empty:
-                available_semesters.add(int(sem_data['Semester'].values[0]))
+        if batch not in self.available_semesters_cache:
+            # Find which semesters these subjects belong to (header probe, no load needed)
+            available_semesters = set()
+            for subject in self.batch_meta[batch]['subjects']:
+                sem = self.subject_to_semester.get(subject)
+                if sem is not None:
+                    available_semesters.add(sem)
+            
+            self.available_semesters_cache[batch] = sorted(available_semesters)
         
-        return sorted(list(available_semesters))
+        return list(self.available_semesters_cache[batch])
     
     def validate_semester_for_batch(self, batch, semester):
         """Check if batch has data for the specified semester"""
@@ -78,6 +1927,7 @@ class CollegeDashboard:
         
         return True
     
+    @instrumented('add_student_to_batch')
     def add_student_to_batch(self):
         """Add a new student to an existing batch"""
         print("\n--- Add New Student ---")
@@ -105,30 +1955,24 @@ class CollegeDashboard:
         roll_no = input("Enter roll number: ").strip()
         
         # Check if roll number exists
-        batch_df = self.batch_files[batch]
-        if roll_no in batch_df['Roll_No'].values:
+        with self.instrumentation.phase('load'):
+            store = self.get_batch_store(batch)
+        if roll_no in store.roll_index:
             print(f"Roll number {roll_no} already exists!")
             return
         
         # Determine max semester from existing data
-        subject_cols = [col for col in batch_df.columns if col not in ['Name', 'Roll_No']]
-        max_semester = self.subjects_semester[
-            self.subjects_semester['Subject'].isin(subject_cols)
-        ]['Semester'].max()
+        subject_cols = store.get_subjects()
+        max_semester = self.get_max_semester_for_batch(batch)
         
         print(f"\nThis batch has completed up to Semester {max_semester}")
         
         # Collect marks
-        new_student = {
-            'Name': name,
-            'Roll_No': roll_no
-        }
+        new_student = {}
         
         print(f"\nEnter marks for all subjects (out of 100):")
         for subject in subject_cols:
-            sem = self.subjects_semester[
-                self.subjects_semester['Subject'] == subject
-            ]['Semester'].values[0]
+            sem = self.get_subject_semester(subject)
             
             while True:
                 try:
@@ -141,50 +1985,179 @@ class CollegeDashboard:
                 except ValueError:
                     print("Please enter a valid number!")
         
-        # Add to dataframe
-        new_row = pd.DataFrame([new_student])
-        self.batch_files[batch] = pd.concat([self.batch_files[batch], new_row], ignore_index=True)
-        
-        # Save to file
-        filename = f"batch_{batch.replace('-', '_')}.csv"
-        self.batch_files[batch].to_csv(filename, index=False)
+        # Add to the batch store and append the new row to the batch file
+        with self.instrumentation.phase('aggregate'):
+            self.queue_student(batch, name, roll_no, new_student)
+        with self.instrumentation.phase('write'):
+            try:
+                self.commit_pending_students(batch)
+            except (ValueError, OSError) as e:
+                print(f"\nCould not add student {name} to batch {batch}: {e}")
+                return
+        self.instrumentation.count(1, len(subject_cols))
         
         print(f"\nStudent {name} added to batch {batch}!")
     
+    def read_student_file(self, path):
+        """Read new students from a CSV or JSON Lines file"""
+        if path.lower().endswith(('.jsonl', '.ndjson', '.json')):
+            # dtype=False keeps roll numbers as written instead of guessing numbers
+            return pd.read_json(path, lines=True, dtype=False)
+        return pd.read_csv(path, dtype={'Name': str, 'Roll_No': str})
+    
+    def validate_students(self, batch, students):
+        """Check a DataFrame of new students against a batch without changing it
+        
+        Returns (names, roll numbers, float32 marks in file column order,
+        reasons); reasons is '' for accepted rows and says why a row is
+        rejected otherwise. Raises ValueError if the columns don't fit the batch.
+        """
+        store = self.get_batch_store(batch)
+        subjects = store.file_subjects
+        completed = self.get_available_semesters_for_batch(batch)
+        
+        # Column checks: the file must carry exactly the batch's subjects
+        missing = [col for col in ['Name', 'Roll_No'] + subjects if col not in students.columns]
+        if missing:
+            raise ValueError(f"Missing columns for batch {batch}: {', '.join(missing)}")
+        unknown = []
+        for col in students.columns:
+            if col in ('Name', 'Roll_No') or col in subjects:
+                continue
+            sem = self.get_subject_semester(col)
+            if sem is not None and sem not in completed:
+                unknown.append(f"{col} (Semester {sem}, not completed by batch {batch})")
+            else:
+                unknown.append(col)
+        if unknown:
+            raise ValueError(f"Columns not in batch {batch}: {', '.join(unknown)}")
+        
+        def text(col):
+            return students[col].astype('string').str.strip().fillna('').to_numpy(dtype=object)
+        names, roll_nos = text('Name'), text('Roll_No')
+        
+        given = students[subjects].notna().to_numpy()
+        marks = students[subjects].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        non_numeric = given & np.isnan(marks)
+        with np.errstate(invalid='ignore'):
+            out_of_range = (marks < 0) | (marks > 100)
+        
+        # Roll numbers are checked against the batch's roll -> row hash map
+        existing = np.fromiter((roll_no in store.roll_index for roll_no in roll_nos), dtype=bool, count=len(roll_nos))
+        repeated = pd.Series(roll_nos).duplicated(keep='first').to_numpy()
+        
+        # The first failing check names the reason for each row
+        reasons = np.select(
+            [names == '', roll_nos == '', existing, repeated & (roll_nos != ''),
+             non_numeric.any(axis=1), ~given.all(axis=1), out_of_range.any(axis=1)],
+            ['missing name', 'missing roll number', 'roll number already in batch',
+             'duplicate roll number in file', 'non-numeric marks', 'missing marks', 'marks outside 0-100'],
+            default='').astype(object)
+        return names, roll_nos, marks.astype(np.float32), reasons
+    
+    def import_students(self, batch, source, dry_run=False):
+        """Add many students to a batch from a CSV/JSON Lines file or DataFrame
+        
+        Valid rows are appended to the store and the batch CSV in one write,
+        with one update of the cached statistics; invalid rows are skipped
+        and reported. dry_run only validates. Raises ValueError for an
+        unknown batch or columns that don't fit it.
+        """
+        store = self.get_batch_store(batch)
+        if store is None:
+            raise ValueError(f"Unknown batch: {batch}")
+        students = source if isinstance(source, pd.DataFrame) else self.read_student_file(source)
+        names, roll_nos, marks, reasons = self.validate_students(batch, students)
+        
+        accepted = reasons == ''
+        rejected = pd.DataFrame({
+            'Row': np.flatnonzero(~accepted) + 1,
+            'Name': names[~accepted],
+            'Roll_No': roll_nos[~accepted],
+            'Reason': reasons[~accepted],
+        })
+        
+        if accepted.any() and not dry_run:
+            rows = store.extend(names[accepted], roll_nos[accepted], marks[accepted])
+            self.batch_meta[batch]['students'] = len(store)
+            self.bump_batch_version(batch)
+            self.update_running_aggregates(batch, rows.start, rows.stop)
+            if batch in self.student_index:
+                self.student_index.index_batch(batch, store)
+            self.pending_students.setdefault(batch, []).extend(range(rows.start, rows.stop))
+            self.commit_pending_students(batch)
+        
+        return {
+            'batch': batch,
+            'dry_run': dry_run,
+            'accepted': int(accepted.sum()),
+            'imported': 0 if dry_run else int(accepted.sum()),
+            'rejected': rejected,
+        }
+    
+    def print_import_result(self, result):
+        """Print the outcome of import_students"""
+        if result['dry_run']:
+            print(f"\n{result['accepted']} students would be imported into batch {result['batch']}")
+        else:
+            print(f"\nImported {result['imported']} students into batch {result['batch']}")
+        
+        rejected = result['rejected']
+        if len(rejected):
+            print(f"Rejected {len(rejected)} rows:")
+            print(rejected.to_string(index=False))
+        print()
+    
+    @instrumented('view_batch_students')
     def view_batch_students(self, batch=None, semester_filter=None):
         """View students from a specific batch"""
         if not batch:
             print("\nPlease select a batch!")
             return
         
+        # Loading and filtering inside are timed as phases of their own
+        with self.instrumentation.phase('aggregate'):
+            df_display = self.get_batch_report(batch, semester_filter)
+        if df_display is not None:
+            with self.instrumentation.phase('format'):
+                self.print_batch_report(batch, semester_filter, df_display)
+    
+    def get_batch_report(self, batch, semester_filter=None):
+        """Get a batch's student records with totals, percentages and grades (None if unavailable)"""
         # Validate semester for batch
-        if not self.validate_semester_for_batch(batch, semester_filter):
-            return
+        with self.instrumentation.phase('filter'):
+            if not self.validate_semester_for_batch(batch, semester_filter):
+                return None
         
-        df = self.get_batch_data(batch)
-        if df.empty:
+        with self.instrumentation.phase('load'):
+            store = self.get_batch_store(batch)
+        if not store:
             print(f"\nNo data found for batch {batch}!")
-            return
-        
-        # Get subject columns
-        subject_cols = [col for col in df.columns if col not in ['Name', 'Roll_No']]
-        
-        # Filter by semester if specified
-        if semester_filter:
-            semester_subjects = self.get_subjects_for_semester(semester_filter)
-            display_cols = ['Name', 'Roll_No'] + [s for s in semester_subjects if s in subject_cols]
-            df_display = df[display_cols].copy()
-            subject_cols = [s for s in semester_subjects if s in subject_cols]
-        else:
-            df_display = df.copy()
-        
-        # Calculate statistics
-        if subject_cols:
-            df_display['Total'] = df_display[subject_cols].sum(axis=1)
-            max_marks = len(subject_cols) * 100
-            df_display['Percentage'] = (df_display['Total'] / max_marks * 100).round(2)
-            df_display['Grade'] = df_display['Percentage'].apply(self.calculate_grade)
+            return None
         
+        # Subject columns (semester filter selects a column slice of the store)
+        semester = semester_filter or None
+        subject_cols = store.get_subjects(semester)
+        self.instrumentation.count(len(store), len(subject_cols))
+        with self.instrumentation.phase('filter'):
+            df_display = store.to_frame(semester)
+        
+        # Calculate statistics (a semester's totals come straight from the rollups)
+        if subject_cols and semester:
+            rollups = self.get_semester_rollups(batch)
+            df_display['Total'] = rollups.get_totals(semester)
+            df_display['Percentage'] = rollups.get_percentages(semester).round(2)
+            df_display['Grade'] = self.calculate_grades(df_display['Percentage'])
+        elif subject_cols:
+            aggregates = self.get_aggregates(batch, semester)
+            df_display['Total'] = aggregates['totals']
+            df_display['Percentage'] = aggregates['percentages'].round(2)
+            df_display['Grade'] = self.calculate_grades(df_display['Percentage'])
+        
+        return df_display
+    
+    def print_batch_report(self, batch, semester_filter, df_display):
+        """Print a batch report from get_batch_report"""
         print("\n" + "="*100)
         print(f"STUDENT RECORDS - BATCH {batch}")
         if semester_filter:
@@ -193,129 +2166,280 @@ class CollegeDashboard:
         print(df_display.to_string(index=False))
         print("="*100 + "\n")
     
+    def print_backlogs(self, batch, semester_filter, subject, min_count, backlogs):
+        """Print a backlog table from get_backlogs"""
+        print("\n" + "="*90)
+        print(f"BACKLOGS - BATCH {batch}")
+        if semester_filter:
+            print(f"Semester: {semester_filter}")
+        if subject:
+            print(f"Subject: {subject}")
+        if min_count > 1:
+            print(f"Students with at least {min_count} backlogs")
+        print("="*90)
+        if len(backlogs):
+            print(backlogs.to_string(index=False))
+            print(f"\n{len(backlogs)} backlogs, {backlogs['Roll_No'].nunique()} students")
+        else:
+            print("No backlogs found.")
+        print("="*90 + "\n")
+    
+    def get_rank_report(self, batch, semester_filter=None, query=('top', 10)):
+        """Get students by rank as a Rank/Name/Roll_No/Percentage/Grade/Percentile table
+        (None if unavailable)
+        
+        query is ('top', k) or ('bottom', k) for the k best or weakest
+        students, or ('between', (low, high)) for those scoring low..high
+        percent, best first.
+        """
+        with self.instrumentation.phase('filter'):
+            if not self.validate_semester_for_batch(batch, semester_filter):
+                return None
+        
+        with self.instrumentation.phase('load'):
+            store = self.get_batch_store(batch)
+        if not store:
+            print(f"\nNo data found for batch {batch}!")
+            return None
+        
+        semester = semester_filter or None
+        if not store.get_subjects(semester):
+            print("\nNo subjects found!")
+            return None
+        
+        kind, value = query
+        rank_index = self.get_rank_index(batch, semester)
+        with self.instrumentation.phase('filter'):
+            if kind == 'between':
+                ranking = rank_index.between(*value)
+            elif value < 1:
+                print(f"\nNumber of students must be at least 1, not {value}")
+                return None
+            elif kind == 'bottom':
+                ranking = rank_index.bottom(value)
+            else:
+                ranking = rank_index.top(value)
+        self.instrumentation.count(len(ranking))
+        
+        rows = np.array([row for row, _ in ranking], dtype=np.intp)
+        percentages = np.array([percentage for _, percentage in ranking])
+        report = pd.DataFrame({
+            'Rank': rank_index.rank(rows),
+            'Name': store.names[rows],
+            'Roll_No': store.roll_nos[rows],
+            'Percentage': percentages.round(2),
+        })
+        report['Grade'] = self.calculate_grades(report['Percentage'])
+        report['Percentile'] = rank_index.percentile(rows).round(1)
+        return report
+    
+    def print_rank_report(self, batch, semester_filter, query, report):
+        """Print a rank report from get_rank_report"""
+        kind, value = query
+        if kind == 'between':
+            title = f"STUDENTS SCORING {value[0]:g}-{value[1]:g}%"
+        else:
+            title = f"{kind.upper()} {value} STUDENTS"
+        print("\n" + "="*90)
+        print(f"{title} - BATCH {batch}")
+        if semester_filter:
+            print(f"Semester: {semester_filter}")
+        print("="*90)
+        if len(report):
+            print(report.to_string(index=False))
+        else:
+            print("No students found.")
+        print("="*90 + "\n")
+    
+    def set_grade_boundaries(self, boundaries, fail_grade=FAIL_GRADE):
+        """Replace the grade boundary table, e.g. [(90, 'A+'), (80, 'A'), ...]"""
+        self.grade_scale = GradeScale(boundaries, fail_grade)
+        # Every graded report changes, so renew every batch's version (and with it the
+        # server's ETags); an aggregate still being computed is then cached under a stale key
+        for batch in self.batch_meta:
+            self.bump_batch_version(batch)
+        self.aggregate_cache.clear()
+        self.running_aggregates = {}
+    
     def calculate_grade(self, percentage):
         """Calculate letter grade"""
-        if percentage >= 90:
-            return 'A+'
-        elif percentage >= 80:
-            return 'A'
-        elif percentage >= 70:
-            return 'B+'
-        elif percentage >= 60:
-            return 'B'
-        elif percentage >= 50:
-            return 'C'
-        elif percentage >= 40:
-            return 'D'
-        else:
-            return 'F'
+        return self.grade_scale.grade_one(percentage)
     
+    def calculate_grades(self, percentages):
+        """Calculate letter grades for an array of percentages (Categorical)"""
+        return self.grade_scale.grade(percentages)
+    
+    def grade_distribution(self, grades):
+        """Count students per grade, skipping grades nobody received"""
+        counts = pd.Series(grades).value_counts().sort_index()
+        return counts[counts > 0]
+    
+    @instrumented('calculate_statistics')
     def calculate_statistics(self, batch=None, semester_filter=None):
         """Calculate comprehensive statistics"""
         if not batch:
             print("\nPlease select a batch!")
             return
         
+        # Loading and filtering inside are timed as phases of their own
+        with self.instrumentation.phase('aggregate'):
+            stats = self.get_statistics(batch, semester_filter)
+        if stats is not None:
+            with self.instrumentation.phase('format'):
+                self.print_statistics(stats)
+    
+    def get_statistics(self, batch, semester_filter=None):
+        """Get the statistics report for a batch as a dict (None if unavailable)"""
         # Validate semester for batch
-        if not self.validate_semester_for_batch(batch, semester_filter):
-            return
+        with self.instrumentation.phase('filter'):
+            if not self.validate_semester_for_batch(batch, semester_filter):
+                return None
         
-        df = self.get_batch_data(batch)
-        if df.empty:
+        with self.instrumentation.phase('load'):
+            store = self.get_batch_store(batch)
+        if not store:
             print(f"\nNo data found for batch {batch}!")
-            return
-        
-        # Get subject columns
-        all_subject_cols = [col for col in df.columns if col not in ['Name', 'Roll_No']]
+            return None
         
-        # Filter by semester if specified
-        if semester_filter:
-            semester_subjects = self.get_subjects_for_semester(semester_filter)
-            subject_cols = [s for s in semester_subjects if s in all_subject_cols]
-        else:
-            subject_cols = all_subject_cols
+        # Subject columns (semester filter selects a column slice of the store)
+        semester = semester_filter or None
+        subject_cols = store.get_subjects(semester)
+        self.instrumentation.count(len(store), len(subject_cols))
         
         if not subject_cols:
             print("\nNo subjects found!")
-            return
+            return None
         
-        print("\n" + "="*90)
-        print(f"STATISTICS REPORT - BATCH {batch}")
-        if semester_filter:
-            print(f"Semester: {semester_filter}")
-        print("="*90)
+        # Served from running aggregates, which are updated in place on add
+        running = self.get_running_aggregates(batch, semester)
+        n_students = running.n_students
         
-        # 1. Subject-wise Statistics
-        print("\n1. SUBJECT-WISE PERFORMANCE")
-        print("-" * 90)
+        # 4. Top 10 Students
+        top_rows = [row for row, _ in running.top_students()]
+        top_10 = pd.DataFrame({'Name': store.names[top_rows], 'Roll_No': store.roll_nos[top_rows]})
+        top_10['Total'] = row_totals(widen_marks(store.get_marks(semester, top_rows)))
+        top_10['Percentage'] = [percentage for _, percentage in running.top_students()]
+        top_10['Grade'] = self.calculate_grades(top_10['Percentage'])
         
+        # 5. Backlog Analysis
+        backlogs = [{'Name': store.names[row], 'Roll_No': store.roll_nos[row], 'Subjects': subjects}
+                    for row, subjects in self.get_backlog_table(batch).by_student(semester)]
+        
+        return {
+            'batch': batch,
+            'semester': semester_filter,
+            'n_students': n_students,
+            'subjects': self.get_subject_statistics(batch, semester),
+            'class_average': running.pct_mean,
+            'highest': running.pct_highest,
+            'lowest': running.pct_lowest,
+            'std_dev': running.pct_std_dev,
+            'grade_distribution': running.grade_distribution(),
+            'top_students': top_10,
+            'backlogs': backlogs,
+        }
+    
+    def get_subject_statistics(self, batch, semester=None):
+        """Get per-subject statistics (average, highest, lowest, std dev, pass %) as a DataFrame
+        
+        A storage backend computes them itself (in SQL for SQLite), whether
+        or not the batch is loaded; otherwise they come from the running
+        aggregates.
+        """
+        if self.backend is not None:
+            return self.backend.get_subject_statistics(batch, semester)
+        
+        running = self.get_running_aggregates(batch, semester)
+        std_devs = running.std_dev
         stats_data = []
-        for subject in subject_cols:
-            sem = self.subjects_semester[
-                self.subjects_semester['Subject'] == subject
-            ]['Semester'].values[0] if not self.subjects_semester.empty else 'N/A'
+        for j, subject in enumerate(running.subjects):
+            sem = self.get_subject_semester(subject)
+            if sem is None:
+                sem = 'N/A'
             
             stats_data.append({
                 'Subject': subject,
                 'Sem': sem,
-                'Average': round(df[subject].mean(), 2),
-                'Highest': df[subject].max(),
-                'Lowest': df[subject].min(),
-                'Std Dev': round(df[subject].std(), 2),
-                'Pass %': round((df[subject] >= 40).sum() / len(df) * 100, 2)
+                'Average': round(running.mean[j], 2),
+                'Highest': running.highest[j],
+                'Lowest': running.lowest[j],
+                'Std Dev': round(std_devs[j], 2),
+                'Pass %': round(running.pass_count[j] / running.n_students * 100, 2)
             })
+        return pd.DataFrame(stats_data)
+    
+    def lookup_student(self, roll_no):
+        """Get the students with exactly this roll number as {batch: DataFrame}
         
-        stats_df = pd.DataFrame(stats_data)
-        print(stats_df.to_string(index=False))
+        A storage backend answers from its roll number index without loading
+        any batch; otherwise the search index is used.
+        """
+        if self.backend is not None:
+            found = {}
+            for student in self.backend.get_student(roll_no):
+                found.setdefault(student.pop('batch'), []).append(student)
+            return {batch: pd.DataFrame(students) for batch, students in found.items()}
+        
+        found = {}
+        for batch, row in self.get_student_index().find_roll(roll_no):
+            found.setdefault(batch, []).append(row)
+        return {batch: self.get_batch_store(batch).to_frame(rows=np.array(rows, dtype=np.intp))
+                for batch, rows in found.items()}
+    
+    def print_statistics(self, stats):
+        """Print a statistics report from get_statistics"""
+        n_students = stats['n_students']
+        
+        print("\n" + "="*90)
+        print(f"STATISTICS REPORT - BATCH {stats['batch']}")
+        if stats['semester']:
+            print(f"Semester: {stats['semester']}")
+        print("="*90)
+        
+        # 1. Subject-wise Statistics
+        print("\n1. SUBJECT-WISE PERFORMANCE")
+        print("-" * 90)
+        print(stats['subjects'].to_string(index=False))
         
         # 2. Overall Statistics
         print("\n2. OVERALL PERFORMANCE")
         print("-" * 90)
         
-        df['Total'] = df[subject_cols].sum(axis=1)
-        max_marks = len(subject_cols) * 100
-        df['Percentage'] = (df['Total'] / max_marks * 100)
-        df['Grade'] = df['Percentage'].apply(self.calculate_grade)
-        
-        print(f"Total Students: {len(df)}")
-        print(f"Class Average: {df['Percentage'].mean():.2f}%")
-        print(f"Highest: {df['Percentage'].max():.2f}%")
-        print(f"Lowest: {df['Percentage'].min():.2f}%")
-        print(f"Standard Deviation: {df['Percentage'].std():.2f}")
+        print(f"Total Students: {n_students}")
+        print(f"Class Average: {stats['class_average']:.2f}%")
+        print(f"Highest: {stats['highest']:.2f}%")
+        print(f"Lowest: {stats['lowest']:.2f}%")
+        print(f"Standard Deviation: {stats['std_dev']:.2f}")
         
         # 3. Grade Distribution
         print("\n3. GRADE DISTRIBUTION")
         print("-" * 90)
-        grade_dist = df['Grade'].value_counts().sort_index()
-        for grade, count in grade_dist.items():
-            bar = '█' * int(count / len(df) * 50)
-            print(f"{grade}: {count:3d} students ({count/len(df)*100:5.1f}%) {bar}")
+        for grade, count in stats['grade_distribution'].items():
+            bar = '█' * int(count / n_students * 50)
+            print(f"{grade}: {count:3d} students ({count/n_students*100:5.1f}%) {bar}")
         
         # 4. Top 10 Students
         print("\n4. TOP 10 PERFORMERS")
         print("-" * 90)
-        top_10 = df.nlargest(10, 'Percentage')[['Name', 'Roll_No', 'Total', 'Percentage', 'Grade']]
-        print(top_10.to_string(index=False))
+        print(stats['top_students'].to_string(index=False))
         
         # 5. Backlog Analysis
         print("\n5. BACKLOG ANALYSIS")
         print("-" * 90)
         
-        fail_mask = (df[subject_cols] < 40).any(axis=1)
-        failed_students = df[fail_mask]
+        n_failed = len(stats['backlogs'])
+        print(f"Students with No Backlogs: {n_students - n_failed} ({(n_students-n_failed)/n_students*100:.1f}%)")
+        print(f"Students with Backlogs: {n_failed} ({n_failed/n_students*100:.1f}%)")
         
-        print(f"Students with No Backlogs: {len(df) - len(failed_students)} ({(len(df)-len(failed_students))/len(df)*100:.1f}%)")
-        print(f"Students with Backlogs: {len(failed_students)} ({len(failed_students)/len(df)*100:.1f}%)")
-        
-        if len(failed_students) > 0:
+        if n_failed > 0:
             print(f"\nStudents with Backlogs (Marks < 40):")
-            for i, row in failed_students.iterrows():
-                failed_subs = [col for col in subject_cols if row[col] < 40]
-                backlog_details = ', '.join([f"{s} ({row[s]:.1f})" for s in failed_subs])
-                print(f"  • {row['Name']} ({row['Roll_No']}): {backlog_details}")
+            for student in stats['backlogs']:
+                backlog_details = ', '.join([f"{subject} ({mark:.1f})" for subject, mark in student['Subjects']])
+                print(f"  • {student['Name']} ({student['Roll_No']}): {backlog_details}")
         
         print("\n" + "="*90 + "\n")
     
+    @instrumented('visualize_data')
     def visualize_data(self, batch=None, semester_filter=None):
         """Create visualizations"""
         if not batch:
@@ -323,45 +2447,69 @@ class CollegeDashboard:
             return
         
         # Validate semester for batch
-        if not self.validate_semester_for_batch(batch, semester_filter):
-            return
+        with self.instrumentation.phase('filter'):
+            if not self.validate_semester_for_batch(batch, semester_filter):
+                return
         
-        df = self.get_batch_data(batch)
-        if df.empty:
+        with self.instrumentation.phase('load'):
+            store = self.get_batch_store(batch)
+        if not store:
             print(f"\nNo data found for batch {batch}!")
             return
         
-        # Get subject columns
-        all_subject_cols = [col for col in df.columns if col not in ['Name', 'Roll_No']]
-        
-        # Filter by semester if specified
-        if semester_filter:
-            semester_subjects = self.get_subjects_for_semester(semester_filter)
-            subject_cols = [s for s in semester_subjects if s in all_subject_cols]
-        else:
-            subject_cols = all_subject_cols
-        
-        if not subject_cols:
+        if not store.get_subjects(semester_filter or None):
             print("\nNo subjects to visualize!")
             return
         
+        # Aggregation inside draw_dashboard is timed as a phase of its own
+        with self.instrumentation.phase('render'):
+            import matplotlib.pyplot as plt
+            fig = plt.figure(figsize=(18, 12))
+            self.draw_dashboard(fig, batch, semester_filter)
+            plt.show()
+        print("\nVisualization displayed!")
+    
+    def draw_dashboard(self, fig, batch, semester_filter=None, fast=False):
+        """Draw the 3x3 performance dashboard of a batch onto fig
+        
+        The axes of a figure drawn on before are cleared and reused. fast
+        rasterizes the boxplot and heatmap, the heaviest artists in vector output.
+        """
+        import matplotlib
+        store = self.get_batch_store(batch)
+        
+        # Subject columns (semester filter selects a column slice of the store)
+        semester = semester_filter or None
+        subject_cols = store.get_subjects(semester)
+        marks = store.get_marks(semester)
+        self.instrumentation.count(len(store), len(subject_cols))
+        
         # Calculate metrics
-        df['Total'] = df[subject_cols].sum(axis=1)
-        max_marks = len(subject_cols) * 100
-        df['Percentage'] = (df['Total'] / max_marks * 100)
-        df['Grade'] = df['Percentage'].apply(self.calculate_grade)
+        with self.instrumentation.phase('aggregate'):
+            aggregates = self.get_aggregates(batch, semester)
+            df = pd.DataFrame({'Name': store.names, 'Roll_No': store.roll_nos})
+            df['Total'] = aggregates['totals']
+            df['Percentage'] = aggregates['percentages']
+            df['Grade'] = aggregates['grades']
+        
+        # Reuse the figure's panels (and heatmap colorbar) if it already has them
+        if len(fig.axes) == 10:
+            (ax1, ax2, ax3, ax4, ax5, ax6, ax7, ax8, ax9), cax = fig.axes[:9], fig.axes[9]
+            for ax in fig.axes:
+                ax.clear()
+        else:
+            fig.clear()
+            ax1, ax2, ax3, ax4, ax5, ax6, ax7, ax8, ax9 = [fig.add_subplot(3, 3, i) for i in range(1, 10)]
+            cax = None
         
-        # Create figure
-        fig = plt.figure(figsize=(18, 12))
         title = f"Performance Dashboard - Batch {batch}"
         if semester_filter:
             title += f" (Semester {semester_filter})"
         fig.suptitle(title, fontsize=20, fontweight='bold')
         
         # 1. Average Marks by Subject
-        ax1 = plt.subplot(3, 3, 1)
-        avg_marks = [df[s].mean() for s in subject_cols]
-        colors = plt.cm.viridis(np.linspace(0, 1, len(subject_cols)))
+        avg_marks = aggregates['average']
+        colors = matplotlib.colormaps['viridis'](np.linspace(0, 1, len(subject_cols)))
         ax1.bar(range(len(subject_cols)), avg_marks, color=colors)
         ax1.set_xticks(range(len(subject_cols)))
         ax1.set_xticklabels(subject_cols, rotation=45, ha='right', fontsize=8)
@@ -372,7 +2520,6 @@ class CollegeDashboard:
         ax1.grid(axis='y', alpha=0.3)
         
         # 2. Percentage Distribution
-        ax2 = plt.subplot(3, 3, 2)
         ax2.hist(df['Percentage'], bins=20, color='#4ECDC4', edgecolor='black', alpha=0.7)
         ax2.axvline(df['Percentage'].mean(), color='red', linestyle='--', 
                     linewidth=2, label=f"Mean: {df['Percentage'].mean():.1f}%")
@@ -383,17 +2530,18 @@ class CollegeDashboard:
         ax2.grid(axis='y', alpha=0.3)
         
         # 3. Grade Distribution
-        ax3 = plt.subplot(3, 3, 3)
-        grade_counts = df['Grade'].value_counts().sort_index()
+        grade_counts = self.grade_distribution(df['Grade'])
         colors_pie = ['#2ecc71', '#27ae60', '#3498db', '#f39c12', '#e74c3c', '#c0392b', '#95a5a6']
         ax3.pie(grade_counts.values, labels=grade_counts.index, autopct='%1.1f%%',
                 colors=colors_pie[:len(grade_counts)], startangle=90)
         ax3.set_title('Grade Distribution', fontweight='bold')
         
         # 4. Box Plot
-        ax4 = plt.subplot(3, 3, 4)
-        subject_data = [df[s].values for s in subject_cols]
+        subject_data = [marks[:, j] for j in range(len(subject_cols))]
         bp = ax4.boxplot(subject_data, patch_artist=True)
+        for artists in bp.values():
+            for artist in artists:
+                artist.set_rasterized(fast)
         for patch, color in zip(bp['boxes'], colors):
             patch.set_facecolor(color)
             patch.set_alpha(0.7)
@@ -404,8 +2552,8 @@ class CollegeDashboard:
         ax4.grid(axis='y', alpha=0.3)
         
         # 5. Top 10 Students
-        ax5 = plt.subplot(3, 3, 5)
-        top_10 = df.nlargest(10, 'Percentage')[['Name', 'Percentage']].sort_values('Percentage')
+        rank_index = self.get_rank_index(batch, semester)
+        top_10 = df.loc[[row for row, _ in rank_index.top(10)], ['Name', 'Percentage']].sort_values('Percentage')
         ax5.barh(range(len(top_10)), top_10['Percentage'], color='#FF6B6B')
         ax5.set_yticks(range(len(top_10)))
         ax5.set_yticklabels(top_10['Name'], fontsize=8)
@@ -414,9 +2562,8 @@ class CollegeDashboard:
         ax5.grid(axis='x', alpha=0.3)
         
         # 6. Pass/Fail by Subject
-        ax6 = plt.subplot(3, 3, 6)
-        pass_counts = [(df[s] >= 40).sum() for s in subject_cols]
-        fail_counts = [(df[s] < 40).sum() for s in subject_cols]
+        pass_counts = aggregates['pass_count']
+        fail_counts = aggregates['fail_count']
         x = np.arange(len(subject_cols))
         ax6.bar(x, pass_counts, label='Pass', color='#2ecc71')
         ax6.bar(x, fail_counts, bottom=pass_counts, label='Fail', color='#e74c3c')
@@ -428,19 +2575,21 @@ class CollegeDashboard:
         ax6.grid(axis='y', alpha=0.3)
         
         # 7. Heatmap (Top 20)
-        ax7 = plt.subplot(3, 3, 7)
-        top_20 = df.nlargest(20, 'Total')
-        heatmap_data = top_20[subject_cols].values
+        top_20 = df.loc[[row for row, _ in rank_index.top(20)]]
+        heatmap_data = marks[top_20.index]
         im = ax7.imshow(heatmap_data, cmap='RdYlGn', aspect='auto', vmin=0, vmax=100)
+        im.set_rasterized(fast)
         ax7.set_xticks(range(len(subject_cols)))
         ax7.set_xticklabels(subject_cols, rotation=45, ha='right', fontsize=8)
         ax7.set_yticks(range(len(top_20)))
         ax7.set_yticklabels(top_20['Name'].values, fontsize=7)
         ax7.set_title('Heatmap (Top 20)', fontweight='bold')
-        plt.colorbar(im, ax=ax7)
+        if cax is None:
+            fig.colorbar(im, ax=ax7)
+        else:
+            fig.colorbar(im, cax=cax)
         
         # 8. Cumulative Distribution
-        ax8 = plt.subplot(3, 3, 8)
         sorted_perc = np.sort(df['Percentage'].values)
         cumulative = np.arange(1, len(sorted_perc) + 1) / len(sorted_perc) * 100
         ax8.plot(sorted_perc, cumulative, linewidth=2, color='#3498db')
@@ -452,10 +2601,9 @@ class CollegeDashboard:
         ax8.axvline(40, color='r', linestyle='--', alpha=0.5)
         
         # 9. Summary Statistics
-        ax9 = plt.subplot(3, 3, 9)
         ax9.axis('off')
         
-        pass_rate = (~(df[subject_cols] < 40).any(axis=1)).sum() / len(df) * 100
+        pass_rate = (~aggregates['has_backlog']).sum() / len(df) * 100
         
         summary = f"""
         SUMMARY STATISTICS
@@ -479,72 +2627,176 @@ class CollegeDashboard:
         ax9.text(0.1, 0.5, summary, fontsize=10, fontfamily='monospace',
                 verticalalignment='center')
         
-        plt.tight_layout()
-        plt.show()
-        print("\nVisualization displayed!")
+        fig.tight_layout()
+    
+    def export_dashboard(self, batch, semester_filter=None):
+        """Render a batch dashboard headlessly to a file; returns its path (None if unavailable)"""
+        if not self.validate_semester_for_batch(batch, semester_filter):
+            return None
+        
+        store = self.get_batch_store(batch)
+        if not store:
+            print(f"\nNo data found for batch {batch}!")
+            return None
+        if not store.get_subjects(semester_filter or None):
+            print("\nNo subjects to visualize!")
+            return None
+        
+        fig = self.get_export_figure('dashboard', (18, 12))
+        self.draw_dashboard(fig, batch, semester_filter, fast=self.export_options['fast'])
+        return self.save_export_figure(fig, f"dashboard_{batch}_sem{semester_filter or 'all'}")
+    
+    def export_semester_comparison(self, batch):
+        """Render a semester comparison headlessly to a file; returns its path (None if unavailable)"""
+        semester_data = self.get_semester_comparison(batch)
+        if semester_data is None:
+            return None
+        
+        fig = self.get_export_figure('comparison', (14, 5))
+        self.draw_semester_comparison(fig, batch, semester_data)
+        return self.save_export_figure(fig, f"comparison_{batch}")
+    
+    def set_export_options(self, directory=None, image_format=None, fast=None):
+        """Set where and how exported figures are written (png or svg; fast lowers dpi and rasterizes)"""
+        if directory is not None:
+            self.export_options['directory'] = directory
+        if image_format is not None:
+            if image_format not in ('png', 'svg'):
+                raise ValueError(f"Unsupported image format: {image_format}")
+            self.export_options['format'] = image_format
+        if fast is not None:
+            self.export_options['fast'] = fast
     
-    def search_student(self):
+    def get_export_figure(self, kind, figsize):
+        """Get the reusable off-screen figure for one kind of export"""
+        if kind not in self.export_figures:
+            # A bare Figure renders with Agg and never touches pyplot or a display
+            from matplotlib.figure import Figure
+            self.export_figures[kind] = Figure(figsize=figsize)
+        return self.export_figures[kind]
+    
+    def save_export_figure(self, fig, name):
+        """Write an export figure to the export directory"""
+        options = self.export_options
+        os.makedirs(options['directory'], exist_ok=True)
+        path = os.path.join(options['directory'], f"{name}.{options['format']}")
+        fig.savefig(path, dpi=EXPORT_FAST_DPI if options['fast'] else EXPORT_DPI)
+        return path
+    
+    @instrumented('search_student')
+    def search_student(self, search_term=None):
         """Search for a student across all batches"""
-        if not self.batch_files:
+        if not self.batch_meta:
             print("\nNo batch data available!")
             return
         
-        search_term = input("\nEnter student name or roll number: ").strip().lower()
+        if search_term is None:
+            search_term = input("\nEnter student name, roll number or roll number prefix ending in *: ").strip().lower()
+        
+        results = self.find_students(search_term)
+        with self.instrumentation.phase('format'):
+            self.print_search_results(search_term, results)
+    
+    def find_students(self, search_term):
+        """Get the students matching a name or roll number, as {batch: DataFrame}
         
-        found = False
-        for batch_name, batch_df in self.batch_files.items():
-            result = batch_df[
-                (batch_df['Name'].str.lower().str.contains(search_term, na=False)) |
-                (batch_df['Roll_No'].str.lower().str.contains(search_term, na=False))
-            ]
+        A term ending in * matches roll numbers starting with the rest of it
+        (2021* finds every roll number beginning 2021) instead of names and
+        roll numbers containing it.
+        """
+        # Group the (batch, row) hits by batch
+        with self.instrumentation.phase('load'):
+            student_index = self.get_student_index()
+        matches = {}
+        with self.instrumentation.phase('filter'):
+            if search_term.endswith('*'):
+                hits = student_index.find_roll_prefix(search_term[:-1])
+            else:
+                hits = student_index.search(search_term)
+            for batch_name, row in hits:
+                matches.setdefault(batch_name, []).append(row)
+        self.instrumentation.count(sum(len(rows) for rows in matches.values()))
+        
+        results = {}
+        for batch_name in self.get_available_batches():
+            rows = np.array(matches.get(batch_name, []), dtype=np.intp)
             
-            if not result.empty:
-                found = True
-                subject_cols = [col for col in result.columns if col not in ['Name', 'Roll_No']]
-                display_df = result.copy()
+            if len(rows) > 0:
+                with self.instrumentation.phase('load'):
+                    store = self.get_batch_store(batch_name)
+                subject_cols = store.subjects
+                display_df = store.to_frame(rows=rows)
                 
                 if subject_cols:
-                    display_df['Total'] = display_df[subject_cols].sum(axis=1)
-                    max_marks = len(subject_cols) * 100
-                    display_df['Percentage'] = (display_df['Total'] / max_marks * 100).round(2)
-                    display_df['Grade'] = display_df['Percentage'].apply(self.calculate_grade)
+                    aggregates = self.get_aggregates(batch_name)
+                    rank_index = self.get_rank_index(batch_name)
+                    display_df['Total'] = aggregates['totals'][rows]
+                    display_df['Percentage'] = aggregates['percentages'][rows].round(2)
+                    display_df['Grade'] = self.calculate_grades(display_df['Percentage'])
+                    display_df['Rank'] = rank_index.rank(rows)
+                    display_df['Percentile'] = rank_index.percentile(rows).round(1)
                 
-                print(f"\n--- Found in Batch {batch_name} ---")
-                print(display_df.to_string(index=False))
+                results[batch_name] = display_df
+        
+        return results
+    
+    def print_search_results(self, search_term, results):
+        """Print search results from find_students"""
+        for batch_name, display_df in results.items():
+            print(f"\n--- Found in Batch {batch_name} ---")
+            print(display_df.to_string(index=False))
         
-        if not found:
+        if not results:
             print(f"\nNo student found matching '{search_term}'")
         print()
     
-    def semester_wise_comparison(self, batch):
+    @instrumented('semester_wise_comparison')
+    def semester_wise_comparison(self, batch, plot=True):
         """Compare performance across semesters for a batch"""
         if not batch:
             print("\nPlease select a batch!")
             return
         
-        df = self.get_batch_data(batch)
-        if df.empty:
-            print(f"\nNo data found for batch {batch}!")
+        with self.instrumentation.phase('aggregate'):
+            semester_data = self.get_semester_comparison(batch)
+        if semester_data is None:
             return
         
-        subject_cols = [col for col in df.columns if col not in ['Name', 'Roll_No']]
+        with self.instrumentation.phase('format'):
+            self.print_semester_comparison(batch, semester_data)
+        if plot:
+            with self.instrumentation.phase('render'):
+                self.plot_semester_comparison(batch, semester_data)
+    
+    def get_semester_comparison(self, batch):
+        """Get {semester: {'subjects', 'avg', 'count'}} for a batch (None if unavailable)"""
+        with self.instrumentation.phase('load'):
+            store = self.get_batch_store(batch)
+        if not store:
+            print(f"\nNo data found for batch {batch}!")
+            return None
+        self.instrumentation.count(len(store), len(store.subjects))
         
         # Group subjects by semester
+        rollups = self.get_semester_rollups(batch)
         semester_data = {}
         for sem in range(1, 9):
-            sem_subjects = self.get_subjects_for_semester(sem)
-            available_subjects = [s for s in sem_subjects if s in subject_cols]
+            available_subjects = store.get_subjects(sem)
             if available_subjects:
                 semester_data[sem] = {
                     'subjects': available_subjects,
-                    'avg': df[available_subjects].mean().mean(),
+                    'avg': rollups.get_summary(sem)['average'],
                     'count': len(available_subjects)
                 }
         
         if not semester_data:
             print("\nNo semester data available!")
-            return
+            return None
         
+        return semester_data
+    
+    def print_semester_comparison(self, batch, semester_data):
+        """Print a semester comparison from get_semester_comparison"""
         print("\n" + "="*70)
         print(f"SEMESTER-WISE COMPARISON - BATCH {batch}")
         print("="*70)
@@ -556,9 +2808,25 @@ class CollegeDashboard:
             print(f"  Average: {data['avg']:.2f}")
             print(f"  Subjects: {', '.join(data['subjects'])}")
             print()
-        
-        # Visualization
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
+    
+    def plot_semester_comparison(self, batch, semester_data):
+        """Plot a semester comparison from get_semester_comparison"""
+        import matplotlib.pyplot as plt
+        fig = plt.figure(figsize=(14, 5))
+        self.draw_semester_comparison(fig, batch, semester_data)
+        plt.show()
+        print("Visualization displayed!")
+    
+    def draw_semester_comparison(self, fig, batch, semester_data):
+        """Draw a semester comparison onto fig, reusing its two axes if it has them"""
+        import matplotlib
+        if len(fig.axes) == 2:
+            ax1, ax2 = fig.axes
+            ax1.clear()
+            ax2.clear()
+        else:
+            fig.clear()
+            ax1, ax2 = fig.subplots(1, 2)
         fig.suptitle(f'Semester-wise Performance - Batch {batch}', fontsize=14, fontweight='bold')
         
         semesters = sorted(semester_data.keys())
@@ -575,7 +2843,7 @@ class CollegeDashboard:
         ax1.legend()
         
         # Bar plot
-        colors = plt.cm.viridis(np.linspace(0, 1, len(semesters)))
+        colors = matplotlib.colormaps['viridis'](np.linspace(0, 1, len(semesters)))
         ax2.bar(semesters, averages, color=colors)
         ax2.set_xlabel('Semester')
         ax2.set_ylabel('Average Marks')
@@ -584,9 +2852,125 @@ class CollegeDashboard:
         ax2.axhline(40, color='r', linestyle='--', alpha=0.5)
         ax2.grid(axis='y', alpha=0.3)
         
-        plt.tight_layout()
-        plt.show()
-        print("Visualization displayed!")
+        fig.tight_layout()
+    
+    def iter_cross_batch_statistics(self, semester=None, subjects=None):
+        """Yield (batch, per-subject statistics) one batch at a time
+        
+        Statistics are arrays aligned to subjects (default: every mapped
+        subject, or those of one semester, in subjects_semester order), NaN
+        where a batch lacks the subject. Each batch is reduced on its own,
+        so only one batch's marks need to be loaded at a time.
+        """
+        if subjects is None:
+            subjects = self.get_subjects_for_semester(semester) if semester else list(self.subject_to_semester)
+        
+        for batch in self.get_available_batches():
+            running = self.get_running_aggregates(batch)
+            
+            # Column of each requested subject in the statistics (-1 if the batch lacks it)
+            positions = {subject: i for i, subject in enumerate(running.subjects)}
+            columns = np.array([positions.get(subject, -1) for subject in subjects], dtype=np.intp)
+            present = columns >= 0
+            
+            def align(values, columns=np.maximum(columns, 0), present=present):
+                values = np.asarray(values, dtype=np.float64)
+                return np.where(present, values[columns], np.nan) if len(values) else np.full(len(present), np.nan)
+            
+            count = align(running.count)
+            yield batch, {
+                'subjects': subjects,
+                'students': count,
+                'average': align(running.mean),
+                'std_dev': align(running.std_dev),
+                'highest': align(running.highest),
+                'lowest': align(running.lowest),
+                'pass_rate': align(running.pass_count) / np.where(count > 0, count, np.nan) * 100,
+            }
+    
+    def get_cross_batch_statistics(self, semester=None, subjects=None):
+        """Get per-subject, per-batch statistics for every batch as one long table"""
+        parts = []
+        for batch, stats in self.iter_cross_batch_statistics(semester, subjects):
+            present = np.nan_to_num(stats['students']) > 0
+            if not present.any():
+                continue
+            subject_names = np.array(stats['subjects'], dtype=object)[present]
+            parts.append(pd.DataFrame({
+                'Subject': subject_names,
+                'Sem': [self.get_subject_semester(subject) for subject in subject_names],
+                'Batch': batch,
+                'Students': stats['students'][present].astype(np.int64),
+                'Average': stats['average'][present].round(2),
+                'Std Dev': stats['std_dev'][present].round(2),
+                'Highest': stats['highest'][present],
+                'Lowest': stats['lowest'][present],
+                'Pass %': stats['pass_rate'][present].round(2),
+            }))
+        
+        columns = ['Subject', 'Sem', 'Batch', 'Students', 'Average', 'Std Dev', 'Highest', 'Lowest', 'Pass %']
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        
+        # Group rows by subject (in mapping order), then batch
+        table = pd.concat(parts, ignore_index=True)
+        order = {subject: i for i, subject in enumerate(self.subject_to_semester)}
+        table['_order'] = table['Subject'].map(order)
+        return table.sort_values(['_order', 'Batch'], kind='stable').drop(columns='_order').reset_index(drop=True)
+    
+    def get_cohort_comparison(self, semester):
+        """Compare one semester across every batch that has completed it"""
+        rows = []
+        for batch in self.get_available_batches():
+            if semester not in self.get_available_semesters_for_batch(batch):
+                continue
+            summary = self.get_semester_rollups(batch).get_summary(semester)
+            rows.append({
+                'Batch': batch,
+                'Students': self.get_batch_store(batch).n_students,
+                'Subjects': summary['subjects'],
+                'Average': round(summary['average'], 2),
+                'Class Average %': round(summary['class_average'], 2),
+                'Highest %': round(summary['highest'], 2),
+                'Lowest %': round(summary['lowest'], 2),
+                'With Backlogs': summary['students_with_backlogs'],
+            })
+        return pd.DataFrame(rows)
+    
+    def get_cross_batch_report(self, semester=None):
+        """Get the cross-batch report: per-subject statistics, plus cohorts for a semester"""
+        if not self.batch_meta:
+            print("\nNo batch data available!")
+            return None
+        
+        report = {'semester': semester, 'subjects': self.get_cross_batch_statistics(semester)}
+        if semester:
+            report['cohorts'] = self.get_cohort_comparison(semester)
+        return report
+    
+    def print_cross_batch_report(self, report):
+        """Print a cross-batch report from get_cross_batch_report"""
+        table = report['subjects']
+        
+        print("\n" + "="*90)
+        print("CROSS-BATCH COMPARISON")
+        if report['semester']:
+            print(f"Semester: {report['semester']}")
+        print("="*90)
+        
+        for title, column in [('SUBJECT AVERAGES BY BATCH', 'Average'), ('PASS % BY BATCH', 'Pass %')]:
+            print(f"\n{title}")
+            print("-" * 90)
+            pivot = table.pivot(index='Subject', columns='Batch', values=column)
+            pivot = pivot.reindex([subject for subject in dict.fromkeys(table['Subject'])])
+            print(pivot.to_string(na_rep='-'))
+        
+        if 'cohorts' in report:
+            print(f"\nSEMESTER {report['semester']} ACROSS COHORTS")
+            print("-" * 90)
+            print(report['cohorts'].to_string(index=False))
+        
+        print("\n" + "="*90 + "\n")
     
     def batch_selection_menu(self):
         """Menu for selecting batch"""
@@ -597,7 +2981,7 @@ class CollegeDashboard:
         
         print("\nAvailable Batches:")
         for i, batch in enumerate(batches, 1):
-            count = len(self.batch_files[batch])
+            count = self.batch_meta[batch]['students']
             print(f"{i}. {batch} ({count} students)")
         
         try:
@@ -662,7 +3046,7 @@ class CollegeDashboard:
         print("\nWelcome to College Student Dashboard System!")
         print()
         
-        if not self.batch_files:
+        if not self.batch_meta:
             print("No batch data found! Please run the dataset generator first.")
             return
         
@@ -722,13 +3106,12 @@ class CollegeDashboard:
                 print("AVAILABLE BATCHES")
                 print("="*70)
                 for batch in self.get_available_batches():
-                    batch_df = self.batch_files[batch]
-                    subject_cols = [col for col in batch_df.columns if col not in ['Name', 'Roll_No']]
-                    max_sem = max([self.subjects_semester[self.subjects_semester['Subject'] == s]['Semester'].values[0] 
-                                    for s in subject_cols if s in self.subjects_semester['Subject'].values])
+                    meta = self.batch_meta[batch]
+                    subject_cols = meta['subjects']
+                    max_sem = self.get_max_semester_for_batch(batch)
                     
                     print(f"\nBatch: {batch}")
-                    print(f"  Students: {len(batch_df)}")
+                    print(f"  Students: {meta['students']}")
                     print(f"  Semesters Completed: {max_sem}")
                     print(f"  Total Subjects: {len(subject_cols)}")
                 print()
@@ -744,6 +3127,342 @@ class CollegeDashboard:
             input("\nPress Enter to continue...")
 
 
+def build_parser():
+    """Build the command line parser for non-interactive reports"""
+    # Global options; also accepted after the command (e.g. "stats ... --format json")
+    def add_global_options(parser, default):
+        parser.add_argument('--format', choices=['text', 'json'], default=default('text'),
+                            help='text reports, or one JSON document per line (default: text)')
+        parser.add_argument('--data-dir', default=default('.'),
+                            help='directory with the batch CSV files (default: .)')
+        parser.add_argument('--storage-mode', choices=['memory', 'memmap'], default=default('memory'),
+                            help='keep marks in memory or memory-mapped from the cache (default: memory)')
+        parser.add_argument('--no-cache', action='store_true', default=default(False),
+                            help='always parse the CSV files instead of the binary cache')
+        parser.add_argument('--sqlite', default=default(None),
+                            help='read and write batches in this SQLite database instead of the CSV files')
+        parser.add_argument('--workers', type=int, default=default(1),
+                            help='build reports in this many worker processes (default: 1)')
+        parser.add_argument('--out', default=default('figures'),
+                            help='directory for exported figures (default: figures)')
+        parser.add_argument('--image-format', choices=['png', 'svg'], default=default('png'),
+                            help='exported figure format (default: png)')
+        parser.add_argument('--fast', action='store_true', default=default(False),
+                            help='export at lower resolution with rasterized boxplots and heatmaps')
+        parser.add_argument('--metrics', default=default(None),
+                            help='append per-action timings to this JSON-lines file')
+        parser.add_argument('--profile', action='store_true', default=default(False),
+                            help='also record a cProfile summary of each action')
+        parser.add_argument('--trace-memory', action='store_true', default=default(False),
+                            help='also record each action\'s allocations with tracemalloc')
+    
+    parser = argparse.ArgumentParser(
+        description='College Student Dashboard. Run without a command for the interactive menu.')
+    add_global_options(parser, lambda value: value)
+    common = argparse.ArgumentParser(add_help=False)
+    add_global_options(common, lambda value: argparse.SUPPRESS)
+    
+    commands = parser.add_subparsers(dest='command')
+    for name, help_text in [('stats', 'statistics report'), ('view', 'student records'),
+                            ('plot', 'export the performance dashboard figure')]:
+        command = commands.add_parser(name, parents=[common], help=help_text)
+        command.add_argument('--batch', action='append', required=True,
+                             help='batch such as 2021-25, or "all"; repeat for several')
+        semester = command.add_mutually_exclusive_group()
+        semester.add_argument('--semester', action='append', type=int, choices=range(1, 9),
+                              help='semester filter; repeat for several (default: all semesters)')
+        semester.add_argument('--all-semesters', action='store_true',
+                              help='one report for all semesters plus one per completed semester')
+    
+    for name, help_text in [('compare', 'semester-wise comparison'),
+                            ('plot-compare', 'export the semester-wise comparison figure')]:
+        command = commands.add_parser(name, parents=[common], help=help_text)
+        command.add_argument('--batch', action='append', required=True,
+                             help='batch such as 2021-25, or "all"; repeat for several')
+    
+    command = commands.add_parser('rank', parents=[common],
+                                  help='students by rank: the best, the weakest or a percentage range')
+    command.add_argument('--batch', action='append', required=True,
+                         help='batch such as 2021-25, or "all"; repeat for several')
+    command.add_argument('--semester', action='append', type=int, choices=range(1, 9),
+                         help='rank by one semester\'s percentage; repeat for several (default: all semesters)')
+    query = command.add_mutually_exclusive_group()
+    query.add_argument('--top', type=int, help='the best students (default: 10)')
+    query.add_argument('--bottom', type=int, help='the weakest students, weakest first')
+    query.add_argument('--between', type=float, nargs=2, metavar=('LOW', 'HIGH'),
+                       help='students scoring LOW to HIGH percent (inclusive)')
+    
+    command = commands.add_parser('backlogs', parents=[common], help='marks below 40, one row per backlog')
+    command.add_argument('--batch', action='append', required=True,
+                         help='batch such as 2021-25, or "all"; repeat for several')
+    command.add_argument('--semester', action='append', type=int, choices=range(1, 9),
+                         help='only this semester\'s subjects; repeat for several (default: all semesters)')
+    command.add_argument('--subject', help='only this subject, such as CS201')
+    command.add_argument('--min-count', type=int, default=1,
+                         help='only students with at least this many backlogs (default: 1)')
+    
+    command = commands.add_parser('cross', parents=[common], help='compare subjects and cohorts across all batches')
+    command.add_argument('--semester', action='append', type=int, choices=range(1, 9),
+                         help='only this semester\'s subjects, plus a cohort comparison; repeat for several')
+    
+    for name, help_text in [('import', 'add students to a batch from a CSV or JSON Lines file'),
+                            ('check-import', 'validate a student file for a batch without importing it')]:
+        command = commands.add_parser(name, parents=[common], help=help_text)
+        command.add_argument('--batch', required=True, help='batch such as 2021-25')
+        command.add_argument('file', help='students with Name, Roll_No and every subject of the batch')
+    
+    command = commands.add_parser('search', parents=[common], help='search students in all batches')
+    command.add_argument('terms', nargs='+',
+                         help='name or roll number (substring match), or a roll number prefix ending in *')
+    
+    command = commands.add_parser('jobs', parents=[common],
+                                  help='run one command per line of a file ("-" for stdin)')
+    command.add_argument('file', help='job file, e.g. a line "stats --batch 2021-25 --semester 3"')
+    
+    command = commands.add_parser('slowest', help='summarize the slowest actions in a metrics file')
+    command.add_argument('file', help='JSON-lines file written with --metrics')
+    command.add_argument('--top', type=int, default=10, help='actions to list (default: 10)')
+    
+    commands.add_parser('menu', parents=[common], help='interactive menu (the default)')
+    return parser
+
+
+def expand_jobs(dashboard, args):
+    """Expand a parsed command into (command, batch or search term, semester) jobs"""
+    if args.command == 'search':
+        return [('search', term, None) for term in args.terms]
+    if args.command == 'cross':
+        return [('cross', 'all', semester) for semester in args.semester or [None]]
+    if args.command in ('import', 'check-import'):
+        return [(args.command, args.batch, args.file)]
+    
+    batches = []
+    for batch in args.batch:
+        batches += dashboard.get_available_batches() if batch == 'all' else [batch]
+    if getattr(args, 'all_semesters', False):
+        return [(args.command, batch, semester) for batch in batches
+                for semester in [None] + dashboard.get_available_semesters_for_batch(batch)]
+    semesters = getattr(args, 'semester', None) or [None]
+    if args.command == 'rank':
+        # semester holds (semester, query) for rank jobs
+        if args.bottom is not None:
+            query = ('bottom', args.bottom)
+        elif args.between:
+            query = ('between', tuple(args.between))
+        else:
+            query = ('top', 10 if args.top is None else args.top)
+        return [('rank', batch, (semester, query)) for batch in batches for semester in semesters]
+    if args.command == 'backlogs':
+        # and (semester, subject, min_count) for backlog jobs
+        return [('backlogs', batch, (semester, args.subject, args.min_count))
+                for batch in batches for semester in semesters]
+    return [(args.command, batch, semester) for batch in batches for semester in semesters]
+
+
+class ThreadStdout:
+    """Stand-in for sys.stdout that sends output from capturing threads to their own buffers"""
+    
+    # Guards installing/removing the stand-in and its per-thread targets
+    lock = threading.Lock()
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.targets = {}
+    
+    def write(self, text):
+        return self.targets.get(threading.get_ident(), self.stream).write(text)
+    
+    def flush(self):
+        self.targets.get(threading.get_ident(), self.stream).flush()
+    
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+@contextlib.contextmanager
+def capture_stdout(target):
+    """Like contextlib.redirect_stdout, but only for the calling thread
+    
+    The server builds reports on several threads at once; swapping the
+    process-wide sys.stdout from each of them would mix their messages and
+    could leave sys.stdout pointing at a finished build's buffer.
+    """
+    thread = threading.get_ident()
+    with ThreadStdout.lock:
+        if not isinstance(sys.stdout, ThreadStdout):
+            sys.stdout = ThreadStdout(sys.stdout)
+        proxy = sys.stdout
+        previous = proxy.targets.get(thread)
+        proxy.targets[thread] = target
+    try:
+        yield target
+    finally:
+        with ThreadStdout.lock:
+            if previous is None:
+                del proxy.targets[thread]
+            else:
+                proxy.targets[thread] = previous
+            if not proxy.targets and sys.stdout is proxy:
+                sys.stdout = proxy.stream
+
+
+def build_report(dashboard, job):
+    """Build one (command, batch or search term, semester) report job
+    
+    Returns (result, messages): result is None if the report is unavailable,
+    and messages holds whatever was printed while building it.
+    """
+    command, target, semester = job
+    messages = io.StringIO()
+    with capture_stdout(messages):
+        if command == 'stats':
+            result = dashboard.get_statistics(target, semester)
+        elif command == 'view':
+            result = dashboard.get_batch_report(target, semester)
+        elif command == 'compare':
+            result = dashboard.get_semester_comparison(target)
+        elif command == 'plot':
+            result = dashboard.export_dashboard(target, semester)
+        elif command == 'plot-compare':
+            result = dashboard.export_semester_comparison(target)
+        elif command == 'rank':
+            result = dashboard.get_rank_report(target, *semester)
+        elif command == 'backlogs':
+            result = dashboard.get_backlogs(target, *semester)
+        elif command == 'cross':
+            result = dashboard.get_cross_batch_report(semester)
+        elif command in ('import', 'check-import'):
+            # semester holds the student file for import jobs
+            try:
+                result = dashboard.import_students(target, semester, dry_run=command == 'check-import')
+            except (ValueError, OSError) as e:
+                print(f"\nCould not import {semester}: {e}")
+                result = None
+        else:
+            result = dashboard.find_students(target)
+    return result, messages.getvalue()
+
+
+def write_report(dashboard, job, result, messages, output_format):
+    """Write a built report to stdout; returns False if it was unavailable"""
+    command, target, semester = job
+    
+    if output_format == 'json':
+        # Messages printed while building an unavailable report become its error text
+        record = {'command': command, ('term' if command == 'search' else 'batch'): target}
+        if command in ('stats', 'view', 'plot', 'cross'):
+            record['semester'] = semester
+        elif command == 'rank':
+            record['semester'], record['query'] = semester
+        elif command == 'backlogs':
+            record['semester'], record['subject'], record['min_count'] = semester
+        elif command in ('import', 'check-import'):
+            record['file'] = semester
+        if result is None:
+            record['error'] = messages.strip()
+        else:
+            record['result'] = to_jsonable(result)
+        print(json.dumps(record))
+    else:
+        sys.stdout.write(messages)
+        if result is None:
+            pass
+        elif command == 'stats':
+            dashboard.print_statistics(result)
+        elif command == 'view':
+            dashboard.print_batch_report(target, semester, result)
+        elif command == 'compare':
+            dashboard.print_semester_comparison(target, result)
+        elif command in ('plot', 'plot-compare'):
+            print(f"Saved {result}")
+        elif command == 'rank':
+            dashboard.print_rank_report(target, *semester, result)
+        elif command == 'backlogs':
+            dashboard.print_backlogs(target, *semester, result)
+        elif command == 'cross':
+            dashboard.print_cross_batch_report(result)
+        elif command in ('import', 'check-import'):
+            dashboard.print_import_result(result)
+        else:
+            dashboard.print_search_results(target, result)
+    
+    sys.stdout.flush()
+    return result is not None
+
+
+def main(argv=None):
+    """Run the interactive menu, or report commands given on the command line"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    
+    if args.command == 'slowest':
+        instrumentation = Instrumentation()
+        records = Instrumentation.read_metrics(args.file)
+        print(f"\nSlowest actions in {args.file} ({len(records)} recorded):")
+        print(instrumentation.slowest(args.top, records).to_string(index=False))
+        print("\nPer action:")
+        print(instrumentation.action_summary(records).to_string(index=False))
+        return 0
+    
+    def open_dashboard():
+        backend = None
+        if args.sqlite:
+            from sqlite_backend import SQLiteBackend
+            backend = SQLiteBackend(args.sqlite)
+        instrumentation = Instrumentation(metrics_file=args.metrics, profile=args.profile,
+                                          trace_memory=args.trace_memory)
+        return CollegeDashboard(args.data_dir, use_cache=not args.no_cache,
+                                storage_mode=args.storage_mode, backend=backend,
+                                instrumentation=instrumentation)
+    
+    if args.command in (None, 'menu'):
+        open_dashboard().run()
+        return 0
+    
+    # Keep loading messages off stdout so it carries only the reports
+    with contextlib.redirect_stdout(sys.stderr):
+        dashboard = open_dashboard()
+    dashboard.set_export_options(args.out, args.image_format, args.fast)
+    
+    if args.command == 'jobs':
+        # Every job shares this process, so batches are loaded and indexed only once
+        parser.set_defaults(format=args.format)
+        with (sys.stdin if args.file == '-' else open(args.file)) as f:
+            lines = [line.strip() for line in f]
+        runs = []
+        for line in lines:
+            if line and not line.startswith('#'):
+                job_args = parser.parse_args(shlex.split(line))
+                if job_args.command in (None, 'menu', 'jobs', 'slowest'):
+                    parser.error(f"not a report command: {line}")
+                runs.append((job_args.format, expand_jobs(dashboard, job_args)))
+    else:
+        runs = [(args.format, expand_jobs(dashboard, args))]
+    
+    jobs = [(output_format, job) for output_format, run_jobs in runs for job in run_jobs]
+    instrumentation = dashboard.instrumentation
+    
+    def run_job(output_format, job):
+        # One action per job, with the dashboard's own phases nested inside
+        with instrumentation.action(job[0], job[1:]):
+            with instrumentation.phase('aggregate'):
+                result, messages = build_report(dashboard, job)
+            with instrumentation.phase('format'):
+                return write_report(dashboard, job, result, messages, output_format)
+    
+    # Imports change the batches, so they always run in this process
+    if args.workers > 1 and not any(job[0] in ('import', 'check-import') for _, job in jobs):
+        from report_scheduler import ReportScheduler
+        scheduler = ReportScheduler(dashboard, args.workers)
+        # Workers aren't instrumented, so the whole parallel run is one action
+        with scheduler, instrumentation.action('scheduled_jobs', (len(jobs), args.workers)):
+            reports = scheduler.run([job for _, job in jobs])
+            ok = all([write_report(dashboard, job, result, messages, output_format)
+                      for (output_format, job), (result, messages) in zip(jobs, reports)])
+    else:
+        ok = all([run_job(output_format, job) for output_format, job in jobs])
+    return 0 if ok else 1
+
+
 if __name__ == "__main__":
-    dashboard = CollegeDashboard()
-    dashboard.run()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
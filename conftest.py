@@ -0,0 +1,26 @@
+import glob
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """A scratch copy of the subject mapping and batch CSVs"""
+    for file in ['subjects_semester.csv'] + glob.glob(os.path.join(HERE, 'batch_*.csv')):
+        shutil.copy(os.path.join(HERE, file), tmp_path)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def new_students():
+    """Build a DataFrame of new students for a batch, every mark set to 50 unless given"""
+    def build(dashboard, batch, rows):
+        subjects = dashboard.get_batch_store(batch).file_subjects
+        return pd.DataFrame([dict({subject: 50.0 for subject in subjects}, **row) for row in rows],
+                            columns=['Name', 'Roll_No'] + subjects)
+    return build
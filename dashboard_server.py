@@ -0,0 +1,383 @@
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Imported up front: college_dashboard otherwise defers them to first use,
+# which several report threads could reach at once
+import numpy  # noqa: F401
+import pandas  # noqa: F401
+
+from college_dashboard import CollegeDashboard, build_report, to_jsonable
+
+# Bytes of encoded responses kept for repeat requests, keyed by report and ETag
+RESPONSE_CACHE_BYTES = 32 * 1024 * 1024
+
+# Longest request line or header accepted
+MAX_LINE_BYTES = 8192
+
+
+class RequestError(Exception):
+    """A request that can't be answered, with the HTTP status to reply with"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ReadWriteLock:
+    """Any number of readers, or one writer; a waiting writer holds off new readers"""
+    
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writing = False
+        self.writers_waiting = 0
+    
+    @contextlib.contextmanager
+    def read(self):
+        with self.condition:
+            while self.writing or self.writers_waiting:
+                self.condition.wait()
+            self.readers += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.readers -= 1
+                if not self.readers:
+                    self.condition.notify_all()
+    
+    @contextlib.contextmanager
+    def write(self):
+        with self.condition:
+            self.writers_waiting += 1
+            while self.writing or self.readers:
+                self.condition.wait()
+            self.writers_waiting -= 1
+            self.writing = True
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+
+
+class DashboardServer:
+    """Serve dashboard reports as JSON over HTTP from one shared CollegeDashboard
+    
+    Endpoints (all GET):
+        /batches                              batches with student and semester counts
+        /batches/<batch>/students[?semester=] view_batch_students
+        /batches/<batch>/statistics[?semester=] calculate_statistics
+        /batches/<batch>/semesters            semester_wise_comparison
+        /batches/<batch>/subjects[?semester=] per-subject statistics only
+        /search?q=<name or roll number>       search_student
+        /students/<roll number>               exact roll number lookup
+        /cross[?semester=]                    cross-batch comparison
+    
+    Reports are built on a thread pool, so the event loop keeps accepting
+    and answering requests meanwhile. Loading a batch (which may evict
+    another) and indexing it for search are not thread-safe, so a build
+    that needs either holds a write lock. Every other build only reads the
+    loaded batches and runs concurrently under a read lock; the per-batch
+    caches they fill are built whole and then stored, so at worst two
+    threads build the same one. JSON encoding runs outside both locks.
+    Concurrent requests for the same report share one build.
+    
+    Every response carries an ETag derived from the versions and file
+    signatures (or database row counts) of the batches it reads, so clients
+    can revalidate with If-None-Match and get 304 until a batch changes. A
+    batch another process wrote to (a CLI import, an add from the menu) is
+    reloaded before the request is answered.
+    """
+    
+    def __init__(self, dashboard, max_workers=None, cache_bytes=RESPONSE_CACHE_BYTES):
+        self.dashboard = dashboard
+        self.executor = ThreadPoolExecutor(max_workers or min(4, os.cpu_count() or 1),
+                                           thread_name_prefix='report')
+        self.lock = ReadWriteLock()
+        # (report key, ETag) -> asyncio task building it
+        self.inflight = {}
+        # (report key, ETag) -> (status, body), least recently used first, at most cache_bytes of bodies
+        self.responses = OrderedDict()
+        self.cache_bytes = cache_bytes
+        self.response_bytes = 0
+        # Batch versions restart at 0 with the process, so ETags also name this server run
+        self.generation = os.urandom(4).hex()
+    
+    def close(self):
+        """Stop the report threads"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    def route(self, path, query):
+        """Map a request path and query to (report job, batches it reads)"""
+        parts = [unquote(part) for part in path.strip('/').split('/') if part]
+        batches = self.dashboard.get_available_batches()
+        
+        def semester():
+            value = query.get('semester', [None])[-1]
+            if value in (None, ''):
+                return None
+            try:
+                return int(value)
+            except ValueError:
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid semester: {value}")
+        
+        if parts == ['batches']:
+            return ('batches', None, None), batches
+        if parts == ['search']:
+            term = query.get('q', [''])[-1].strip()
+            if not term:
+                raise RequestError(HTTPStatus.BAD_REQUEST, 'Missing search term (?q=)')
+            return ('search', term, None), batches
+        if len(parts) == 2 and parts[0] == 'students':
+            return ('lookup', parts[1], None), batches
+        if parts == ['cross']:
+            return ('cross', 'all', semester()), batches
+        if len(parts) == 3 and parts[0] == 'batches':
+            batch, report = parts[1], parts[2]
+            if batch not in self.dashboard.batch_meta:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown batch: {batch}")
+            if report == 'students':
+                return ('view', batch, semester()), [batch]
+            if report == 'statistics':
+                return ('stats', batch, semester()), [batch]
+            if report == 'semesters':
+                return ('compare', batch, None), [batch]
+            if report == 'subjects':
+                return ('subjects', batch, semester()), [batch]
+        raise RequestError(HTTPStatus.NOT_FOUND, f"No such endpoint: {path}")
+    
+    def get_etag(self, batches):
+        """Get the ETag for a report reading these batches at their current versions"""
+        dashboard = self.dashboard
+        versions = ','.join(f"{batch}:{dashboard.batch_versions.get(batch, 0)}:{dashboard.batch_signatures.get(batch)}"
+                            for batch in batches)
+        digest = hashlib.sha1(f"{self.generation}|{versions}".encode()).hexdigest()[:20]
+        return f'"{digest}"'
+    
+    def refresh_batches(self, batches):
+        """Reload the batches other processes have changed (runs on the thread pool)"""
+        with self.lock.write():
+            for batch in batches:
+                if self.dashboard.batch_changed(batch):
+                    self.dashboard.refresh_batch(batch)
+    
+    def list_batches(self):
+        """Get the batches with their student, semester and subject counts"""
+        return [{
+            'batch': batch,
+            'students': self.dashboard.batch_meta[batch]['students'],
+            'semesters': self.dashboard.get_available_semesters_for_batch(batch),
+            'subjects': len(self.dashboard.batch_meta[batch]['subjects']),
+        } for batch in self.dashboard.get_available_batches()]
+    
+    def build_report(self, job):
+        """Build one report's (result, messages)"""
+        if job[0] == 'batches':
+            return self.list_batches(), ''
+        if job[0] == 'subjects':
+            # Pushed down to the storage backend, if there is one
+            return self.dashboard.get_subject_statistics(job[1], job[2]), ''
+        if job[0] == 'lookup':
+            return self.dashboard.lookup_student(job[1]) or None, f"No student with roll number {job[1]}"
+        return build_report(self.dashboard, job)
+    
+    def needs_exclusive(self, job, batches):
+        """Whether building a report would load a batch or extend the search index"""
+        dashboard = self.dashboard
+        if job[0] == 'batches':
+            return False
+        if job[0] in ('subjects', 'lookup') and dashboard.backend is not None:
+            # Answered by the storage backend without loading anything
+            return False
+        if any(batch not in dashboard.batch_files for batch in batches):
+            return True
+        return job[0] in ('search', 'lookup') and any(batch not in dashboard.student_index for batch in batches)
+    
+    def build_response(self, job, batches):
+        """Build one report and encode it (runs on the thread pool)"""
+        with self.lock.read():
+            shared = not self.needs_exclusive(job, batches)
+            if shared:
+                result, messages = self.build_report(job)
+        if not shared:
+            with self.lock.write():
+                result, messages = self.build_report(job)
+        
+        if result is None:
+            status, data = HTTPStatus.NOT_FOUND, {'error': messages.strip() or 'Report unavailable'}
+        else:
+            status, data = HTTPStatus.OK, to_jsonable(result)
+        return status, json.dumps(data).encode()
+    
+    async def get_response(self, job, batches, etag):
+        """Get a report's (status, body), sharing the build with identical requests in flight"""
+        key = (job, etag)
+        if key in self.responses:
+            self.responses.move_to_end(key)
+            return self.responses[key]
+        
+        if key not in self.inflight:
+            loop = asyncio.get_running_loop()
+            self.inflight[key] = asyncio.ensure_future(
+                loop.run_in_executor(self.executor, self.build_response, job, batches))
+        task = self.inflight[key]
+        try:
+            # shield: a client hanging up must not cancel the build others are waiting for
+            response = await asyncio.shield(task)
+        finally:
+            if task.done() and self.inflight.get(key) is task:
+                del self.inflight[key]
+        
+        if key not in self.responses and len(response[1]) <= self.cache_bytes:
+            self.responses[key] = response
+            self.response_bytes += len(response[1])
+            while self.response_bytes > self.cache_bytes:
+                _, (_, body) = self.responses.popitem(last=False)
+                self.response_bytes -= len(body)
+        return response
+    
+    async def respond(self, method, target, headers):
+        """Answer one request, returning (status, extra headers, body)"""
+        if method != 'GET':
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, f"Method not allowed: {method}")
+        
+        url = urlsplit(target)
+        job, batches = self.route(url.path, parse_qs(url.query))
+        if any(self.dashboard.batch_changed(batch) for batch in batches):
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.refresh_batches, batches)
+            # A batch whose file is gone is no longer served
+            job, batches = self.route(url.path, parse_qs(url.query))
+        etag = self.get_etag(batches)
+        if etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+            return HTTPStatus.NOT_MODIFIED, {'ETag': etag}, b''
+        
+        status, body = await self.get_response(job, batches, etag)
+        return status, {'ETag': etag, 'Cache-Control': 'no-cache'}, body
+    
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection until the client closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                if len(request_line) > MAX_LINE_BYTES:
+                    await self.write_response(writer, HTTPStatus.REQUEST_URI_TOO_LONG, {},
+                                              json.dumps({'error': 'Request line too long'}).encode(), False)
+                    break
+                
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self.write_response(writer, HTTPStatus.BAD_REQUEST, {},
+                                              json.dumps({'error': 'Malformed request line'}).encode(), False)
+                    break
+                
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                
+                # Request bodies are not used by any endpoint, but must be read past
+                length = headers.get('content-length', '0') or '0'
+                if not (length.isascii() and length.isdigit()):
+                    await self.write_response(writer, HTTPStatus.BAD_REQUEST, {},
+                                              json.dumps({'error': 'Invalid Content-Length'}).encode(), False)
+                    break
+                if int(length):
+                    await reader.readexactly(int(length))
+                
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                try:
+                    status, extra, body = await self.respond(method, target, headers)
+                except RequestError as e:
+                    status, extra, body = e.status, {}, json.dumps({'error': str(e)}).encode()
+                except Exception as e:
+                    status, extra, body = (HTTPStatus.INTERNAL_SERVER_ERROR, {},
+                                           json.dumps({'error': f"{type(e).__name__}: {e}"}).encode())
+                await self.write_response(writer, status, extra, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+    
+    async def write_response(self, writer, status, extra, body, keep_alive):
+        """Write one HTTP response"""
+        status = HTTPStatus(status)
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+        if status != HTTPStatus.NOT_MODIFIED:
+            lines += ['Content-Type: application/json; charset=utf-8', f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in extra.items()]
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+    
+    async def serve(self, host='127.0.0.1', port=8765):
+        """Serve until cancelled"""
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        address = server.sockets[0].getsockname()
+        print(f"Serving the dashboard on http://{address[0]}:{address[1]}/", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+
+def build_parser():
+    """Build the command line parser"""
+    parser = argparse.ArgumentParser(description='Serve dashboard reports as JSON over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='port to listen on (default: 8765)')
+    parser.add_argument('--data-dir', default='.', help='directory with the batch CSV files')
+    parser.add_argument('--storage-mode', choices=['memory', 'memmap'], default='memory',
+                        help='keep marks in RAM or memory-map them from the sidecar cache')
+    parser.add_argument('--no-cache', action='store_true', help="don't read or write the binary sidecar cache")
+    parser.add_argument('--sqlite', help='serve batches from this SQLite database instead of the CSV files')
+    parser.add_argument('--threads', type=int, help='report threads (default: up to 4)')
+    parser.add_argument('--preload', action='store_true', help='load every batch before serving')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    
+    backend = None
+    if args.sqlite:
+        from sqlite_backend import SQLiteBackend
+        backend = SQLiteBackend(args.sqlite)
+    with contextlib.redirect_stdout(sys.stderr):
+        dashboard = CollegeDashboard(args.data_dir, use_cache=not args.no_cache,
+                                     storage_mode=args.storage_mode, backend=backend)
+    if args.preload:
+        for batch in dashboard.get_available_batches():
+            dashboard.get_batch_store(batch)
+    
+    server = DashboardServer(dashboard, args.threads)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
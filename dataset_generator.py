@@ -1,15 +1,11 @@
+import argparse
+import os
+
 import pandas as pd
 import numpy as np
-import random
-
-# Set random seed for reproducibility
-np.random.seed(42)
-random.seed(42)
 
-print("="*70)
-print("           COLLEGE DATASET GENERATOR")
-print("="*70)
-print()
+# Students generated (and written) per block, so memory use stays flat at any batch size
+CHUNK_ROWS = 50000
 
 # ================== SUBJECT-SEMESTER MAPPING ==================
 
@@ -71,13 +67,6 @@ subjects_data = [
     {'Subject': 'MGT201', 'Semester': 8},
 ]
 
-# Save subject-semester mapping
-subjects_df = pd.DataFrame(subjects_data)
-subjects_df.to_csv('subjects_semester.csv', index=False)
-print("✓ Created: subjects_semester.csv")
-print(f"  Total subjects: {len(subjects_df)}")
-print()
-
 # ================== STUDENT DATA GENERATION ==================
 
 # Student names pool
@@ -92,125 +81,286 @@ last_names = ['Sharma', 'Verma', 'Kumar', 'Singh', 'Patel', 'Reddy', 'Nair', 'Iy
               'Gupta', 'Agarwal', 'Mehta', 'Shah', 'Kulkarni', 'Rao', 'Pillai', 'Menon', 'Das', 'Roy',
               'Banerjee', 'Mukherjee', 'Chatterjee', 'Jain', 'Sinha', 'Mishra', 'Tiwari', 'Pandey', 'Yadav', 'Chauhan']
 
-def generate_batch_data(batch_name, num_students, max_semester):
+# ================== BATCHES ==================
+
+batches_info = [
+    {'name': '2021-25', 'students': 60, 'semesters': 8, 'year': 'Final Year'},
+    {'name': '2022-26', 'students': 65, 'semesters': 6, 'year': 'Third Year'},
+    {'name': '2023-27', 'students': 70, 'semesters': 4, 'year': 'Second Year'},
+    {'name': '2024-28', 'students': 75, 'semesters': 2, 'year': 'First Year'},
+]
+
+year_labels = ['First Year', 'Second Year', 'Third Year', 'Final Year']
+
+
+def build_subjects(subjects_per_semester=None):
+    """
+    Build the subject-semester mapping
+    
+    Args:
+        subjects_per_semester: None for the curriculum above; otherwise every
+            semester keeps that many of its subjects, padded with electives
+            (ELE<sem><nn>) where it has fewer
+    """
+    subjects_df = pd.DataFrame(subjects_data)
+    if subjects_per_semester is None:
+        return subjects_df
+    
+    rows = []
+    for sem in range(1, 9):
+        subjects = subjects_df.loc[subjects_df['Semester'] == sem, 'Subject'].tolist()[:subjects_per_semester]
+        subjects += [f"ELE{sem}{j:02d}" for j in range(1, subjects_per_semester - len(subjects) + 1)]
+        rows.extend({'Subject': subject, 'Semester': sem} for subject in subjects)
+    return pd.DataFrame(rows, columns=['Subject', 'Semester'])
+
+
+def plan_batches(num_batches=None, students=None, last_year=2024):
+    """
+    List the batches to generate, oldest first
+    
+    Args:
+        num_batches: number of batches, the newest starting in last_year
+        students: students in every batch (default: 60 in the oldest, 5 more in each later one)
+        last_year: start year of the newest batch, which has completed 2 semesters
+    """
+    if num_batches is None and students is None:
+        return [dict(batch) for batch in batches_info]
+    
+    num_batches = num_batches or len(batches_info)
+    batches = []
+    for i in range(num_batches):
+        start = last_year - num_batches + 1 + i
+        years_in = last_year - start
+        batches.append({
+            'name': f"{start}-{(start + 4) % 100:02d}",
+            'students': students or 60 + 5 * i,
+            'semesters': min(8, 2 * (years_in + 1)),
+            'year': year_labels[years_in] if years_in < len(year_labels) else 'Graduated',
+        })
+    return batches
+
+
+def middle_initials(block):
+    """Spell a name block number as middle initials: 1 -> 'A. ', 26 -> 'Z. ', 27 -> 'AA. '"""
+    letters = ''
+    while block > 0:
+        block, letter = divmod(block - 1, 26)
+        letters = chr(ord('A') + letter) + letters
+    return f"{letters}. " if letters else ''
+
+
+def generate_batch_chunks(batch_name, num_students, max_semester, subjects_df,
+                          missing_rate=0.0, seed=42, chunk_rows=CHUNK_ROWS):
     """
-    Generate student data for a specific batch
+    Generate student data for a specific batch, chunk_rows students at a time
+    
+    Each block's marks are drawn as whole matrices. Every random stream is
+    seeded from (seed, batch year), so a batch comes out the same whatever
+    the chunk size or the other batches generated alongside it.
     
     Args:
         batch_name: e.g., '2021-25'
         num_students: number of students in the batch
         max_semester: highest semester completed (1-8)
+        subjects_df: subject-semester mapping
+        missing_rate: fraction of marks left blank
+    
+    Yields:
+        DataFrames with Name, Roll_No and one column per subject
     """
     # Get batch year for roll number
     batch_year = batch_name.split('-')[0]
+    name_rng, base_rng, noise_rng, missing_rng = np.random.default_rng([seed, int(batch_year)]).spawn(4)
     
-    # Generate unique student names
-    used_names = set()
-    students = []
-    
-    for i in range(num_students):
-        # Generate unique name
-        while True:
-            name = f"{random.choice(first_names)} {random.choice(last_names)}"
-            if name not in used_names:
-                used_names.add(name)
-                break
-        
-        roll_no = f"{batch_year}{str(i+1).zfill(3)}"
-        
-        # Base performance for this student (consistent across semesters)
-        base_performance = np.random.normal(70, 12)
-        
-        student_data = {
-            'Name': name,
-            'Roll_No': roll_no
-        }
+    batch_subjects = subjects_df[subjects_df['Semester'] <= max_semester]
+    subjects = batch_subjects['Subject'].tolist()
+    # Later semesters are slightly harder
+    difficulty = batch_subjects['Semester'].to_numpy() * 0.5
+    
+    # Unique names: a random pick of "First Last" pairs, with middle initials
+    # once a batch has more students than there are pairs
+    firsts = np.array(first_names, dtype=object)
+    lasts = np.array(last_names, dtype=object)
+    pairs = len(firsts) * len(lasts)
+    blocks = -(-num_students // pairs)
+    picks = name_rng.permutation(blocks * pairs)[:num_students]
+    initials = np.array([middle_initials(block) for block in range(blocks)], dtype=object)
+    roll_width = max(3, len(str(num_students)))
+    
+    for start in range(0, num_students, chunk_rows):
+        stop = min(start + chunk_rows, num_students)
+        chunk_picks = picks[start:stop]
+        pair = chunk_picks % pairs
+        names = firsts[pair % len(firsts)] + ' ' + initials[chunk_picks // pairs] + lasts[pair // len(firsts)]
+        roll_nos = batch_year + pd.Series(np.arange(start + 1, stop + 1)).astype(str).str.zfill(roll_width)
         
-        # Add marks for all subjects up to max_semester
-        for sem in range(1, max_semester + 1):
-            # Get subjects for this semester
-            sem_subjects = subjects_df[subjects_df['Semester'] == sem]['Subject'].tolist()
-            
-            for subject in sem_subjects:
-                # Generate marks with some variation
-                mark = base_performance + np.random.normal(0, 10)
-                # Add semester-specific difficulty (later semesters slightly harder)
-                mark = mark - (sem * 0.5)
-                # Clamp between 0 and 100
-                mark = max(0, min(100, mark))
-                student_data[subject] = round(mark, 2)
+        # Base performance per student (consistent across semesters) plus per-mark variation
+        base_performance = base_rng.normal(70, 12, size=(stop - start, 1))
+        marks = base_performance + noise_rng.normal(0, 10, size=(stop - start, len(subjects))) - difficulty
+        np.clip(marks, 0, 100, out=marks)
+        # Whole hundredths, so the CSV text parses back to exactly these values
+        marks = np.rint(marks * 100) / 100
+        if missing_rate:
+            marks[missing_rng.random(marks.shape) < missing_rate] = np.nan
         
-        students.append(student_data)
+        chunk = pd.DataFrame(marks, columns=subjects)
+        chunk.insert(0, 'Name', names)
+        chunk.insert(1, 'Roll_No', roll_nos.to_numpy(dtype=object))
+        yield chunk
+
+
+def generate_batch_data(batch_name, num_students, max_semester, subjects_df=None, missing_rate=0.0, seed=42):
+    """Generate a whole batch as one DataFrame (for small batches)"""
+    if subjects_df is None:
+        subjects_df = build_subjects()
+    return pd.concat(generate_batch_chunks(batch_name, num_students, max_semester, subjects_df,
+                                           missing_rate, seed), ignore_index=True)
+
+
+def write_batch(batch, subjects_df, out_dir='.', missing_rate=0.0, seed=42,
+                chunk_rows=CHUNK_ROWS, binary=False):
+    """
+    Stream a batch to batch_<name>.csv one block of students at a time
+    
+    With binary=True the marks are also streamed into the
+    dashboard's .npy sidecar cache, so the dashboard maps them without
+    parsing the CSV. Returns the CSV path and its column count.
+    """
+    filename = os.path.join(out_dir, f"batch_{batch['name'].replace('-', '_')}.csv")
+    chunks = generate_batch_chunks(batch['name'], batch['students'], batch['semesters'], subjects_df,
+                                   missing_rate, seed, chunk_rows)
+    
+    dashboard = marks = None
+    names, roll_nos = [], []
+    if binary:
+        from college_dashboard import CollegeDashboard
+        dashboard = CollegeDashboard(out_dir, load=False)
+        dashboard.set_subject_mapping(subjects_df)
+        marks_path, _ = dashboard.get_cache_paths(batch['name'])
+        os.makedirs(dashboard.cache_dir, exist_ok=True)
+    
+    columns = None
+    with open(filename, 'w', newline='') as f:
+        row = 0
+        for chunk in chunks:
+            if columns is None:
+                columns = list(chunk.columns)
+                if binary:
+                    marks = np.lib.format.open_memmap(marks_path, mode='w+', dtype=np.float32,
+                                                      shape=(batch['students'], len(columns) - 2),
+                                                      fortran_order=True)
+            chunk.to_csv(f, header=row == 0, index=False, lineterminator='\n')
+            if binary:
+                marks[row:row + len(chunk)] = chunk[columns[2:]].to_numpy(dtype=np.float32)
+                names.extend(chunk['Name'].tolist())
+                roll_nos.extend(chunk['Roll_No'].tolist())
+            row += len(chunk)
     
-    return pd.DataFrame(students)
+    if binary:
+        marks.flush()
+        del marks
+        # The index records the finished CSV's signature, which is what makes the sidecar valid
+        dashboard.batch_meta[batch['name']] = dashboard.probe_batch_file(filename)
+        dashboard.write_cache_index(batch['name'], columns[2:], columns[2:], names, roll_nos)
+    
+    return filename, len(columns)
 
-# ================== GENERATE BATCH FILES ==================
 
-batches_info = [
-    {'name': '2021-25', 'students': 60, 'semesters': 8, 'year': 'Final Year'},
-    {'name': '2022-26', 'students': 65, 'semesters': 6, 'year': 'Third Year'},
-    {'name': '2023-27', 'students': 70, 'semesters': 4, 'year': 'Second Year'},
-    {'name': '2024-28', 'students': 75, 'semesters': 2, 'year': 'First Year'},
-]
+def build_parser():
+    """Build the command-line parser"""
+    parser = argparse.ArgumentParser(description='Generate synthetic college datasets for the dashboard.')
+    parser.add_argument('--students', type=int, help='students per batch (default: 60, 65, 70, ...)')
+    parser.add_argument('--batches', type=int, help='number of batches (default: 4)')
+    parser.add_argument('--subjects-per-semester', type=int,
+                        help='subjects in every semester (default: the standard curriculum)')
+    parser.add_argument('--missing-rate', type=float, default=0.0, help='fraction of marks left blank')
+    parser.add_argument('--format', choices=['csv', 'npy'], default='csv',
+                        help="npy also writes each batch's .npy sidecar cache for the dashboard")
+    parser.add_argument('--out', default='.', help='output directory')
+    parser.add_argument('--seed', type=int, default=42, help='random seed')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='students generated per block')
+    return parser
 
-print("Generating batch data files...")
-print("-" * 70)
-
-for batch in batches_info:
-    batch_name = batch['name']
-    num_students = batch['students']
-    max_semester = batch['semesters']
-    year = batch['year']
-    
-    print(f"\nGenerating: Batch {batch_name} ({year})")
-    print(f"  Students: {num_students}")
-    print(f"  Semesters completed: {max_semester}")
-    
-    # Generate data
-    batch_df = generate_batch_data(batch_name, num_students, max_semester)
-    
-    # Save to CSV
-    filename = f"batch_{batch_name.replace('-', '_')}.csv"
-    batch_df.to_csv(filename, index=False)
-    
-    print(f"  ✓ Created: {filename}")
-    print(f"    Columns: {len(batch_df.columns)} (Name, Roll_No + {len(batch_df.columns)-2} subjects)")
-
-print()
-print("="*70)
-print("DATASET GENERATION COMPLETE!")
-print("="*70)
-
-# Display summary
-print("\nFiles Created:")
-print("-" * 70)
-print("1. subjects_semester.csv")
-print("   - Maps subjects to their respective semesters")
-print(f"   - Total subjects: {len(subjects_df)}")
-print()
-
-for i, batch in enumerate(batches_info, 2):
-    filename = f"batch_{batch['name'].replace('-', '_')}.csv"
-    print(f"{i}. {filename}")
-    print(f"   - Batch: {batch['name']} ({batch['year']})")
-    print(f"   - Students: {batch['students']}")
-    print(f"   - Semesters: {batch['semesters']}")
-    
-    # Count subjects
-    total_subjects = sum(len(subjects_df[subjects_df['Semester'] == sem]) 
-                        for sem in range(1, batch['semesters'] + 1))
-    print(f"   - Subject columns: {total_subjects}")
-    print()
 
-print("="*70)
-print("\nSemester-wise Subject Breakdown:")
-print("-" * 70)
-for sem in range(1, 9):
-    subjects = subjects_df[subjects_df['Semester'] == sem]['Subject'].tolist()
-    print(f"Semester {sem}: {len(subjects)} subjects")
-    print(f"  {', '.join(subjects)}")
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    for option in ('students', 'batches', 'subjects_per_semester', 'chunk_rows'):
+        if getattr(args, option) is not None and getattr(args, option) < 1:
+            parser.error(f"--{option.replace('_', '-')} must be at least 1")
+    if not 0 <= args.missing_rate < 1:
+        parser.error('--missing-rate must be in [0, 1)')
+    
+    print("="*70)
+    print("           COLLEGE DATASET GENERATOR")
+    print("="*70)
     print()
+    
+    os.makedirs(args.out, exist_ok=True)
+    
+    # Save subject-semester mapping
+    subjects_df = build_subjects(args.subjects_per_semester)
+    subjects_df.to_csv(os.path.join(args.out, 'subjects_semester.csv'), index=False)
+    print("✓ Created: subjects_semester.csv")
+    print(f"  Total subjects: {len(subjects_df)}")
+    print()
+    
+    batches = plan_batches(args.batches, args.students)
+    
+    print("Generating batch data files...")
+    print("-" * 70)
+    
+    for batch in batches:
+        print(f"\nGenerating: Batch {batch['name']} ({batch['year']})")
+        print(f"  Students: {batch['students']}")
+        print(f"  Semesters completed: {batch['semesters']}")
+        
+        filename, n_columns = write_batch(batch, subjects_df, args.out, args.missing_rate, args.seed,
+                                          args.chunk_rows, binary=args.format == 'npy')
+        
+        print(f"  ✓ Created: {os.path.basename(filename)}")
+        print(f"    Columns: {n_columns} (Name, Roll_No + {n_columns-2} subjects)")
+        if args.format == 'npy':
+            print("  ✓ Created: .npy sidecar cache")
+    
+    print()
+    print("="*70)
+    print("DATASET GENERATION COMPLETE!")
+    print("="*70)
+    
+    # Display summary
+    print("\nFiles Created:")
+    print("-" * 70)
+    print("1. subjects_semester.csv")
+    print("   - Maps subjects to their respective semesters")
+    print(f"   - Total subjects: {len(subjects_df)}")
+    print()
+    
+    for i, batch in enumerate(batches, 2):
+        filename = f"batch_{batch['name'].replace('-', '_')}.csv"
+        print(f"{i}. {filename}")
+        print(f"   - Batch: {batch['name']} ({batch['year']})")
+        print(f"   - Students: {batch['students']}")
+        print(f"   - Semesters: {batch['semesters']}")
+        
+        # Count subjects
+        total_subjects = int((subjects_df['Semester'] <= batch['semesters']).sum())
+        print(f"   - Subject columns: {total_subjects}")
+        print()
+    
+    print("="*70)
+    print("\nSemester-wise Subject Breakdown:")
+    print("-" * 70)
+    for sem in range(1, 9):
+        subjects = subjects_df[subjects_df['Semester'] == sem]['Subject'].tolist()
+        print(f"Semester {sem}: {len(subjects)} subjects")
+        print(f"  {', '.join(subjects)}")
+        print()
+    
+    print("="*70)
+    print("✓ All files generated successfully!")
+    print("="*70)
+
 
-print("="*70)
-print("✓ All files generated successfully!")
-print("="*70)
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from college_dashboard import BatchStore, CollegeDashboard, build_report
+
+# Worker-side state, set up once per process by init_worker
+worker_dashboard = None
+worker_segments = []
+
+
+def init_worker(subjects_semester, grade_scale, export_options, batches):
+    """Build a worker's dashboard over the batches' shared-memory marks"""
+    global worker_dashboard, worker_segments
+    
+    dashboard = CollegeDashboard(load=False)
+    dashboard.set_subject_mapping(subjects_semester)
+    dashboard.grade_scale = grade_scale
+    # Figures are exported headlessly; each worker reuses its own figures between jobs
+    dashboard.set_export_options(**export_options)
+    
+    for batch, spec in batches.items():
+        segment = shared_memory.SharedMemory(name=spec['segment'])
+        marks = np.ndarray(spec['shape'], dtype=np.float32, buffer=segment.buf, order='F')
+        marks.flags.writeable = False
+        store = BatchStore(spec['names'], spec['roll_nos'], spec['subjects'], marks,
+                           dashboard.subject_to_semester, spec['file_subjects'])
+        dashboard.set_batch_data(batch, store)
+        # Keep the segment open for as long as the store views it
+        worker_segments.append(segment)
+    
+    worker_dashboard = dashboard
+
+
+def run_worker_job(job):
+    """Build one report in a worker process"""
+    return build_report(worker_dashboard, job)
+
+
+class ReportScheduler:
+    """Build (command, batch or search term, semester) report jobs in a process pool
+    
+    Each batch's marks matrix is copied once into a shared-memory segment that
+    every worker maps, so marks are never pickled per worker or per job. Only
+    names, roll numbers and subject lists travel to the workers, once each at
+    start-up. Results come back in job order, whatever order workers finish in.
+    
+    Figure export jobs ('plot', 'plot-compare') render headlessly in the
+    workers as well, each worker reusing its figures from job to job.
+    """
+    
+    def __init__(self, dashboard, max_workers=None):
+        self.dashboard = dashboard
+        self.max_workers = max_workers or os.cpu_count()
+        # batch -> (segment, worker spec, batch version it was copied at)
+        self.shared = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def share_batch(self, batch):
+        """Copy a batch's marks into shared memory (again if the batch has changed)"""
+        store = self.dashboard.get_batch_store(batch)
+        version = self.dashboard.batch_versions.get(batch, 0)
+        if batch in self.shared and self.shared[batch][2] == version:
+            return
+        self.release_batch(batch)
+        if store is None:
+            return
+        
+        marks = store.get_stored_marks()
+        segment = shared_memory.SharedMemory(create=True, size=max(marks.nbytes, 1))
+        shared_marks = np.ndarray(marks.shape, dtype=np.float32, buffer=segment.buf, order='F')
+        shared_marks[:] = marks
+        del shared_marks
+        
+        spec = {
+            'segment': segment.name,
+            'shape': marks.shape,
+            'names': store.names,
+            'roll_nos': store.roll_nos,
+            'subjects': store.subjects,
+            'file_subjects': store.file_subjects,
+        }
+        self.shared[batch] = (segment, spec, version)
+    
+    def release_batch(self, batch):
+        """Free a batch's shared-memory segment"""
+        if batch in self.shared:
+            segment = self.shared.pop(batch)[0]
+            segment.close()
+            segment.unlink()
+    
+    def close(self):
+        """Free every shared-memory segment"""
+        for batch in list(self.shared):
+            self.release_batch(batch)
+    
+    def run(self, jobs):
+        """Build report jobs in parallel, yielding (result, messages) in job order"""
+        jobs = list(jobs)
+        if any(command in ('search', 'cross') for command, _, _ in jobs):
+            batches = self.dashboard.get_available_batches()
+        else:
+            batches = sorted({batch for _, batch, _ in jobs if batch in self.dashboard.batch_meta})
+        for batch in batches:
+            self.share_batch(batch)
+        
+        worker_batches = {batch: self.shared[batch][1] for batch in batches if batch in self.shared}
+        options = self.dashboard.export_options
+        export_options = {'directory': options['directory'], 'image_format': options['format'],
+                          'fast': options['fast']}
+        initargs = (self.dashboard.subjects_semester, self.dashboard.grade_scale,
+                    export_options, worker_batches)
+        
+        workers = max(1, min(self.max_workers, len(jobs)))
+        with ProcessPoolExecutor(workers, initializer=init_worker, initargs=initargs) as executor:
+            # map returns results in submission order, so output is deterministic
+            yield from executor.map(run_worker_job, jobs,
+                                    chunksize=max(1, len(jobs) // (workers * 4)))
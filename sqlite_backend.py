@@ -0,0 +1,347 @@
+import argparse
+import contextlib
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+from college_dashboard import INGEST_CHUNK_ROWS, BatchStore, CollegeDashboard
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subjects (
+    subject_id INTEGER PRIMARY KEY,
+    subject TEXT NOT NULL UNIQUE,
+    semester INTEGER,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS batches (
+    batch TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS batch_subjects (
+    batch TEXT NOT NULL REFERENCES batches(batch),
+    subject_id INTEGER NOT NULL REFERENCES subjects(subject_id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (batch, subject_id)
+);
+CREATE TABLE IF NOT EXISTS students (
+    student_id INTEGER PRIMARY KEY,
+    batch TEXT NOT NULL REFERENCES batches(batch),
+    row INTEGER NOT NULL,
+    name TEXT,
+    roll_no TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS students_batch_row ON students(batch, row);
+CREATE INDEX IF NOT EXISTS students_roll_no ON students(roll_no);
+CREATE TABLE IF NOT EXISTS marks (
+    student_id INTEGER NOT NULL REFERENCES students(student_id),
+    subject_id INTEGER NOT NULL REFERENCES subjects(subject_id),
+    mark REAL NOT NULL,
+    PRIMARY KEY (student_id, subject_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS marks_subject ON marks(subject_id, mark);
+"""
+
+
+class SQLiteBackend:
+    """Batches stored in an SQLite database instead of batch CSV files
+    
+    Subjects (the subjects_semester mapping), each batch's subject columns,
+    students and their marks live in separate tables; marks are kept in
+    long format, one row per (student, subject), with missing marks simply
+    absent. Students are indexed by roll number and by (batch, row), marks
+    by subject, so single students are looked up and per-subject statistics
+    computed in SQL without loading a batch.
+    
+    The database runs in WAL mode and every write is one IMMEDIATE
+    transaction, so several processes can read and add students safely.
+    """
+    
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        # Autocommit mode; writes open their own transactions (see transaction)
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None,
+                                          check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('PRAGMA foreign_keys=ON')
+        self.connection.executescript(SCHEMA)
+    
+    def close(self):
+        """Close the database connection"""
+        self.connection.close()
+    
+    @contextlib.contextmanager
+    def transaction(self):
+        """Run a block of writes as one transaction, taking the write lock up front"""
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield self.connection
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        self.connection.execute('COMMIT')
+    
+    def set_subject_mapping(self, subjects_semester):
+        """Store the subject-semester mapping (a DataFrame with Subject and Semester)"""
+        with self.transaction() as db:
+            for position, (subject, semester) in enumerate(
+                    zip(subjects_semester['Subject'], subjects_semester['Semester'])):
+                db.execute('INSERT INTO subjects (subject, semester, position) VALUES (?, ?, ?) '
+                           'ON CONFLICT (subject) DO UPDATE SET semester = excluded.semester, '
+                           'position = excluded.position', (subject, int(semester), position))
+    
+    def get_subject_mapping(self):
+        """Get the subject-semester mapping as a DataFrame with Subject and Semester"""
+        rows = self.connection.execute(
+            'SELECT subject, semester FROM subjects WHERE semester IS NOT NULL ORDER BY position').fetchall()
+        return pd.DataFrame(rows, columns=['Subject', 'Semester'])
+    
+    def get_subject_ids(self, subjects):
+        """Get {subject: subject_id}, adding subjects missing from the mapping as unmapped"""
+        db = self.connection
+        for subject in subjects:
+            db.execute('INSERT OR IGNORE INTO subjects (subject, semester, position) '
+                       'SELECT ?, NULL, COALESCE(MAX(position), -1) + 1 FROM subjects', (subject,))
+        placeholders = ','.join('?' * len(subjects))
+        return dict(db.execute(f'SELECT subject, subject_id FROM subjects WHERE subject IN ({placeholders})',
+                               list(subjects)).fetchall())
+    
+    def list_batches(self):
+        """Get {batch: {'subjects': columns in order, 'students': count}}"""
+        db = self.connection
+        batches = {batch: {'subjects': [], 'students': 0}
+                   for batch, in db.execute('SELECT batch FROM batches ORDER BY batch')}
+        for batch, subject in db.execute(
+                'SELECT bs.batch, s.subject FROM batch_subjects bs JOIN subjects s USING (subject_id) '
+                'ORDER BY bs.batch, bs.position'):
+            batches[batch]['subjects'].append(subject)
+        for batch, count in db.execute('SELECT batch, COUNT(*) FROM students GROUP BY batch'):
+            batches[batch]['students'] = count
+        return batches
+    
+    def get_batch_signatures(self, batch=None):
+        """Get {batch: (students, last student id)} for every batch (or just one)
+        
+        Students are only ever appended, each with a new id, so the pair
+        changes with every write to a batch.
+        """
+        rows = self.connection.execute(
+            'SELECT b.batch, COUNT(s.student_id), MAX(s.student_id) FROM batches b '
+            'LEFT JOIN students s USING (batch) WHERE :batch IS NULL OR b.batch = :batch GROUP BY b.batch',
+            {'batch': batch})
+        return {found: (count, last_id) for found, count, last_id in rows}
+    
+    def create_batch(self, batch, subjects):
+        """Add an empty batch with the given subject columns (in transaction)"""
+        db = self.connection
+        db.execute('INSERT INTO batches (batch) VALUES (?)', (batch,))
+        subject_ids = self.get_subject_ids(subjects)
+        db.executemany('INSERT INTO batch_subjects (batch, subject_id, position) VALUES (?, ?, ?)',
+                       [(batch, subject_ids[subject], i) for i, subject in enumerate(subjects)])
+    
+    def get_batch_subject_ids(self, batch):
+        """Get (subject names, subject ids) of a batch in column order"""
+        rows = self.connection.execute(
+            'SELECT s.subject, s.subject_id FROM batch_subjects bs JOIN subjects s USING (subject_id) '
+            'WHERE bs.batch = ? ORDER BY bs.position', (batch,)).fetchall()
+        return [subject for subject, _ in rows], [subject_id for _, subject_id in rows]
+    
+    def insert_students(self, batch, names, roll_nos, marks):
+        """Append students to a batch in one transaction
+        
+        marks holds one row per student in the batch's column order, NaN for
+        missing marks. The students get the rows after the batch's last one,
+        read under the transaction's write lock, so concurrent writers never
+        collide; returns the range of rows they got. Raises ValueError if a
+        roll number is already in the batch.
+        """
+        with self.transaction() as db:
+            given = [roll_no for roll_no in roll_nos if isinstance(roll_no, str)]
+            taken = []
+            for start in range(0, len(given), 500):
+                chunk = given[start:start + 500]
+                taken += [roll_no for roll_no, in db.execute(
+                    f"SELECT roll_no FROM students WHERE batch = ? AND roll_no IN ({','.join('?' * len(chunk))})",
+                    [batch] + chunk)]
+            if taken:
+                raise ValueError(f"Roll numbers already in batch {batch}: {', '.join(taken[:5])}")
+            
+            first_row, = db.execute('SELECT COALESCE(MAX(row), -1) + 1 FROM students WHERE batch = ?',
+                                    (batch,)).fetchone()
+            rows = range(first_row, first_row + len(names))
+            self.write_rows(batch, rows, names, roll_nos, marks)
+        return rows
+    
+    def write_rows(self, batch, rows, names, roll_nos, marks):
+        """Insert students at rows and their marks (in transaction); marks columns in the batch's order"""
+        db = self.connection
+        subject_ids = np.array(self.get_batch_subject_ids(batch)[1], dtype=np.int64)
+        marks = np.asarray(marks, dtype=np.float64).reshape(len(names), len(subject_ids))
+        
+        first_id, = db.execute('SELECT COALESCE(MAX(student_id), 0) + 1 FROM students').fetchone()
+        ids = np.arange(first_id, first_id + len(names))
+        db.executemany('INSERT INTO students (student_id, batch, row, name, roll_no) VALUES (?, ?, ?, ?, ?)',
+                       zip(ids.tolist(), [batch] * len(names), [int(row) for row in rows],
+                           [name if isinstance(name, str) else None for name in names],
+                           [roll_no if isinstance(roll_no, str) else None for roll_no in roll_nos]))
+        
+        # Long format: one row per mark present
+        present = ~np.isnan(marks)
+        student_index, column_index = np.nonzero(present)
+        db.executemany('INSERT INTO marks (student_id, subject_id, mark) VALUES (?, ?, ?)',
+                       zip(ids[student_index].tolist(), subject_ids[column_index].tolist(),
+                           marks[present].tolist()))
+    
+    def load_batch(self, batch, subject_to_semester=None):
+        """Load a whole batch into a BatchStore"""
+        db = self.connection
+        subjects, subject_ids = self.get_batch_subject_ids(batch)
+        students = db.execute('SELECT student_id, name, roll_no FROM students WHERE batch = ? ORDER BY row',
+                              (batch,)).fetchall()
+        student_ids = np.array([student_id for student_id, _, _ in students], dtype=np.int64)
+        
+        # Pivot the long-format marks into the students x subjects matrix
+        marks = np.full((len(students), len(subjects)), np.nan, dtype=np.float32)
+        entries = np.fromiter(db.execute(
+            'SELECT m.student_id, m.subject_id, m.mark FROM marks m JOIN students s USING (student_id) '
+            'WHERE s.batch = ?', (batch,)),
+            dtype=[('student', np.int64), ('subject', np.int64), ('mark', np.float64)])
+        if len(entries):
+            order = np.argsort(student_ids)
+            rows = order[np.searchsorted(student_ids, entries['student'], sorter=order)]
+            column_of = np.full(max(subject_ids) + 1, -1)
+            column_of[subject_ids] = np.arange(len(subject_ids))
+            marks[rows, column_of[entries['subject']]] = entries['mark']
+        
+        return BatchStore([name if name is not None else np.nan for _, name, _ in students],
+                          [roll_no if roll_no is not None else np.nan for _, _, roll_no in students],
+                          subjects, marks, subject_to_semester)
+    
+    def get_student(self, roll_no):
+        """Look up students by exact roll number (index seek, no batch is loaded)
+        
+        Returns [{'batch', 'Name', 'Roll_No', <subject>: mark, ...}] in
+        batch order.
+        """
+        db = self.connection
+        students = []
+        for student_id, batch, name, found_roll_no in db.execute(
+                'SELECT student_id, batch, name, roll_no FROM students WHERE roll_no = ? ORDER BY batch, row',
+                (roll_no,)):
+            student = {'batch': batch, 'Name': name, 'Roll_No': found_roll_no}
+            subjects, subject_ids = self.get_batch_subject_ids(batch)
+            marks = dict(db.execute('SELECT subject_id, mark FROM marks WHERE student_id = ?', (student_id,)))
+            student.update({subject: marks.get(subject_id, np.nan)
+                            for subject, subject_id in zip(subjects, subject_ids)})
+            students.append(student)
+        return students
+    
+    def get_subject_statistics(self, batch, semester=None):
+        """Compute per-subject statistics in SQL, in the dashboard's layout
+        
+        Returns a DataFrame with Subject, Sem, Average, Highest, Lowest,
+        Std Dev (sample) and Pass % (of all the batch's students), subjects
+        in the batch's column order (in semester order within one semester).
+        """
+        query = """
+            WITH batch_marks AS (
+                SELECT m.subject_id, m.mark FROM marks m JOIN students s USING (student_id)
+                WHERE s.batch = :batch
+            ), means AS (
+                SELECT subject_id, AVG(mark) AS mean FROM batch_marks GROUP BY subject_id
+            ), per_subject AS (
+                SELECT b.subject_id, AVG(b.mark) AS average, MAX(b.mark) AS highest, MIN(b.mark) AS lowest,
+                       COUNT(*) AS count, SUM((b.mark - means.mean) * (b.mark - means.mean)) AS m2,
+                       SUM(b.mark >= 40) AS passed
+                FROM batch_marks b JOIN means USING (subject_id)
+                GROUP BY b.subject_id
+            )
+            SELECT s.subject, s.semester, p.average, p.highest, p.lowest, p.count, p.m2, p.passed
+            FROM batch_subjects bs
+            JOIN subjects s USING (subject_id)
+            LEFT JOIN per_subject p USING (subject_id)
+            WHERE bs.batch = :batch AND (:semester IS NULL OR s.semester = :semester)
+            ORDER BY CASE WHEN :semester IS NULL THEN bs.position END, s.semester IS NULL, s.semester, s.position
+        """
+        db = self.connection
+        n_students, = db.execute('SELECT COUNT(*) FROM students WHERE batch = ?', (batch,)).fetchone()
+        rows = db.execute(query, {'batch': batch, 'semester': semester}).fetchall()
+        
+        stats_data = []
+        for subject, sem, average, highest, lowest, count, m2, passed in rows:
+            count = count or 0
+            stats_data.append({
+                'Subject': subject,
+                'Sem': sem if sem is not None else 'N/A',
+                'Average': round(average, 2) if count else np.nan,
+                'Highest': highest if count else np.nan,
+                'Lowest': lowest if count else np.nan,
+                'Std Dev': round(np.sqrt(m2 / (count - 1)), 2) if count > 1 else np.nan,
+                'Pass %': round((passed or 0) / n_students * 100, 2) if n_students else np.nan,
+            })
+        return pd.DataFrame(stats_data, columns=['Subject', 'Sem', 'Average', 'Highest', 'Lowest',
+                                                 'Std Dev', 'Pass %'])
+    
+    def migrate_csv(self, data_dir='.', chunk_rows=INGEST_CHUNK_ROWS, replace=False):
+        """Copy subjects_semester.csv and every batch CSV in data_dir into the database
+        
+        Each batch is streamed in chunks and written in one transaction.
+        Batches already in the database are skipped unless replace is set.
+        Returns the batches copied.
+        """
+        # The dashboard's own reader validates marks exactly as CSV loading does
+        with contextlib.redirect_stdout(sys.stderr):
+            dashboard = CollegeDashboard(data_dir, use_cache=False)
+        self.set_subject_mapping(dashboard.subjects_semester)
+        existing = self.list_batches()
+        
+        copied = []
+        for batch in dashboard.get_available_batches():
+            if batch in existing and not replace:
+                continue
+            file = dashboard.batch_meta[batch]['file']
+            subjects = [col for col in dashboard.read_csv_header(file) if col not in ['Name', 'Roll_No']]
+            with self.transaction() as db:
+                if batch in existing:
+                    self.delete_batch(batch)
+                self.create_batch(batch, subjects)
+                row = 0
+                for names, roll_nos, marks in dashboard.read_batch_chunks(file, chunk_rows):
+                    # Widen exactly as the dashboard does, so stored marks match loaded ones
+                    self.write_rows(batch, range(row, row + len(names)), names, roll_nos,
+                                    np.round(marks.astype(np.float64), 4))
+                    row += len(names)
+            copied.append(batch)
+        return copied
+    
+    def delete_batch(self, batch):
+        """Remove a batch with its students and marks (in transaction)"""
+        db = self.connection
+        db.execute('DELETE FROM marks WHERE student_id IN (SELECT student_id FROM students WHERE batch = ?)',
+                   (batch,))
+        db.execute('DELETE FROM students WHERE batch = ?', (batch,))
+        db.execute('DELETE FROM batch_subjects WHERE batch = ?', (batch,))
+        db.execute('DELETE FROM batches WHERE batch = ?', (batch,))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Copy the batch CSV files into an SQLite database.')
+    parser.add_argument('database', help='SQLite database file (created if missing)')
+    parser.add_argument('--data-dir', default='.', help='directory with subjects_semester.csv and batch CSVs')
+    parser.add_argument('--replace', action='store_true', help='copy batches already in the database again')
+    args = parser.parse_args(argv)
+    
+    backend = SQLiteBackend(args.database)
+    try:
+        copied = backend.migrate_csv(args.data_dir, replace=args.replace)
+    finally:
+        backend.close()
+    for batch in copied:
+        print(f"Copied batch {batch}")
+    print(f"{len(copied)} batches copied into {args.database}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
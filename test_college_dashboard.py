@@ -0,0 +1,443 @@
+import gc
+import io
+import json
+import os
+import shutil
+import sys
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from college_dashboard import CollegeDashboard, GradeScale, Instrumentation, RankIndex, capture_stdout, main
+
+
+def test_chunked_aggregates_match_unchunked(data_dir):
+    whole = CollegeDashboard(data_dir, use_cache=False)
+    for chunk_rows in (1, 7):
+        chunked = CollegeDashboard(data_dir, use_cache=False, chunk_rows=chunk_rows)
+        for batch in whole.get_available_batches():
+            for semester in [None] + whole.get_available_semesters_for_batch(batch):
+                expected = whole.get_running_aggregates(batch, semester)
+                running = chunked.get_running_aggregates(batch, semester)
+                np.testing.assert_array_equal(running.mean, expected.mean)
+                np.testing.assert_array_equal(running.pass_count, expected.pass_count)
+                np.testing.assert_allclose(running.std_dev, expected.std_dev, rtol=1e-12)
+                assert running.pct_mean == expected.pct_mean
+                assert running.top_students() == expected.top_students()
+                pd.testing.assert_frame_equal(chunked.get_subject_statistics(batch, semester),
+                                              whole.get_subject_statistics(batch, semester))
+
+
+
+def test_subject_averages_are_exact_means(data_dir):
+    # CS206 of 2023-27 averages exactly 67.145; summed as floats it came to 67.14500000000002
+    for chunk_rows in (None, 3):
+        dashboard = CollegeDashboard(data_dir, use_cache=False, chunk_rows=chunk_rows)
+        running = dashboard.get_running_aggregates('2023-27')
+        assert running.mean[running.subjects.index('CS206')] == 67.145
+        stats = dashboard.get_subject_statistics('2023-27').set_index('Subject')
+        assert stats.loc['CS206', 'Average'] == 67.14
+
+def test_evicted_batch_is_freed(data_dir):
+    dashboard = CollegeDashboard(data_dir, memory_budget=1, use_cache=False)
+    first, second = dashboard.get_available_batches()[:2]
+    assert dashboard.get_statistics(first) is not None
+    dashboard.get_rank_index(first)
+    store = weakref.ref(dashboard.get_batch_store(first))
+    
+    dashboard.get_batch_store(second)
+    gc.collect()
+    assert first not in dashboard.batch_files
+    assert store() is None
+    assert not any(key[0] == first for key in dashboard.running_aggregates)
+    assert first not in dashboard.semester_rollups and first not in dashboard.backlog_tables
+    
+    # Reloaded on next use, with the same statistics
+    assert dashboard.get_statistics(first)['n_students'] == dashboard.batch_meta[first]['students']
+
+
+def test_batches_loaded_from_the_sidecar_count_against_the_budget(data_dir):
+    CollegeDashboard(data_dir).get_batch_store('2021-25')
+    dashboard = CollegeDashboard(data_dir)
+    store = dashboard.get_batch_store('2021-25')
+    assert not isinstance(store.get_stored_marks(), np.memmap)
+    assert store.nbytes > store.get_stored_marks().nbytes
+    
+    dashboard.memory_budget = store.nbytes
+    dashboard.get_batch_store('2022-26')
+    assert list(dashboard.batch_files) == ['2022-26']
+
+
+def test_batch_with_pending_students_is_not_evicted(data_dir):
+    dashboard = CollegeDashboard(data_dir, memory_budget=1, use_cache=False)
+    first, second = dashboard.get_available_batches()[:2]
+    subjects = dashboard.get_batch_store(first).file_subjects
+    dashboard.queue_student(first, 'Pending Student', 'PENDING01', {subject: 50.0 for subject in subjects})
+    dashboard.get_batch_store(second)
+    assert first in dashboard.batch_files
+
+
+def test_statistics_follow_added_students(data_dir, new_students):
+    dashboard = CollegeDashboard(data_dir)
+    batch = dashboard.get_available_batches()[0]
+    before = dashboard.get_statistics(batch)
+    dashboard.get_aggregates(batch)
+    
+    dashboard.import_students(batch, new_students(dashboard, batch, [{'Name': 'New Student', 'Roll_No': 'NEW001'}]))
+    after = dashboard.get_statistics(batch)
+    assert after['n_students'] == before['n_students'] + 1
+    
+    fresh = CollegeDashboard(data_dir)
+    expected = fresh.get_statistics(batch)
+    assert after['class_average'] == expected['class_average']
+    pd.testing.assert_frame_equal(after['subjects'], expected['subjects'])
+    assert dashboard.get_aggregates(batch) is not None
+
+
+def test_sidecar_cache_is_reused_until_the_file_changes(data_dir):
+    dashboard = CollegeDashboard(data_dir)
+    batch = dashboard.get_available_batches()[0]
+    dashboard.get_batch_store(batch)
+    assert CollegeDashboard(data_dir).load_batch_cache(batch) is not None
+    
+    # Drop the last student from the file behind the cache's back
+    file = dashboard.get_batch_filename(batch)
+    with open(file) as f:
+        lines = f.readlines()
+    with open(file, 'w') as f:
+        f.writelines(lines[:-1])
+    
+    reopened = CollegeDashboard(data_dir)
+    assert reopened.batch_meta[batch]['students'] == len(lines) - 2
+    assert reopened.load_batch_cache(batch) is None
+    assert len(reopened.get_batch_store(batch)) == len(lines) - 2
+
+
+def test_startup_snapshot_notices_new_batch_files(data_dir):
+    first = CollegeDashboard(data_dir)
+    assert os.path.exists(first.get_snapshot_path())
+    assert CollegeDashboard(data_dir).batch_meta == first.batch_meta
+    
+    shutil.copy(os.path.join(data_dir, 'batch_2021_25.csv'), os.path.join(data_dir, 'batch_2030_34.csv'))
+    assert '2030-34' in CollegeDashboard(data_dir).get_available_batches()
+
+
+def test_import_accepts_valid_rows_and_reports_the_rest(data_dir, new_students):
+    dashboard = CollegeDashboard(data_dir)
+    batch = dashboard.get_available_batches()[0]
+    store = dashboard.get_batch_store(batch)
+    n_students = len(store)
+    students = new_students(dashboard, batch, [
+        {'Name': 'Valid Student', 'Roll_No': 'IMP001'},
+        {'Name': 'Repeated Student', 'Roll_No': 'IMP001'},
+        {'Name': 'Existing Student', 'Roll_No': store.roll_nos[0]},
+        {'Name': '', 'Roll_No': 'IMP002'},
+        {'Name': 'Out Of Range', 'Roll_No': 'IMP003', store.file_subjects[0]: 101.0},
+        {'Name': 'Missing Mark', 'Roll_No': 'IMP004', store.file_subjects[0]: np.nan},
+    ])
+    
+    result = dashboard.import_students(batch, students, dry_run=True)
+    assert (result['accepted'], result['imported']) == (1, 0)
+    assert len(store) == n_students
+    
+    result = dashboard.import_students(batch, students)
+    assert result['imported'] == 1
+    assert list(result['rejected']['Reason']) == [
+        'duplicate roll number in file', 'roll number already in batch', 'missing name',
+        'marks outside 0-100', 'missing marks']
+    assert not dashboard.pending_students
+    
+    reopened = CollegeDashboard(data_dir, use_cache=False)
+    assert len(reopened.get_batch_store(batch)) == n_students + 1
+    assert reopened.lookup_student('IMP001')[batch]['Name'].tolist() == ['Valid Student']
+
+
+def test_rewriting_a_batch_file_keeps_its_mode_and_line_endings(data_dir):
+    dashboard = CollegeDashboard(data_dir)
+    batch = dashboard.get_available_batches()[0]
+    file = dashboard.get_batch_filename(batch)
+    os.chmod(file, 0o644)
+    with open(file, 'rb') as f:
+        before = f.read()
+    
+    dashboard.write_batch_file(batch)
+    assert os.stat(file).st_mode & 0o777 == 0o644
+    with open(file, 'rb') as f:
+        after = f.read()
+    assert after.count(b'\r\n') == after.count(b'\n') == before.count(b'\n')
+
+
+def test_import_from_file(data_dir, tmp_path, new_students):
+    dashboard = CollegeDashboard(data_dir)
+    batch = dashboard.get_available_batches()[0]
+    path = str(tmp_path / 'new_students.csv')
+    new_students(dashboard, batch, [{'Name': 'File Student', 'Roll_No': '00042'}]).to_csv(path, index=False)
+    
+    assert dashboard.import_students(batch, path)['imported'] == 1
+    assert dashboard.lookup_student('00042')[batch]['Roll_No'].tolist() == ['00042']
+
+
+def test_import_rejects_columns_that_dont_fit(data_dir, new_students):
+    dashboard = CollegeDashboard(data_dir)
+    batch = dashboard.get_available_batches()[0]
+    students = new_students(dashboard, batch, [{'Name': 'Extra Column', 'Roll_No': 'IMP005'}])
+    with pytest.raises(ValueError, match='Columns not in batch'):
+        dashboard.import_students(batch, students.assign(UNKNOWN101=50.0))
+    with pytest.raises(ValueError, match='Missing columns'):
+        dashboard.import_students(batch, students.drop(columns=students.columns[-1]))
+    with pytest.raises(ValueError, match='Unknown batch'):
+        dashboard.import_students('1999-03', students)
+
+
+def test_capture_stdout_keeps_threads_apart():
+    stdout = sys.stdout
+    barrier = threading.Barrier(4)
+    buffers = [io.StringIO() for _ in range(4)]
+    
+    def build(i):
+        with capture_stdout(buffers[i]):
+            barrier.wait()
+            for _ in range(50):
+                print(i)
+    
+    threads = [threading.Thread(target=build, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [buffer.getvalue() for buffer in buffers] == [f"{i}\n" * 50 for i in range(4)]
+    assert sys.stdout is stdout
+
+
+def test_grade_scale_boundaries():
+    scale = GradeScale()
+    percentages = [100, 90, 89.999, 80, 70, 60, 50, 40, 39.99, 0, np.nan]
+    expected = ['A+', 'A+', 'A', 'A', 'B+', 'B', 'C', 'D', 'F', 'F', 'F']
+    assert list(scale.grade(percentages)) == expected
+    assert [scale.grade_one(p) for p in percentages] == expected
+    
+    # Boundaries may come in any order, and grades may repeat across bands
+    custom = GradeScale([(50, 'Pass'), (75, 'Merit'), (35, 'Pass')], fail_grade='Fail')
+    assert list(custom.grade([80, 75, 74.9, 50, 35, 34.9])) == ['Merit', 'Merit', 'Pass', 'Pass', 'Pass', 'Fail']
+    assert list(custom.grade([80]).categories) == ['Fail', 'Merit', 'Pass']
+
+
+
+def test_new_grade_boundaries_regrade_cached_reports(data_dir):
+    dashboard = CollegeDashboard(data_dir)
+    batch = dashboard.get_available_batches()[0]
+    before = dashboard.get_statistics(batch)
+    aggregates = dashboard.get_aggregates(batch)
+    versions = dict(dashboard.batch_versions)
+    
+    dashboard.set_grade_boundaries([(60, 'Pass'), (75, 'Distinction')], fail_grade='Fail')
+    assert all(dashboard.batch_versions[b] > version for b, version in versions.items())
+    assert dashboard.get_aggregates(batch) is not aggregates
+    
+    percentages = dashboard.get_aggregates(batch)['percentages']
+    expected = np.where(percentages >= 75, 'Distinction', np.where(percentages >= 60, 'Pass', 'Fail'))
+    assert list(dashboard.get_aggregates(batch)['grades']) == expected.tolist()
+    
+    after = dashboard.get_statistics(batch)
+    assert set(after['grade_distribution'].index) <= {'Distinction', 'Pass', 'Fail'}
+    assert after['grade_distribution'].to_dict() == pd.Series(expected).value_counts().to_dict()
+    assert after['grade_distribution'].sum() == before['grade_distribution'].sum()
+    assert set(after['top_students']['Grade']) <= {'Distinction', 'Pass'}
+    assert dashboard.calculate_grade(74.99) == 'Pass'
+
+def test_rank_index_ties_and_percentiles():
+    index = RankIndex([70.0, 85.0, 70.0, 50.0, 85.0])
+    assert index.top(3) == [(1, 85.0), (4, 85.0), (0, 70.0)]
+    assert index.rank([0, 1, 2, 3, 4]).tolist() == [3, 1, 3, 5, 1]
+    assert index.percentile([1, 0, 3]).tolist() == [100.0, 60.0, 20.0]
+    
+    # A new student tied with others ranks with them and lists after them
+    index.add(5, 70.0)
+    assert index.top(4)[2:] == [(0, 70.0), (2, 70.0)]
+    assert index.rank([5]).tolist() == [3]
+    assert index.top(6)[4] == (5, 70.0)
+    assert np.isnan(RankIndex([]).percentile([0])).all()
+
+
+
+def test_rank_index_ranges_ties_and_missing_percentages():
+    index = RankIndex([70.0, np.nan, 85.0, 70.0, 50.0, 85.0])
+    assert index.ranked() == 5
+    assert index.between(70, 85) == [(2, 85.0), (5, 85.0), (0, 70.0), (3, 70.0)]
+    assert index.between(70.5, 84.9) == [] and index.between(0, 100) == index.top(10)
+    assert index.bottom(3) == [(4, 50.0), (3, 70.0), (0, 70.0)]
+    assert index.bottom(10) == index.top(10)[::-1]
+    
+    # Students without a percentage rank last and have no percentile
+    assert index.rank([1, 4]).tolist() == [6, 5]
+    percentiles = index.percentile([2, 4, 1])
+    assert percentiles[:2].tolist() == [100.0, 20.0] and np.isnan(percentiles[2])
+    assert index.top(10)[-1] == (4, 50.0)
+    index.add(6, 50.0)
+    assert index.bottom(2) == [(6, 50.0), (4, 50.0)]
+    assert RankIndex([np.nan, np.nan]).top(1) == []
+
+def test_student_search_matches_a_scan(data_dir):
+    dashboard = CollegeDashboard(data_dir)
+    frames = {batch: dashboard.get_batch_store(batch).to_frame() for batch in dashboard.get_available_batches()}
+    
+    def scan(term):
+        return {batch: df.index[df['Name'].str.lower().str.contains(term.lower(), regex=False) |
+                                df['Roll_No'].str.lower().str.contains(term.lower(), regex=False)].tolist()
+                for batch, df in frames.items()}
+    
+    index = dashboard.get_student_index()
+    for term in ['an', 'Sharma', 'sharma', 'kumar', 'UCSE21', '2400', 'a k', 'zzz']:
+        hits = {batch: [] for batch in frames}
+        for batch, row in index.search(term):
+            hits[batch].append(row)
+        assert hits == scan(term), term
+    
+    found = dashboard.find_students('sharma')
+    assert {batch: len(df) for batch, df in found.items()} == {
+        batch: len(rows) for batch, rows in scan('sharma').items() if rows}
+    
+    # Dropping a batch removes its rows from every lookup
+    batch = dashboard.get_available_batches()[0]
+    roll_no = frames[batch]['Roll_No'].iloc[0]
+    index.discard_batch(batch)
+    assert all(hit[0] != batch for hit in index.search('sharma'))
+    assert index.find_roll(roll_no) == []
+
+
+
+def test_roll_number_prefix_search(data_dir, new_students):
+    dashboard = CollegeDashboard(data_dir)
+    batch = dashboard.get_available_batches()[0]
+    roll_nos = dashboard.get_batch_store(batch).roll_nos
+    prefix = roll_nos[0][:-1]
+    expected = [roll_no for roll_no in roll_nos if roll_no.startswith(prefix)]
+    
+    found = dashboard.find_students(prefix.lower() + '*')
+    assert list(found) == [batch]
+    assert found[batch]['Roll_No'].tolist() == expected
+    # A prefix only matches at the start, unlike a substring search
+    assert dashboard.find_students(prefix[1:] + '*') == {}
+    assert dashboard.find_students(prefix[1:])[batch]['Roll_No'].tolist() == expected
+    
+    # Students added after indexing are found too
+    dashboard.import_students(batch, new_students(dashboard, batch, [{'Name': 'Prefix Student', 'Roll_No': prefix + 'X'}]))
+    assert dashboard.find_students(prefix + '*')[batch]['Roll_No'].tolist() == expected + [prefix + 'X']
+
+
+def test_rank_command(data_dir, capsys):
+    dashboard = CollegeDashboard(data_dir)
+    batch = dashboard.get_available_batches()[0]
+    percentages = dashboard.get_semester_rollups(batch).get_percentages(2).round(2)
+    
+    assert main(['rank', '--batch', batch, '--semester', '2', '--bottom', '3', '--data-dir', data_dir,
+                 '--format', 'json']) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report['query'] == ['bottom', 3]
+    assert [row['Percentage'] for row in report['result']] == sorted(percentages)[:3]
+    assert report['result'][0]['Rank'] == len(percentages)
+    
+    assert main(['rank', '--batch', batch, '--between', '60', '70', '--data-dir', data_dir, '--format', 'json']) == 0
+    result = json.loads(capsys.readouterr().out)['result']
+    expected = dashboard.get_aggregates(batch)['percentages']
+    assert len(result) == ((expected >= 60) & (expected <= 70)).sum()
+    assert all(60 <= row['Percentage'] <= 70 for row in result)
+    
+    assert main(['rank', '--batch', batch, '--top', '0', '--data-dir', data_dir]) == 1
+
+
+def test_backlog_filters(data_dir, capsys):
+    dashboard = CollegeDashboard(data_dir, chunk_rows=7)
+    batch = dashboard.get_available_batches()[0]
+    store = dashboard.get_batch_store(batch)
+    
+    def expected(semester=None, min_count=1):
+        marks = store.to_frame(semester).set_index('Roll_No').drop(columns='Name')
+        failed = marks[marks < 40].stack().dropna()
+        counts = failed.groupby(level=0).size()
+        return sorted(failed[failed.index.get_level_values(0).isin(counts[counts >= min_count].index)].items())
+    
+    for semester, min_count in [(None, 1), (None, 3), (3, 1), (3, 2), (8, 1)]:
+        backlogs = dashboard.get_backlogs(batch, semester, min_count=min_count)
+        assert sorted(zip(zip(backlogs['Roll_No'], backlogs['Subject']), backlogs['Mark'])) == expected(semester, min_count)
+        if semester:
+            assert set(backlogs['Sem']) <= {semester}
+    
+    subject = dashboard.get_backlogs(batch, 3)['Subject'].iloc[0]
+    only = dashboard.get_backlogs(batch, subject=subject)
+    assert len(only) and set(only['Subject']) == {subject}
+    assert dashboard.get_backlogs(batch, subject='UNKNOWN101') is None
+    assert 'has no subject UNKNOWN101' in capsys.readouterr().out
+    
+    assert main(['backlogs', '--batch', batch, '--semester', '3', '--min-count', '2', '--data-dir', data_dir,
+                 '--format', 'json']) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert (report['semester'], report['min_count']) == (3, 2)
+    assert len(report['result']) == len(expected(3, 2))
+
+def test_semester_rollups_match_the_marks(data_dir):
+    dashboard = CollegeDashboard(data_dir, use_cache=False, chunk_rows=7)
+    batch = dashboard.get_available_batches()[0]
+    store = dashboard.get_batch_store(batch)
+    rollups = dashboard.get_semester_rollups(batch)
+    for semester in dashboard.get_available_semesters_for_batch(batch):
+        marks = store.to_frame(semester).drop(columns=['Name', 'Roll_No'])
+        percentages = marks.sum(axis=1) / (marks.shape[1] * 100) * 100
+        np.testing.assert_allclose(rollups.get_percentages(semester), percentages, rtol=1e-12)
+        assert rollups.get_backlog_counts(semester).tolist() == (marks < 40).sum(axis=1).tolist()
+        
+        summary = rollups.get_summary(semester)
+        assert summary['subjects'] == marks.shape[1]
+        assert summary['average'] == pytest.approx(marks.mean().mean())
+        assert summary['lowest'] == pytest.approx(percentages.min())
+        assert summary['students_with_backlogs'] == int(((marks < 40).sum(axis=1) > 0).sum())
+        # Semester percentages feed the semester rank index
+        assert dashboard.get_rank_index(batch, semester).top(1)[0][1] == pytest.approx(percentages.max())
+
+
+def test_cross_batch_statistics_match_each_batch(data_dir):
+    dashboard = CollegeDashboard(data_dir, memory_budget=1, use_cache=False)
+    table = dashboard.get_cross_batch_statistics(semester=1)
+    assert set(table['Sem']) == {1}
+    assert set(table['Batch']) == set(dashboard.get_available_batches())
+    # One batch's marks at a time
+    assert len(dashboard.batch_files) <= 1
+    
+    columns = ['Average', 'Std Dev', 'Highest', 'Lowest', 'Pass %']
+    for batch, rows in table.groupby('Batch'):
+        expected = dashboard.get_subject_statistics(batch, 1).set_index('Subject')
+        rows = rows.set_index('Subject')
+        assert rows['Students'].tolist() == [dashboard.batch_meta[batch]['students']] * len(rows)
+        np.testing.assert_allclose(rows[columns], expected.loc[rows.index, columns], atol=0.01)
+
+
+def test_instrumentation_records_actions_and_phases(data_dir, tmp_path):
+    metrics_file = str(tmp_path / 'metrics.jsonl')
+    instrumentation = Instrumentation(metrics_file=metrics_file)
+    dashboard = CollegeDashboard(data_dir, instrumentation=instrumentation)
+    batch = dashboard.get_available_batches()[0]
+    with capture_stdout(io.StringIO()):
+        dashboard.calculate_statistics(batch)
+    
+    record = instrumentation.records[-1]
+    assert record['action'] == 'calculate_statistics' and record['args'] == [batch]
+    assert {'aggregate', 'format'} <= set(record['phases'])
+    assert sum(record['phases'].values()) <= record['wall_ms'] + 0.01
+    assert record['rows'] > 0
+    assert Instrumentation.read_metrics(metrics_file)[-1]['action'] == 'calculate_statistics'
+    assert instrumentation.slowest(1)['Action'].tolist() == ['calculate_statistics']
+    
+    with pytest.raises(ZeroDivisionError):
+        with instrumentation.action('failing'):
+            1 / 0
+    assert instrumentation.records[-1]['error'].startswith('ZeroDivisionError')
+    
+    # Disabled instrumentation records nothing
+    quiet = Instrumentation()
+    with quiet.action('ignored'):
+        with quiet.phase('load'):
+            pass
+    assert not quiet.records
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import threading
+import time
+
+from college_dashboard import CollegeDashboard
+from dashboard_server import DashboardServer
+
+
+def fetch(server, path, etag=None):
+    """Answer one GET in-process, returning (status, headers, decoded JSON or None)"""
+    headers = {'if-none-match': etag} if etag else {}
+    status, extra, body = asyncio.run(server.respond('GET', path, headers))
+    return status, extra, json.loads(body) if body else None
+
+
+def test_unchanged_report_answers_304(data_dir, new_students):
+    server = DashboardServer(CollegeDashboard(data_dir), 2)
+    try:
+        batch = server.dashboard.get_available_batches()[0]
+        path = f'/batches/{batch}/statistics?semester=1'
+        status, headers, stats = fetch(server, path)
+        assert status == 200 and stats['n_students'] > 0
+        assert fetch(server, path, headers['ETag']) == (304, {'ETag': headers['ETag']}, None)
+        
+        # Adding a student changes the ETag of every report reading the batch
+        server.dashboard.import_students(batch, new_students(server.dashboard, batch,
+                                                             [{'Name': 'New Student', 'Roll_No': 'SRV002'}]))
+        status, renewed, _ = fetch(server, path, headers['ETag'])
+        assert status == 200 and renewed['ETag'] != headers['ETag']
+    finally:
+        server.close()
+
+
+def test_identical_requests_share_one_build(data_dir):
+    server = DashboardServer(CollegeDashboard(data_dir), 4)
+    builds = []
+    build_report = server.build_report
+    
+    def slow_build(job):
+        builds.append((job, threading.current_thread().name))
+        time.sleep(0.2)
+        return build_report(job)
+    server.build_report = slow_build
+    
+    async def fetch_all(paths):
+        return await asyncio.gather(*(server.respond('GET', path, {}) for path in paths))
+    
+    try:
+        batch = server.dashboard.get_available_batches()[0]
+        path = f'/batches/{batch}/statistics'
+        responses = asyncio.run(fetch_all([path] * 5 + [f'{path}?semester=1']))
+        assert len(builds) == 2
+        assert all(response == responses[0] for response in responses[:5])
+        assert responses[5] != responses[0]
+        assert all(name.startswith('report') for _, name in builds)
+        
+        # Built reports are answered from the cache
+        asyncio.run(fetch_all([path] * 3))
+        assert len(builds) == 2
+    finally:
+        server.close()
+
+
+def test_changes_by_another_process_renew_the_etag(data_dir, new_students):
+    server = DashboardServer(CollegeDashboard(data_dir), 2)
+    try:
+        batch = server.dashboard.get_available_batches()[0]
+        path = f'/batches/{batch}/statistics'
+        status, headers, stats = fetch(server, path)
+        assert fetch(server, path, headers['ETag'])[0] == 304
+        
+        writer = CollegeDashboard(data_dir)
+        writer.import_students(batch, new_students(writer, batch, [{'Name': 'Other Process', 'Roll_No': 'SRV001'}]))
+        status, renewed, fresh = fetch(server, path, headers['ETag'])
+        assert status == 200 and renewed['ETag'] != headers['ETag']
+        assert fresh['n_students'] == stats['n_students'] + 1
+        assert fetch(server, path, renewed['ETag'])[0] == 304
+        listed = {entry['batch']: entry['students'] for entry in fetch(server, '/batches')[2]}
+        assert listed[batch] == stats['n_students'] + 1
+    finally:
+        server.close()
+
+
+def test_response_cache_is_bounded_by_bytes(data_dir):
+    server = DashboardServer(CollegeDashboard(data_dir), 2, cache_bytes=100000)
+    try:
+        batches = server.dashboard.get_available_batches()
+        for batch in batches:
+            fetch(server, f'/batches/{batch}/students')
+        # The oldest response made room for the newest
+        cached = [job[1] for job, _ in server.responses]
+        assert batches[0] not in cached and batches[-1] in cached
+        assert 0 < server.response_bytes <= 100000
+        assert server.response_bytes == sum(len(body) for _, body in server.responses.values())
+    finally:
+        server.close()
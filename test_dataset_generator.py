@@ -0,0 +1,29 @@
+import pandas as pd
+
+from dataset_generator import build_subjects, first_names, generate_batch_chunks, last_names
+
+
+def test_names_and_roll_numbers_stay_unique_past_the_name_pairs():
+    subjects_df = build_subjects()
+    num_students = 2 * len(first_names) * len(last_names) + 500
+    batch = pd.concat(generate_batch_chunks('2021-25', num_students, 2, subjects_df, chunk_rows=1000),
+                      ignore_index=True)
+    assert len(batch) == num_students
+    assert batch['Name'].is_unique and batch['Roll_No'].is_unique
+    # Three blocks of pairs: plain, "A." and "B." middle initials
+    pairs = batch['Name'].str.replace(r' [A-Z]+\. ', ' ', regex=True)
+    assert pairs.value_counts().max() <= 3
+    assert set(batch['Name'].str.extract(r' ([A-Z]+)\. ', expand=False).dropna()) == {'A', 'B'}
+    assert batch['Roll_No'].iloc[-1] == f"2021{num_students:04d}"
+    
+    marks = batch.drop(columns=['Name', 'Roll_No'])
+    assert list(marks.columns) == subjects_df[subjects_df['Semester'] <= 2]['Subject'].tolist()
+    assert marks.notna().all().all() and ((marks >= 0) & (marks <= 100)).all().all()
+
+
+def test_batches_do_not_depend_on_the_chunk_size():
+    subjects_df = build_subjects()
+    whole = pd.concat(generate_batch_chunks('2022-26', 300, 4, subjects_df, missing_rate=0.1, chunk_rows=300))
+    chunked = pd.concat(generate_batch_chunks('2022-26', 300, 4, subjects_df, missing_rate=0.1, chunk_rows=7))
+    pd.testing.assert_frame_equal(chunked.reset_index(drop=True), whole.reset_index(drop=True))
+    assert whole.drop(columns=['Name', 'Roll_No']).isna().any().any()
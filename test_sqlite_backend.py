@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+
+from college_dashboard import CollegeDashboard
+from sqlite_backend import SQLiteBackend
+
+
+@pytest.fixture
+def backend(data_dir, tmp_path):
+    backend = SQLiteBackend(str(tmp_path / 'dashboard.db'))
+    backend.migrate_csv(data_dir)
+    yield backend
+    backend.close()
+
+
+def test_subject_statistics_match_loaded_batches(data_dir, backend):
+    csv_dashboard = CollegeDashboard(data_dir, use_cache=False)
+    dashboard = CollegeDashboard(data_dir, backend=backend)
+    batch = dashboard.get_available_batches()[0]
+    for semester in (None, 1):
+        pushed_down = dashboard.get_subject_statistics(batch, semester)
+        assert batch not in dashboard.batch_files
+        expected = csv_dashboard.get_subject_statistics(batch, semester)
+        pd.testing.assert_frame_equal(pushed_down, expected, check_dtype=False, atol=0.01)
+
+
+def test_statistics_report_uses_the_sql_aggregates(data_dir, backend, monkeypatch):
+    dashboard = CollegeDashboard(data_dir, backend=backend)
+    batch = dashboard.get_available_batches()[0]
+    calls = []
+    pushed_down = backend.get_subject_statistics
+    monkeypatch.setattr(backend, 'get_subject_statistics', lambda *args: calls.append(args) or pushed_down(*args))
+    
+    stats = dashboard.get_statistics(batch, 2)
+    assert batch in dashboard.batch_files
+    assert calls == [(batch, 2)]
+    assert stats['subjects']['Subject'].tolist() == dashboard.get_subjects_for_semester(2)
+
+
+def test_added_students_keep_their_store_rows(data_dir, backend, new_students):
+    dashboard = CollegeDashboard(data_dir, backend=backend)
+    batch = dashboard.get_available_batches()[0]
+    n_students = len(dashboard.get_batch_store(batch))
+    
+    dashboard.import_students(batch, new_students(dashboard, batch, [{'Name': 'New Student', 'Roll_No': 'SQL001'}]))
+    rows = backend.connection.execute('SELECT row FROM students WHERE roll_no = ?', ('SQL001',)).fetchall()
+    assert rows == [(n_students,)]
+    assert not dashboard.pending_students
+
+
+def test_concurrent_writers_both_commit(data_dir, backend, new_students):
+    first = CollegeDashboard(data_dir, backend=backend)
+    second = CollegeDashboard(data_dir, backend=SQLiteBackend(backend.path))
+    batch = first.get_available_batches()[-1]
+    n_students = len(first.get_batch_store(batch))
+    second.get_batch_store(batch)
+    
+    first.import_students(batch, new_students(first, batch, [{'Name': 'First Writer', 'Roll_No': 'SQL002'}]))
+    second.import_students(batch, new_students(second, batch, [{'Name': 'Second Writer', 'Roll_No': 'SQL003'}]))
+    assert not second.pending_students
+    rows = backend.connection.execute('SELECT row, roll_no FROM students WHERE batch = ? AND row >= ? ORDER BY row',
+                                      (batch, n_students)).fetchall()
+    assert rows == [(n_students, 'SQL002'), (n_students + 1, 'SQL003')]
+    
+    # The second writer reloaded the batch, so its rows match the database again
+    store = second.get_batch_store(batch)
+    assert store.roll_nos[n_students:].tolist() == ['SQL002', 'SQL003']
+    assert second.lookup_student('SQL002')[batch]['Name'].tolist() == ['First Writer']
+
+
+def test_menu_reports_a_roll_number_taken_by_another_writer(data_dir, backend, new_students, monkeypatch, capsys):
+    first = CollegeDashboard(data_dir, backend=backend)
+    second = CollegeDashboard(data_dir, backend=SQLiteBackend(backend.path))
+    batch = first.get_available_batches()[-1]
+    subjects = second.get_batch_store(batch).get_subjects()
+    n_students = len(second.get_batch_store(batch))
+    first.import_students(batch, new_students(first, batch, [{'Name': 'First Writer', 'Roll_No': 'SQL004'}]))
+    
+    answers = iter([str(second.get_available_batches().index(batch) + 1), 'Second Writer', 'SQL004'] +
+                   ['50'] * len(subjects))
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    second.add_student_to_batch()
+    assert 'Could not add student Second Writer' in capsys.readouterr().out
+    assert not second.pending_students
+    
+    # A later add goes through, after the other writer's student
+    second.import_students(batch, new_students(second, batch, [{'Name': 'Later', 'Roll_No': 'SQL005'}]))
+    assert second.get_batch_store(batch).roll_nos[n_students:].tolist() == ['SQL004', 'SQL005']